@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 import simdkalman
 
@@ -176,7 +177,13 @@ class FBB_Kalman(IStrategy):
 
         # dataframe['kf_model'] = dataframe['close'].rolling(window=self.buy_kf_window.value).apply(self.model)
         # informative['kf_predict'] = informative['close'].rolling(window=self.buy_kf_window.value).apply(self.predict)
-        informative['kf_predict'] = informative['close'].rolling(window=self.kf_window).apply(self.predict)
+        if self.kf_lookahead == 0:
+            # the filter parameters are fixed, so the same per-window weights can be applied to all windows
+            informative['kf_predict'] = rm.rolling_apply(informative['close'], self.kf_window,
+                                                         rm.kalman_linear_raw_last,
+                                                         params=rm.kalman_weights(self.kf_window, 2.0, 0.5))
+        else:
+            informative['kf_predict'] = informative['close'].rolling(window=self.kf_window).apply(self.predict)
 
 
         # merge into normal timeframe
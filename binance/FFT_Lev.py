@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 
 
@@ -77,6 +78,12 @@ class FFT_Lev(IStrategy):
 
     custom_trade_info = {}
 
+    # cached model results, so that only new candles are modelled in live/dry-run modes
+    model_cache = rm.ModelCache()
+
+    # if True, model all pairs in a single batch in bot_loop_start() (live/dry-run only)
+    batch_pairs = False
+
     ###################################
 
     # Strategy Specific Variable Storage
@@ -149,6 +156,23 @@ class FFT_Lev(IStrategy):
     
     ###################################
 
+    """
+    Batch Model Calculation
+    """
+
+    def bot_loop_start(self, **kwargs) -> None:
+        """
+        If batch_pairs is set, the model is calculated for all pairs in one pass at the start of each loop.
+        populate_indicators() then just picks up the cached results
+        """
+        if self.batch_pairs and self.dp.runmode.value in ('live', 'dry_run'):
+            pairs = self.dp.current_whitelist()
+            dataframes = {pair: self.dp.get_pair_dataframe(pair=pair, timeframe=self.inf_timeframe) for pair in pairs}
+            self.model_cache.update_all(dataframes, self.inf_timeframe, self.fft_window, rm.fft_last)
+        return
+
+    ###################################
+
     """
     Indicator Definitions
     """
@@ -162,7 +186,8 @@ class FFT_Lev(IStrategy):
 
         # FFT
 
-        informative['fft_predict'] = informative['close'].rolling(window=self.fft_window).apply(self.model)
+        informative['fft_predict'] = self.model_cache.update(curr_pair, self.inf_timeframe, informative,
+                                                             self.fft_window, rm.fft_last)
 
         # merge into normal timeframe
         dataframe = merge_informative_pair(dataframe, informative, self.timeframe, self.inf_timeframe, ffill=True)
@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 from  simdkalman import KalmanFilter
 
@@ -80,21 +81,18 @@ class KalmanSIMD(IStrategy):
 
     custom_trade_info = {}
 
+    # cached model results, so that only new candles are modelled in live/dry-run modes
+    model_cache = rm.ModelCache()
+
+    # if True, model all pairs in a single batch in bot_loop_start() (live/dry-run only)
+    batch_pairs = False
+
     ###################################
 
     # Strategy Specific Variable Storage
 
     kf_window = startup_candle_count
-    filter_list = {}
-    filter_init_list = {}
-
-    kalman_filter = KalmanFilter(
-                state_transition=1.0,
-                process_noise=2.0,
-                observation_model=1.0,
-                observation_noise=0.5
-            )
-    current_pair = ""
+    filter_list = {}  # fitted filter parameters (process_noise, observation_noise) per pair
 
 
     ## Hyperopt Variables
@@ -152,6 +150,37 @@ class KalmanSIMD(IStrategy):
     
     ###################################
 
+    """
+    Batch Model Calculation
+    """
+
+    def bot_loop_start(self, **kwargs) -> None:
+        """
+        If batch_pairs is set, the model is calculated for all pairs in one pass at the start of each loop.
+        populate_indicators() then just picks up the cached results
+        """
+        if self.batch_pairs and self.dp.runmode.value in ('live', 'dry_run'):
+            pairs = self.dp.current_whitelist()
+            dataframes = {pair: self.dp.get_pair_dataframe(pair=pair, timeframe=self.inf_timeframe) for pair in pairs}
+            for pair, informative in dataframes.items():
+                self.fit_filter(pair, informative)
+            self.model_cache.update_all(dataframes, self.inf_timeframe, self.kf_window, rm.kalman_last,
+                                        params=self.filter_list)
+        return
+
+    def fit_filter(self, pair: str, informative: DataFrame):
+        # fit the filter parameters for the pair (once only), against a batch of windows
+        if not pair in self.filter_list:
+            self.filter_list[pair] = rm.kalman_fit(informative['close'], self.kf_window, n_iter=6)
+        return
+
+    def update_model(self, pair: str, informative: DataFrame) -> np.ndarray:
+        self.fit_filter(pair, informative)
+        return self.model_cache.update(pair, self.inf_timeframe, informative, self.kf_window, rm.kalman_last,
+                                       params=self.filter_list[pair])
+
+    ###################################
+
     """
     Indicator Definitions
     """
@@ -165,25 +194,7 @@ class KalmanSIMD(IStrategy):
 
         # Kalman Filter
 
-        # get filter for current pair
-
-        self.current_pair = curr_pair
-
-        # create if not already done
-        if not curr_pair in self.filter_list:
-            self.filter_list[curr_pair] = kalman_filter = KalmanFilter(
-                state_transition=1.0,
-                process_noise=2.0,
-                observation_model=1.0,
-                observation_noise=0.5
-            )
-            self.filter_init_list[curr_pair] = False
-
-
-        # set current filter (can't pass parameter to apply())
-        self.kalman_filter = self.filter_list[curr_pair]
-
-        informative['kf_model'] = informative['close'].rolling(window=self.kf_window).apply(self.model)
+        informative['kf_model'] = self.update_model(curr_pair, informative)
         # informative['kf_predict'] = informative['kf_model'].rolling(window=self.kf_window).apply(self.predict)
 
         # merge into normal timeframe
@@ -227,44 +238,6 @@ class KalmanSIMD(IStrategy):
 
     ###################################
 
-    def model(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        # init filter if needed
-        if not self.filter_init_list[self.current_pair]:
-            self.filter_init_list[self.current_pair] = True
-            self.filter_list[self.current_pair] = self.filter_list[self.current_pair].em(scaled, n_iter=6)
-
-        # get the Kalman model
-        restored_sig = self.kalmanModel(scaled, self.kalman_filter)
-
-        # re-trend
-        model = (restored_sig * w_std) + w_mean
-
-        length = len(model)
-        return model[length-1]
-    
-    def scaledModel(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        # get the Fourier model
-        model = self.kalmanModel(scaled, self.kalman_filter)
-
-        length = len(model)
-        return model[length-1]
-
     def scaledData(self, a: np.ndarray) -> np.float:
 
         # scale the data
@@ -277,32 +250,6 @@ class KalmanSIMD(IStrategy):
         length = len(scaled)
         return scaled.ravel()[length-1]
 
-    def kalmanModel(self, data, kfilter: KalmanFilter):
-
-        n = len(data)
-        x = np.array(data)
-
-        # kfilter = kfilter.em(data, n_iter=6)
-
-        # mean, cov = kfilter.filter(x)
-        # kfilter.filter_update(mean[0], cov[0])
-        #
-        # mean = mean.squeeze()
-        # print("model(", len(mean), "): ", mean)
-
-        # predict next close
-        smoothed = kfilter.smooth(x)
-        pr_mean = smoothed.observations.mean
-        restored_sig = pr_mean.squeeze()
-        # print ("Predict(", len(restored_sig), "): ", restored_sig)
-
-
-        ldiff = len(restored_sig) - len(x)
-        model = restored_sig[ldiff:]
-
-        return model
-
-
     def predict(self, a: np.ndarray) -> np.float:
 
         # predicts the next value using polynomial extrapolation
@@ -6,7 +6,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from sklearn.manifold import LocallyLinearEmbedding
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -33,6 +32,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+LocallyLinearEmbedding = lazy_from('sklearn.manifold', 'LocallyLinearEmbedding')
+
 import logging
 import warnings
 
@@ -43,19 +45,22 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 import custom_indicators as cta
 from finta import TA as fta
 
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.metrics import classification_report
-from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.preprocessing import StandardScaler, RobustScaler
-import sklearn.decomposition as skd
-from sklearn.preprocessing import LabelEncoder, StandardScaler, MinMaxScaler
-
-from sklearn.metrics import make_scorer
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.model_selection import cross_validate
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+classification_report = lazy_from('sklearn.metrics', 'classification_report')
+ConfusionMatrixDisplay = lazy_from('sklearn.metrics', 'ConfusionMatrixDisplay')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+skd = lazy_import('sklearn.decomposition')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+
+make_scorer = lazy_from('sklearn.metrics', 'make_scorer')
+accuracy_score = lazy_from('sklearn.metrics', 'accuracy_score')
+precision_score = lazy_from('sklearn.metrics', 'precision_score')
+recall_score = lazy_from('sklearn.metrics', 'recall_score')
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+cross_validate = lazy_from('sklearn.model_selection', 'cross_validate')
 
 import random
 
@@ -66,18 +71,15 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 from tqdm import tqdm
 
 from CompressionAutoEncoder import CompressionAutoEncoder
@@ -191,6 +193,7 @@ class Anomaly(IStrategy):
 
     compressor = None
     compress_data = True
+    compact_features = False  # normalise into a single float32 array (in place), rather than float64 copies
 
     num_pairs = 0
     buy_classifier = None
@@ -398,8 +401,12 @@ class Anomaly(IStrategy):
 
             print("    Lookahead: ", self.curr_lookahead, " candles (", self.lookahead_hours, " hours)")
 
-        # create labels used for training
-        buys, sells = self.create_training_data(dataframe)
+        # create labels used for training (cached, so only generated once for any given set of candles)
+        key = DataframeUtils.label_key(dataframe, self.__class__.__name__, self.lookahead_hours,
+                                       self.n_profit_stddevs, self.n_loss_stddevs)
+        labels, _ = DataframeUtils.get_cached_labels(curr_pair, key, lambda: self.create_training_data(dataframe),
+                                                     debug_df=self.dbg_curr_df)
+        buys, sells = labels
 
         # drop last group (because there cannot be a prediction)
         df = dataframe.iloc[:-self.curr_lookahead]
@@ -573,7 +580,8 @@ class Anomaly(IStrategy):
 
         rand_st = 27  # use fixed number for reproducibility
 
-        full_df_norm = DataframeUtils.norm_dataframe(dataframe)
+        full_df_norm = DataframeUtils.norm_dataframe(dataframe, pair=curr_pair, tag=self.__class__.__name__,
+                                                     compact=self.compact_features)
 
 
         if self.compress_data:
@@ -659,18 +667,18 @@ class Anomaly(IStrategy):
         # if running 'plot', reconstruct the original dataframe for display
         if self.dp.runmode.value in ('plot'):
             if self.compress_data:
-                df_norm = DataframeUtils.norm_dataframe(dataframe)  # this also resets the scaler
+                df_norm = DataframeUtils.norm_dataframe(dataframe, pair=curr_pair, tag=self.__class__.__name__)
                 df_compressed = self.compress_dataframe(df_norm)
                 df_recon_compressed = self.buy_classifier.reconstruct(df_compressed)
                 df_recon_norm = self.compressor.inverse_transform(df_recon_compressed)
                 df_recon_norm = pd.DataFrame(df_recon_norm, columns=df_norm.columns)
-                df_recon = DataframeUtils.denorm_dataframe(df_recon_norm)
+                df_recon = DataframeUtils.denorm_dataframe(df_recon_norm, pair=curr_pair, tag=self.__class__.__name__)
                 dataframe['%recon'] = df_recon['close']
             else:
                 # debug: get reconstructed dataframe and save 'close' as a comparison
-                tmp = DataframeUtils.norm_dataframe(dataframe)  # this just resets the scaler
+                tmp = DataframeUtils.norm_dataframe(dataframe, pair=curr_pair, tag=self.__class__.__name__)
                 df_recon_norm = self.buy_classifier.reconstruct(tmp)
-                df_recon = DataframeUtils.denorm_dataframe(df_recon_norm)
+                df_recon = DataframeUtils.denorm_dataframe(df_recon_norm, pair=curr_pair, tag=self.__class__.__name__)
                 dataframe['%recon'] = df_recon['close']
         return dataframe
 
@@ -738,7 +746,9 @@ class Anomaly(IStrategy):
 
         if clf:
             # print("    predicting... - dataframe:", dataframe.shape)
-            df_norm = DataframeUtils.norm_dataframe(dataframe)
+            # use the scaler fitted when training
+            df_norm = DataframeUtils.norm_dataframe(dataframe, pair=pair, tag=self.__class__.__name__, fit=False,
+                                                    compact=self.compact_features)
             if self.compress_data:
                 df_norm = self.compress_dataframe(df_norm)
             predict = clf.predict(df_norm)
@@ -14,6 +14,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, setup_tensorflow
+
 import logging
 import warnings
 
@@ -28,22 +30,20 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 
-import h5py
+h5py = lazy_import('h5py')
 
 import DataframeUtils
+from ModelRegistry import model_registry, clone_keras
 
 class AnomalyDetectorKeras():
 
@@ -176,6 +176,9 @@ class AnomalyDetectorKeras():
 
         # print("    train_tensor:{} test_tensor:{}".format(np.shape(train_tensor), np.shape(test_tensor)))
 
+        # a loaded model is shared, so train a copy of it
+        self.model = model_registry.copy_for_training(self.model, clone_keras)
+
         # Model weights are saved at the end of every epoch, if it's the best seen so far.
         fhis = self.model.fit(train_tensor, train_tensor,
                                     batch_size=self.batch_size,
@@ -304,6 +307,7 @@ class AnomalyDetectorKeras():
             
         print("    saving model to: ", path)
         keras.models.save_model(self.model, filepath=path)
+        model_registry.put(path, self.model)
         return
 
     def load(self, path=""):
@@ -315,20 +319,25 @@ class AnomalyDetectorKeras():
             self.model_path = path
 
         model = None
-        
-        # if model exists, load it
-        if os.path.exists(path):
-            print("    Loading existing model ({})...".format(path))
+
+        def loader(model_path):
+            print("    Loading existing model ({})...".format(model_path))
             try:
-                model = keras.models.load_model(path, compile=False)
+                model = keras.models.load_model(model_path, compile=False)
                 # optimizer = keras.optimizers.Adam()
                 optimizer = keras.optimizers.Adam(learning_rate=0.001)
                 model.compile(metrics=['accuracy', 'mse'], loss='mse', optimizer=optimizer)
-                self.is_trained = True
-
+                return model
             except Exception as e:
                 print("    ", str(e))
-                print("    Error loading model from {}. Check whether model format changed".format(path))
+                print("    Error loading model from {}. Check whether model format changed".format(model_path))
+                return None
+
+        # if model exists, load it (only read from disk once per process, then shared)
+        if os.path.exists(path):
+            model = model_registry.get(path, loader)
+            if model is not None:
+                self.is_trained = True
         else:
             print("    model not found ({})...".format(path))
 
@@ -14,6 +14,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+
 import logging
 import warnings
 
@@ -28,23 +30,22 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
-from sklearn.ensemble import IsolationForest
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
+IsolationForest = lazy_from('sklearn.ensemble', 'IsolationForest')
 
-import h5py
+h5py = lazy_import('h5py')
 import joblib
 
+from ModelRegistry import model_registry, load_joblib, clone_sklearn
+
 from numpy import quantile
 
 class AnomalyDetectorSklearn():
@@ -111,9 +112,11 @@ class AnomalyDetectorSklearn():
         # calculate contamination rate (using original data, not cleaned)
         self.contamination = round((train_labels.sum() / np.shape(train_labels)[0]), 3)
 
-        # if classifier is not yet defined, create it
+        # if classifier is not yet defined, create it. A loaded classifier is shared, so train a copy of it
         if self.classifier == None:
             self.classifier = self.create_classifier()
+        else:
+            self.classifier = model_registry.copy_for_training(self.classifier, clone_sklearn)
 
         # TODO: create class each time, with actual ratio of 'anomalies' ?!
         print("    fitting classifier: ", self.__class__.__name__)
@@ -191,14 +194,15 @@ class AnomalyDetectorSklearn():
             # use joblib to save classifier state
             print("    saving to: ", self.model_path)
             joblib.dump(self.classifier, self.model_path)
+            model_registry.put(self.model_path, self.classifier)
         return
 
     def load(self, path=""):
         if self.use_saved_model:
-            # use joblib to reload classifier state
+            # use joblib to reload classifier state (memory mapped, and only read from disk once per process)
             print("    loading from: ", self.model_path)
-            self.classifier = joblib.load(self.model_path)
-            self.loaded_from_file = True
+            self.classifier = model_registry.get(self.model_path, load_joblib)
+            self.loaded_from_file = self.classifier is not None
             # self.is_trained = True
         return self.classifier
 
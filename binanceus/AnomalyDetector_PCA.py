@@ -7,7 +7,6 @@
 import numpy as np
 from pandas import DataFrame, Series
 import pandas as pd
-from sklearn.metrics import f1_score
 
 pd.options.mode.chained_assignment = None  # default='warn'
 
@@ -17,6 +16,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+
 import logging
 import warnings
 
@@ -31,23 +33,20 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
-from sklearn.decomposition import PCA
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
+PCA = lazy_from('sklearn.decomposition', 'PCA')
 
 
 
-import h5py
+h5py = lazy_import('h5py')
 
 class AnomalyDetector_PCA():
 
@@ -13,6 +13,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+
 import logging
 import warnings
 
@@ -27,24 +29,21 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
-from sklearn.svm import OneClassSVM
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
+OneClassSVM = lazy_from('sklearn.svm', 'OneClassSVM')
 
 from AnomalyDetectorSklearn import AnomalyDetectorSklearn
 
 
-import h5py
+h5py = lazy_import('h5py')
 
 class AnomalyDetector_SVM(AnomalyDetectorSklearn):
 
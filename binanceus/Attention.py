@@ -1,103 +1,113 @@
 
-
-from keras import backend as K
-from keras.layers import Layer
-#from keras import initializations
-from keras import initializers, regularizers, constraints
-
-
-class Attention(Layer):
-
-    def __init__(self, step_dim,
-                 W_regularizer=None, b_regularizer=None,
-                 W_constraint=None, b_constraint=None,
-                 bias=True, **kwargs):
-        """
-        Keras Layer that implements an Attention mechanism for temporal data.
-        Supports Masking.
-        Follows the work of Raffel et al. [https://arxiv.org/abs/1512.08756]
-        # Input shape
-            3D tensor with shape: `(samples, steps, features)`.
-        # Output shape
-            2D tensor with shape: `(samples, features)`.
-        :param kwargs:
-        Just put it on top of an RNN Layer (GRU/LSTM/SimpleRNN) with return_sequences=True.
-        The dimensions are inferred based on the output shape of the RNN.
-        Example:
-            model.add(LSTM(64, return_sequences=True))
-            model.add(Attention())
-        """
-        self.supports_masking = True
-        #self.init = initializations.get('glorot_uniform')
-        self.init = initializers.get('glorot_uniform')
-
-        self.W_regularizer = regularizers.get(W_regularizer)
-        self.b_regularizer = regularizers.get(b_regularizer)
-
-        self.W_constraint = constraints.get(W_constraint)
-        self.b_constraint = constraints.get(b_constraint)
-
-        self.bias = bias
-        self.step_dim = step_dim
-        self.features_dim = 0
-        super(Attention, self).__init__(**kwargs)
-
-    def build(self, input_shape):
-        assert len(input_shape) == 3
-
-        self.W = self.add_weight(shape=(input_shape[-1],),
-                                 initializer=self.init,
-                                 name='{}_W'.format(self.name),
-                                 regularizer=self.W_regularizer,
-                                 constraint=self.W_constraint)
-        self.features_dim = input_shape[-1]
-
-        if self.bias:
-            self.b = self.add_weight(shape=(input_shape[1],),
-                                     initializer='zero',
-                                     name='{}_b'.format(self.name),
-                                     regularizer=self.b_regularizer,
-                                     constraint=self.b_constraint)
-        else:
-            self.b = None
-
-        self.built = True
-
-    def compute_mask(self, input, input_mask=None):
-        # do not pass the mask to the next layers
-        return None
-
-    def call(self, x, mask=None):
-        # eij = K.dot(x, self.W) TF backend doesn't support it
-
-        # features_dim = self.W.shape[0]
-        # step_dim = x._keras_shape[1]
-
-        features_dim = self.features_dim
-        step_dim = self.step_dim
-
-        eij = K.reshape(K.dot(K.reshape(x, (-1, features_dim)), K.reshape(self.W, (features_dim, 1))), (-1, step_dim))
-
-        if self.bias:
-            eij += self.b
-
-        eij = K.tanh(eij)
-
-        a = K.exp(eij)
-
-        # apply mask after the exp. will be re-normalized next
-        if mask is not None:
-            # Cast the mask to floatX to avoid float64 upcasting in theano
-            a *= K.cast(mask, K.floatx())
-
-        # in some cases especially in the early stages of training the sum may be almost zero
-        a /= K.cast(K.sum(a, axis=1, keepdims=True) + K.epsilon(), K.floatx())
-
-        a = K.expand_dims(a)
-        weighted_input = x * a
-    #print weigthted_input.shape
-        return K.sum(weighted_input, axis=1)
-
-    def compute_output_shape(self, input_shape):
-        #return input_shape[0], input_shape[-1]
-        return input_shape[0],  self.features_dim
\ No newline at end of file
+from LazyImport import lazy_definitions
+
+
+# The keras layers are defined when one of them is first used (see LazyImport.lazy_definitions()), so that importing
+# this file (which freqtrade does for every file in the strategy directory) does not load tensorflow
+def define_layers() -> dict:
+    from keras import backend as K
+    from keras.layers import Layer
+    #from keras import initializations
+    from keras import initializers, regularizers, constraints
+
+    class Attention(Layer):
+
+        def __init__(self, step_dim,
+                     W_regularizer=None, b_regularizer=None,
+                     W_constraint=None, b_constraint=None,
+                     bias=True, **kwargs):
+            """
+            Keras Layer that implements an Attention mechanism for temporal data.
+            Supports Masking.
+            Follows the work of Raffel et al. [https://arxiv.org/abs/1512.08756]
+            # Input shape
+                3D tensor with shape: `(samples, steps, features)`.
+            # Output shape
+                2D tensor with shape: `(samples, features)`.
+            :param kwargs:
+            Just put it on top of an RNN Layer (GRU/LSTM/SimpleRNN) with return_sequences=True.
+            The dimensions are inferred based on the output shape of the RNN.
+            Example:
+                model.add(LSTM(64, return_sequences=True))
+                model.add(Attention())
+            """
+            self.supports_masking = True
+            #self.init = initializations.get('glorot_uniform')
+            self.init = initializers.get('glorot_uniform')
+
+            self.W_regularizer = regularizers.get(W_regularizer)
+            self.b_regularizer = regularizers.get(b_regularizer)
+
+            self.W_constraint = constraints.get(W_constraint)
+            self.b_constraint = constraints.get(b_constraint)
+
+            self.bias = bias
+            self.step_dim = step_dim
+            self.features_dim = 0
+            super(Attention, self).__init__(**kwargs)
+
+        def build(self, input_shape):
+            assert len(input_shape) == 3
+
+            self.W = self.add_weight(shape=(input_shape[-1],),
+                                     initializer=self.init,
+                                     name='{}_W'.format(self.name),
+                                     regularizer=self.W_regularizer,
+                                     constraint=self.W_constraint)
+            self.features_dim = input_shape[-1]
+
+            if self.bias:
+                self.b = self.add_weight(shape=(input_shape[1],),
+                                         initializer='zero',
+                                         name='{}_b'.format(self.name),
+                                         regularizer=self.b_regularizer,
+                                         constraint=self.b_constraint)
+            else:
+                self.b = None
+
+            self.built = True
+
+        def compute_mask(self, input, input_mask=None):
+            # do not pass the mask to the next layers
+            return None
+
+        def call(self, x, mask=None):
+            # eij = K.dot(x, self.W) TF backend doesn't support it
+
+            # features_dim = self.W.shape[0]
+            # step_dim = x._keras_shape[1]
+
+            features_dim = self.features_dim
+            step_dim = self.step_dim
+
+            eij = K.reshape(K.dot(K.reshape(x, (-1, features_dim)), K.reshape(self.W, (features_dim, 1))),
+                            (-1, step_dim))
+
+            if self.bias:
+                eij += self.b
+
+            eij = K.tanh(eij)
+
+            a = K.exp(eij)
+
+            # apply mask after the exp. will be re-normalized next
+            if mask is not None:
+                # Cast the mask to floatX to avoid float64 upcasting in theano
+                a *= K.cast(mask, K.floatx())
+
+            # in some cases especially in the early stages of training the sum may be almost zero
+            a /= K.cast(K.sum(a, axis=1, keepdims=True) + K.epsilon(), K.floatx())
+
+            a = K.expand_dims(a)
+            weighted_input = x * a
+        #print weigthted_input.shape
+            return K.sum(weighted_input, axis=1)
+
+        def compute_output_shape(self, input_shape):
+            #return input_shape[0], input_shape[-1]
+            return input_shape[0],  self.features_dim
+
+    return {'Attention': Attention}
+
+
+__getattr__ = lazy_definitions(globals(), define_layers, ['Attention'])
@@ -0,0 +1,119 @@
+# Fits and scores a set of (sklearn-style) classifiers in parallel, using a pool of worker processes
+# Used by the PCA strategies when scanning for the best classifier (dbg_scan_classifiers)
+#
+# This lives in its own module (rather than in the strategy) because the worker functions have to be importable
+# by the worker processes
+
+import math
+import multiprocessing
+import signal
+import threading
+import time
+
+import numpy as np
+
+from LazyImport import lazy_from
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+
+
+# seed used for the (global) numpy random generator in each task, so that classifiers that do not specify a
+# random_state give the same results whichever worker runs them (and in whatever order)
+scan_seed = 27
+
+# data shared by all tasks in a worker (set once per worker, rather than being sent with each task)
+_worker_data = None
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError()
+
+
+def fit_and_score(name, clf, timeout=0):
+    # fits clf to the training data, and scores it against the test data (macro F1)
+    # returns (name, fitted classifier, score, elapsed time, error message)
+    df_train, res_train, df_test, res_test = _worker_data
+
+    np.random.seed(scan_seed)
+
+    # soft limit on run time, only available on unix-like systems (raises TimeoutError in the fit)
+    use_alarm = (timeout > 0) and hasattr(signal, 'setitimer') and \
+                (threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        prev_handler = signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        clf = clf.fit(df_train, res_train)
+        pred_test = clf.predict(df_test)
+        score = f1_score(res_test, pred_test, average='macro')
+        error = ""
+    except TimeoutError:
+        clf, score, error = None, 0.0, "timed out after {}s".format(timeout)
+    except Exception as e:
+        clf, score, error = None, 0.0, "{}: {}".format(type(e).__name__, e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, prev_handler)
+
+    return name, clf, score, time.perf_counter() - start, error
+
+
+def scan_classifiers(classifiers: dict, df_train, res_train, df_test, res_test, max_workers=4, timeout=300.0):
+    """
+    Fits and scores each (unfitted) classifier in the classifiers dict ({name: classifier})
+    Returns {name: (fitted classifier, score, elapsed time)} in the same order as classifiers, leaving out any that
+    failed or took longer than timeout seconds (0 means no limit)
+    If max_workers <= 1, everything runs in the current process. This is also the case when called from a daemonic
+    process (e.g. a walk-forward worker), since those are not allowed to start a pool of their own
+    """
+
+    data = (df_train, res_train, df_test, res_test)
+    nworkers = min(max_workers, len(classifiers))
+    if multiprocessing.current_process().daemon:
+        nworkers = 1
+
+    results = {}
+    if nworkers <= 1:
+        _init_worker(data)
+        try:
+            for name, clf in classifiers.items():
+                results[name] = fit_and_score(name, clf, timeout)
+        finally:
+            _init_worker(None)
+    else:
+        # hard limit, in case a classifier is stuck somewhere the alarm can't interrupt (e.g. inside C code)
+        deadline = None
+        if timeout > 0:
+            deadline = time.monotonic() + (timeout * math.ceil(len(classifiers) / nworkers)) + 10.0
+
+        pool = multiprocessing.Pool(processes=nworkers, initializer=_init_worker, initargs=(data,))
+        try:
+            pending = {name: pool.apply_async(fit_and_score, (name, clf, timeout))
+                       for name, clf in classifiers.items()}
+            for name, result in pending.items():
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    results[name] = result.get(wait)
+                except multiprocessing.TimeoutError:
+                    results[name] = (name, None, 0.0, timeout, "timed out after {}s".format(timeout))
+                except Exception as e:
+                    results[name] = (name, None, 0.0, 0.0, "{}: {}".format(type(e).__name__, e))
+        finally:
+            # terminate (rather than close) so that any classifiers that are still running are stopped
+            pool.terminate()
+            pool.join()
+
+    scores = {}
+    for name, clf, score, elapsed, error in results.values():
+        if error:
+            print("      {0:<20}: skipped ({1})".format(name, error))
+        else:
+            scores[name] = (clf, score, elapsed)
+    return scores
@@ -6,6 +6,8 @@
 # anomaly detection algorithms/classifiers (which typically struggle with high dimensions)
 
 
+from __future__ import annotations
+
 import numpy as np
 from pandas import DataFrame, Series
 import pandas as pd
@@ -18,6 +20,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+
 import logging
 import warnings
 
@@ -32,20 +36,19 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
+SGD = lazy_from('keras.optimizers', 'SGD')
+h5py = lazy_import('h5py')
 
-import keras
-from keras import layers
-from keras.optimizers import SGD
-import h5py
+from ModelRegistry import model_registry, clone_keras
 
 class CompressionAutoEncoder():
 
@@ -177,6 +180,12 @@ class CompressionAutoEncoder():
 
         # print("    train_tensor:{} test_tensor:{}".format(np.shape(train_tensor), np.shape(test_tensor)))
 
+        # a loaded model is shared, so train a copy of it (the encoder is then taken from the copy)
+        copy = model_registry.copy_for_training(self.autoencoder, clone_keras)
+        if copy is not self.autoencoder:
+            self.autoencoder = copy
+            self.encoder = None
+
         # Model weights are saved at the end of every epoch, if it's the best seen so far.
         fhis = self.autoencoder.fit(train_tensor, train_tensor,
                                     batch_size=self.batch_size,
@@ -272,6 +281,7 @@ class CompressionAutoEncoder():
         print("    saving model to: ", path)
         # self.autoencoder.save(path)
         keras.models.save_model(self.autoencoder, filepath=path)
+        model_registry.put(path, self.autoencoder)
         return
 
     # load the full encoder model from the (optional) supplied path. Use this to load a fully trained autoencoder
@@ -279,20 +289,27 @@ class CompressionAutoEncoder():
         if len(path) == 0:
             path = self.model_path
 
-        # if model exists, load it
-        if os.path.exists(path):
-            print("    Loading existing model ({})...".format(path))
+        def loader(model_path):
+            print("    Loading existing model ({})...".format(model_path))
             try:
-                self.autoencoder = keras.models.load_model(path, compile=False)
+                model = keras.models.load_model(model_path, compile=False)
                 # optimizer = keras.optimizers.Adam(learning_rate=0.001)
                 optimizer = SGD(learning_rate=1, momentum=0.9)
                 # optimizer = keras.optimizers.Adam(learning_rate=0.1)
 
-                self.autoencoder.compile(metrics=['accuracy', 'mse'], loss='mse', optimizer=optimizer)
-                self.is_trained = True
+                model.compile(metrics=['accuracy', 'mse'], loss='mse', optimizer=optimizer)
+                return model
             except Exception as e:
                 print("    ", str(e))
-                print("    Error loading model from {}. Check whether model format changed".format(path))
+                print("    Error loading model from {}. Check whether model format changed".format(model_path))
+                return None
+
+        # if model exists, load it (only read from disk once per process, then shared)
+        if os.path.exists(path):
+            model = model_registry.get(path, loader)
+            if model is not None:
+                self.autoencoder = model
+                self.is_trained = True
         else:
             print("    model not found ({})...".format(path))
 
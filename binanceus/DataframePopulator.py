@@ -418,7 +418,7 @@ def add_future_data(dataframe: DataFrame, lookahead: int) -> DataFrame:
     future_df['dwt_dir_dn'] = np.where(dataframe['dwt'].diff() < 0, 1, 0)
 
     # build forward-looking sum of up/down trends
-    future_win = pd.api.indexers.FixedForwardWindowIndexer(window_size=int(win_size))  # don't use a big window
+    future_win = int(win_size)  # forward-looking window. Don't use a big window
 
     # future_df['future_nseq'] = future_df['curr_trend'].rolling(window=future_win, min_periods=1).sum()
 
@@ -431,8 +431,9 @@ def add_future_data(dataframe: DataFrame, lookahead: int) -> DataFrame:
     # future_df['future_nseq_up'] = future_df['future_nseq'].clip(lower=0.0)
     future_df['future_nseq_up'] = future_df['dwt_nseq_up'].shift(-win_size)
 
-    future_df['future_nseq_up_mean'] = future_df['future_nseq_up'].rolling(window=future_win).mean()
-    future_df['future_nseq_up_std'] = future_df['future_nseq_up'].rolling(window=future_win).std()
+    nseq_up_stats = DataframeUtils.forward_rolling(future_df['future_nseq_up'], future_win, stats=('mean', 'std'))
+    future_df['future_nseq_up_mean'] = nseq_up_stats['mean']
+    future_df['future_nseq_up_std'] = nseq_up_stats['std']
     future_df['future_nseq_up_thresh'] = future_df['future_nseq_up_mean'] + n_profit_stddevs * future_df[
         'future_nseq_up_std']
 
@@ -445,16 +446,18 @@ def add_future_data(dataframe: DataFrame, lookahead: int) -> DataFrame:
     # future_df['future_nseq_dn'] = future_df['future_nseq'].clip(upper=0.0)
     future_df['future_nseq_dn'] = future_df['dwt_nseq_dn'].shift(-win_size)
 
-    future_df['future_nseq_dn_mean'] = future_df['future_nseq_dn'].rolling(future_win).mean()
-    future_df['future_nseq_dn_std'] = future_df['future_nseq_dn'].rolling(future_win).std()
+    nseq_dn_stats = DataframeUtils.forward_rolling(future_df['future_nseq_dn'], future_win, stats=('mean', 'std'))
+    future_df['future_nseq_dn_mean'] = nseq_dn_stats['mean']
+    future_df['future_nseq_dn_std'] = nseq_dn_stats['std']
     future_df['future_nseq_dn_thresh'] = future_df['future_nseq_dn_mean'] \
                                          - n_loss_stddevs * future_df['future_nseq_dn_std']
 
     # Recent min/max
     # future_df['future_min'] = future_df[price_col].rolling(window=future_win).min()
     # future_df['future_max'] = future_df[price_col].rolling(window=future_win).max()
-    future_df['future_min'] = future_df['dwt'].rolling(window=future_win).min()
-    future_df['future_max'] = future_df['dwt'].rolling(window=future_win).max()
+    minmax_stats = DataframeUtils.forward_rolling(future_df['dwt'], future_win, stats=('min', 'max'))
+    future_df['future_min'] = minmax_stats['min']
+    future_df['future_max'] = minmax_stats['max']
 
     future_df['future_maxmin'] = 100.0 * (future_df['future_max'] - future_df['future_min']) / \
                                  future_df['future_max']
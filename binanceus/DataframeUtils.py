@@ -3,13 +3,20 @@
 import numpy as np
 import pandas as pd
 
+import os
 import sys
+import threading
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_from
+
+import Sampling
+
 import logging
 import warnings
+import joblib
 
 log = logging.getLogger(__name__)
 # log.setLevel(logging.DEBUG)
@@ -18,8 +25,12 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 from pandas import DataFrame, Series
 from datetime import datetime, timedelta, timezone
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler, RobustScaler, MinMaxScaler
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
 
 pd.options.mode.chained_assignment = None  # default='warn'
 
@@ -46,20 +57,56 @@ def check_inf(dataframe):
 def remove_debug_columns(dataframe: DataFrame) -> DataFrame:
     drop_list = dataframe.filter(regex='^%').columns
     if len(drop_list) > 0:
-        for col in drop_list:
-            dataframe = dataframe.drop(col, axis=1)
-        dataframe.reindex()
+        dataframe = dataframe.drop(columns=drop_list)
     return dataframe
 
 
-scaler = None
+# Holds fitted scalers, keyed by pair and tag (e.g. the strategy or model name)
+# Scalers are fitted once (at training time) and then re-used, so that training and predictions use the same
+# scaling. If save_dir is set, scalers are also saved there (and re-loaded if not already in memory)
+class ScalerRegistry:
 
+    def __init__(self, save_dir=None):
+        self.save_dir = save_dir
+        self.scalers = {}
+        self.lock = threading.Lock()
 
-# Normalise a dataframe
-def norm_dataframe(dataframe: DataFrame) -> DataFrame:
+    def get_path(self, pair: str, tag: str) -> Path:
+        name = "{}_{}".format(tag, pair.replace("/", "_").replace(":", "_")) if tag else pair.replace("/", "_")
+        return Path(self.save_dir) / (name + ".scaler.sav")
+
+    # returns the scaler for the pair & tag, or None if there isn't one
+    def get(self, pair: str = "", tag: str = ""):
+        with self.lock:
+            scaler = self.scalers.get((pair, tag), None)
+
+        if (scaler is None) and self.save_dir:
+            path = self.get_path(pair, tag)
+            if path.exists():
+                scaler = joblib.load(path)
+                with self.lock:
+                    self.scalers[(pair, tag)] = scaler
+        return scaler
+
+    def set(self, scaler, pair: str = "", tag: str = ""):
+        with self.lock:
+            self.scalers[(pair, tag)] = scaler
+
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            joblib.dump(scaler, self.get_path(pair, tag))
+
+    def remove(self, pair: str = "", tag: str = ""):
+        with self.lock:
+            self.scalers.pop((pair, tag), None)
+
+
+# default registry, used by norm_dataframe() & denorm_dataframe()
+scaler_registry = ScalerRegistry()
 
-    global scaler
 
+# add date-based features, and convert to all-numeric columns ready for scaling
+def prepare_dataframe(dataframe: DataFrame) -> DataFrame:
     check_inf(dataframe)
 
     df = dataframe.copy()
@@ -80,24 +127,141 @@ def norm_dataframe(dataframe: DataFrame) -> DataFrame:
     df.set_index('date')
     df.reindex()
 
-    cols = df.columns
-    scaler = get_scaler()
+    return df
 
-    df = pd.DataFrame(scaler.fit_transform(df), columns=cols)
 
-    return df
+# Compact version of the (numeric) feature columns of a dataframe: a single C-contiguous 2D array (float32 by
+# default) plus the column names. Used for training, so that the data is not copied (as float64) at every step
+class FeatureMatrix:
+
+    def __init__(self, values: np.ndarray, columns):
+        self.values = values
+        self.columns = list(columns)
+        self.col_index = {col: i for i, col in enumerate(self.columns)}
+
+    # builds the matrix one column at a time (so there is no full size float64 copy). Adds the same date-based
+    # features as prepare_dataframe() (plus the year, if requested) and skips debug ('%') columns
+    @classmethod
+    def from_dataframe(cls, dataframe: DataFrame, dtype=np.float32, year=False):
+        check_inf(dataframe)
+
+        date_cols = {}
+        if 'date' in dataframe.columns:
+            dates = pd.to_datetime(dataframe['date'], utc=True)
+            start_date = datetime(2020, 1, 1).astimezone(timezone.utc)
+            date_cols['date'] = dates.astype('int64')
+            date_cols['days_from_start'] = (dates - start_date).dt.days
+            date_cols['day_of_week'] = dates.dt.dayofweek
+            date_cols['day_of_month'] = dates.dt.day
+            date_cols['week_of_year'] = dates.dt.isocalendar().week
+            date_cols['month'] = dates.dt.month
+            if year:
+                date_cols['year'] = dates.dt.year
+
+        columns = [col for col in dataframe.columns if not str(col).startswith('%')]
+        columns = columns + [col for col in date_cols if col not in columns]
+
+        values = np.empty((dataframe.shape[0], len(columns)), dtype=dtype)
+        for i, col in enumerate(columns):
+            values[:, i] = date_cols[col] if col in date_cols else dataframe[col]
+
+        return cls(values, columns)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    # returns a view of a column
+    def column(self, name) -> np.ndarray:
+        return self.values[:, self.col_index[name]]
+
+    # returns a new FeatureMatrix containing the selected rows (one gather)
+    def take(self, index):
+        return FeatureMatrix(self.values[index], self.columns)
+
+    # returns a dataframe that shares the data (no copy)
+    def to_dataframe(self) -> DataFrame:
+        return DataFrame(self.values, columns=self.columns, copy=False)
+
+
+# Applies a (fitted) scaler to a FeatureMatrix in place (no copies of the data). Optionally clips to +/- clip
+def transform_features(features: FeatureMatrix, scaler, clip=None) -> FeatureMatrix:
+    # sklearn scalers can transform in place if copy is False (the values are already float & contiguous)
+    if 'copy' in scaler.get_params():
+        scaler.set_params(copy=False)
+        features.values = scaler.transform(features.values)
+        scaler.set_params(copy=True)
+    else:
+        features.values = scaler.transform(features.values).astype(features.values.dtype, copy=False)
 
+    if clip is not None:
+        np.clip(features.values, -clip, clip, out=features.values)
 
-# De-Normalise a dataframe - note this relies on the scaler still being valid
-def denorm_dataframe(dataframe: DataFrame) -> DataFrame:
+    return features
 
-    global scaler
 
-    df = dataframe.copy()
+# Normalise a FeatureMatrix in place. The scaler is fitted and stored, or re-used, in the same way as
+# norm_dataframe(). Returns the scaler
+def norm_features(features: FeatureMatrix, pair: str = "", tag: str = "", fit: bool = True, clip=None,
+                  registry: ScalerRegistry = None):
+
+    registry = registry or scaler_registry
+
+    scaler = None if fit else registry.get(pair, tag)
+    if scaler is None:
+        scaler = get_scaler()
+        scaler.fit(features.values)
+        registry.set(scaler, pair, tag)
+
+    transform_features(features, scaler, clip=clip)
+    return scaler
+
+
+# returns train & test row indices (rather than copies of the data), with the same options as train_test_split
+def split_indices(nrows: int, train_size, random_state=None, shuffle=True):
+    return train_test_split(np.arange(nrows), train_size=train_size, random_state=random_state, shuffle=shuffle)
 
+
+# Normalise a dataframe
+# If fit is True (e.g. when training), a new scaler is fitted and stored for the pair & tag. Otherwise the stored
+# scaler is used (a new one is fitted if there isn't one). If compact is True, the result is float32
+def norm_dataframe(dataframe: DataFrame, pair: str = "", tag: str = "", fit: bool = True,
+                   registry: ScalerRegistry = None, compact: bool = False) -> DataFrame:
+
+    registry = registry or scaler_registry
+
+    # compact: float32 data, normalised in place
+    if compact:
+        features = FeatureMatrix.from_dataframe(dataframe)
+        norm_features(features, pair=pair, tag=tag, fit=fit, registry=registry)
+        return features.to_dataframe()
+
+    df = prepare_dataframe(dataframe)
     cols = df.columns
 
-    df = pd.DataFrame(scaler.inverse_transform(dataframe), columns=cols)
+    scaler = None if fit else registry.get(pair, tag)
+    if scaler is None:
+        scaler = get_scaler()
+        df = pd.DataFrame(scaler.fit_transform(df), columns=cols)
+        registry.set(scaler, pair, tag)
+    else:
+        df = pd.DataFrame(scaler.transform(df), columns=cols)
+
+    return df
+
+
+# De-Normalise a dataframe, using the scaler that was used to normalise data for the pair & tag
+def denorm_dataframe(dataframe: DataFrame, pair: str = "", tag: str = "",
+                     registry: ScalerRegistry = None) -> DataFrame:
+
+    registry = registry or scaler_registry
+
+    scaler = registry.get(pair, tag)
+    if scaler is None:
+        print("*** ERR: no scaler for pair:{} tag:{}".format(pair, tag))
+        return dataframe.copy()
+
+    df = pd.DataFrame(scaler.inverse_transform(dataframe), columns=dataframe.columns)
 
     return df
 
@@ -120,116 +284,97 @@ def split_array(array, ratio: float) -> (DataFrame, DataFrame):
 
 # remove outliers from normalised dataframe
 def remove_outliers(df_norm: DataFrame, buys, sells):
-    # for col in df_norm.columns.values:
-    #     if col != 'date':
-    #         df_norm = df_norm[(df_norm[col] <= 3.0)]
-    # return df_norm
-    df = df_norm.copy()
-    df['%temp_buy'] = buys.copy()
-    df['%temp_sell'] = sells.copy()
-    #
-    df2 = df[((df >= -3.0) & (df <= 3.0)).all(axis=1)]
-    # df_out = df[~((df >= -3.0) & (df <= 3.0)).all(axis=1)] # for debug
-    ndrop = df_norm.shape[0] - df2.shape[0]
+    index = Sampling.inlier_index(df_norm, limit=3.0)
+    ndrop = df_norm.shape[0] - len(index)
     if ndrop > 0:
-        b = df2['%temp_buy'].copy()
-        s = df2['%temp_sell'].copy()
-        df2.drop('%temp_buy', axis=1, inplace=True)
-        df2.drop('%temp_sell', axis=1, inplace=True)
-        df2.reindex()
-        # if dbg_verbose:
         print("    Removed ", ndrop, " outliers")
-        # print(" df2:", df2)
-        # print(" df_out:", df_out)
-        # print ("df_norm:", df_norm.shape, "df2:", df2.shape, "df_out:", df_out.shape)
+        return Sampling.take(df_norm, index), Sampling.take(buys, index), Sampling.take(sells, index)
     else:
         # no outliers, just return originals
-        df2 = df_norm
-        b = buys
-        s = sells
-    return df2, b, s
+        return df_norm, buys, sells
 
 
 # build a 'viable' dataframe sample set. Needed because the positive labels are sparse
+# Rows are buys, then sells, then 'no signal' rows (see Sampling.viable_index())
 def build_viable_dataset(size: int, df_norm: DataFrame, buys, sells):
-    # if dbg_verbose:
-    #     print("     df_norm:{} size:{} buys:{} sells:{}".format(df_norm.shape, size, buys.shape[0], sells.shape[0]))
-
-    # copy and combine the data into one dataframe
-    df = df_norm.copy()
-    df['%temp_buy'] = buys.copy()
-    df['%temp_sell'] = sells.copy()
-
-    # df_buy = df[( (df['%temp_buy'] > 0) ).all(axis=1)]
-    # df_sell = df[((df['%temp_sell'] > 0)).all(axis=1)]
-    # df_nosig = df[((df['%temp_buy'] == 0) & (df['%temp_sell'] == 0)).all(axis=1)]
-
-    df_buy = df.loc[df['%temp_buy'] == 1]
-    df_sell = df.loc[df['%temp_sell'] == 1]
-    df_nosig = df.loc[(df['%temp_buy'] == 0) & (df['%temp_sell'] == 0)]
-
-    # make sure there aren't too many buys & sells
-    # We are aiming for a roughly even split between buys, sells, and 'no signal' (no buy or sell)
-    max_signals = int(2 * size / 3)
-    buy_train_size = df_buy.shape[0]
-    sell_train_size = df_sell.shape[0]
-
-    if max_signals > df_nosig.shape[0]:
-        max_signals = int((size - df_nosig.shape[0])) - 1
-
-    if ((df_buy.shape[0] + df_sell.shape[0]) > max_signals):
-        # both exceed max?
-        sig_size = int(max_signals / 2)
-        # if dbg_verbose:
-        #     print("     sig_size:{} max_signals:{} buys:{} sells:{}".format(sig_size, max_signals, df_buy.shape[0],
-        #                                                                     df_sell.shape[0]))
-
-        if (df_buy.shape[0] > sig_size) & (df_sell.shape[0] > sig_size):
-            # resize both buy & sell to 1/3 of requested size
-            buy_train_size = sig_size
-            sell_train_size = sig_size
-        else:
-            # only one them is too big, so figure out which
-            if (df_buy.shape[0] > df_sell.shape[0]):
-                buy_train_size = max_signals - df_sell.shape[0]
-            else:
-                sell_train_size = max_signals - df_buy.shape[0]
-
-        # if dbg_verbose:
-        #     print("     buy_train_size:{} sell_train_size:{}".format(buy_train_size, sell_train_size))
-
-    if buy_train_size < df_buy.shape[0]:
-        df_buy, _ = train_test_split(df_buy, train_size=buy_train_size, shuffle=False)
-    if sell_train_size < df_sell.shape[0]:
-        df_sell, _ = train_test_split(df_sell, train_size=sell_train_size, shuffle=False)
-
-    # extract enough rows to fill the requested size
-    fill_size = size - buy_train_size - sell_train_size - 1
-    # if dbg_verbose:
-    #     print("     df_nosig:{} fill_size:{}".format(df_nosig.shape, fill_size))
-
-    if fill_size < df_nosig.shape[0]:
-        df_nosig, _ = train_test_split(df_nosig, train_size=fill_size, shuffle=False)
-
-    # print("viable df - buys:{} sells:{} fill:{}".format(df_buy.shape[0], df_sell.shape[0], df_nosig.shape[0]))
-
-    # concatenate the dataframes
-    frames = [df_buy, df_sell, df_nosig]
-    df2 = pd.concat(frames)
-
-    # # shuffle rows
-    # df2 = df2.sample(frac=1)
-
-    # separate out the data, buys & sells
-    b = df2['%temp_buy'].copy()
-    s = df2['%temp_sell'].copy()
-    df2.drop('%temp_buy', axis=1, inplace=True)
-    df2.drop('%temp_sell', axis=1, inplace=True)
-    df2.reindex()
-
-    # print("     df2:", df2.shape, " b:", b.shape, " s:", s.shape)
-
-    return df2, b, s
+    index = Sampling.viable_index(size, buys, sells, shuffle=False)
+    return Sampling.take(df_norm, index), Sampling.take(buys, index), Sampling.take(sells, index)
+
+
+# forward-looking rolling statistics, i.e. the stats of col[i:i+window] for each row i. Rows where the window runs past
+# the end of the data (or contains a NaN) are NaN. Same results as:
+#     col.rolling(window=pd.api.indexers.FixedForwardWindowIndexer(window_size=window)).mean() (or std, min, max)
+# but uses a normal (fixed size) rolling window over a reversed view of the data, which avoids the (slower) generic
+# indexer code path. Returns {stat: np.array}
+def forward_rolling(col, window: int, stats=('mean', 'std', 'min', 'max')) -> dict:
+    data = np.asarray(col, dtype=np.float64)
+    rolling = pd.Series(data[::-1]).rolling(window)
+
+    results = {}
+    for stat in stats:
+        if stat not in ('mean', 'std', 'min', 'max'):
+            raise ValueError("Unknown stat: {}".format(stat))
+        results[stat] = getattr(rolling, stat)().to_numpy()[::-1]
+
+    return results
+
+
+# Holds the most recent training labels for each pair, so that they are only generated once for a given set of data
+# The key should identify the data (see label_key()) and any settings that affect the labels
+class LabelCache:
+
+    def __init__(self):
+        self.labels = {}
+        self.lock = threading.Lock()
+
+    def get(self, pair: str, key):
+        with self.lock:
+            entry = self.labels.get(pair, None)
+        if (entry is not None) and (entry[0] == key):
+            return entry[1]
+        return None
+
+    # only the latest labels are kept for each pair (older data will not be seen again)
+    def set(self, pair: str, key, labels):
+        with self.lock:
+            self.labels[pair] = (key, labels)
+
+    def remove(self, pair: str):
+        with self.lock:
+            self.labels.pop(pair, None)
+
+
+# default cache, shared by all strategies (the strategy name should be part of the key)
+label_cache = LabelCache()
+
+
+# returns the training labels for a pair from label_cache, calling create() to generate (and cache) them if needed
+# create() may also add debug indicators ('%' columns) to debug_df. These are cached with the labels, and added again
+# on a cache hit, so that the debug output does not depend on whether the labels were cached
+def get_cached_labels(pair: str, key, create, debug_df: DataFrame = None):
+    entry = label_cache.get(pair, key)
+    if entry is None:
+        old_cols = set(debug_df.columns) if debug_df is not None else set()
+        labels = create()
+        debug = {}
+        if debug_df is not None:
+            debug = {col: debug_df[col].to_numpy() for col in debug_df.columns if col not in old_cols}
+        label_cache.set(pair, key, (labels, debug))
+        return labels, False
+
+    labels, debug = entry
+    if debug_df is not None:
+        for col, values in debug.items():
+            if (col not in debug_df.columns) and (len(values) == debug_df.shape[0]):
+                debug_df[col] = values
+    return labels, True
+
+
+# returns a key for the labels of a dataframe: the number of candles, the last candle and the supplied settings
+def label_key(dataframe: DataFrame, *settings) -> tuple:
+    last_date = dataframe['date'].iloc[-1] if 'date' in dataframe.columns else None
+    last_close = float(dataframe['close'].iloc[-1]) if 'close' in dataframe.columns else None
+    return (dataframe.shape[0], last_date, last_close) + tuple(settings)
 
 
 # map column into [0,1]
@@ -241,44 +386,26 @@ def get_binary_labels(col):
     return result
 
 
-# convert dataframe to 3D tensor (for use with keras models)
-def df_to_tensor(df, seq_len):
-
-    if not isinstance(df, type([np.ndarray, np.array])):
-        data = np.array(df)
-    else:
-        data = df
+# returns a (read-only) 3D view of the data with shape [nrows, seq_len, nfeatures]
+# Row i contains data[i], data[i-1], ..., data[i-seq_len+1] (i.e. most recent first), with zeros before the start
+# of the data. The only copy made is of the (zero padded) 2D data, converted to dtype
+def sequence_view(df, seq_len, dtype=np.float32):
+    data = np.asarray(df)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
 
     nrows = np.shape(data)[0]
     nfeatures = np.shape(data)[1]
-    tensor_arr = np.zeros((nrows, seq_len, nfeatures), dtype=float)
-    zero_row = np.zeros((nfeatures), dtype=float)
-    # tensor_arr = []
-
-    # print("data:{} tensor:{}".format(np.shape(data), np.shape(tensor_arr)))
-    # print("nrows:{} nfeatures:{}".format(nrows, nfeatures))
-
-    reverse = True
-
-    # fill the first part (0..seqlen rows), which are only sparsely populated
-    for row in range(seq_len):
-        for seq in range(seq_len):
-            if seq >= (seq_len - row - 1):
-                src_row = (row + seq) - seq_len + 1
-                tensor_arr[row][seq] = data[src_row]
-            else:
-                tensor_arr[row][seq] = zero_row
-        if reverse:
-            tensor_arr[row] = np.flipud(tensor_arr[row])
-
-    # fill the rest
-    # print("Data:{}, len:{}".format(np.shape(data), seq_len))
-    for row in range(seq_len, nrows):
-        tensor_arr[row] = data[(row - seq_len) + 1:row + 1]
-        if reverse:
-            tensor_arr[row] = np.flipud(tensor_arr[row])
-
-    # print("data: ", data)
-    # print("tensor: ", tensor_arr)
-    # print("data:{} tensor:{}".format(np.shape(data), np.shape(tensor_arr)))
-    return tensor_arr
\ No newline at end of file
+    padded = np.zeros((nrows + seq_len - 1, nfeatures), dtype=dtype)
+    padded[seq_len - 1:] = data
+
+    # windows are [nrows, nfeatures, seq_len] in time order, so swap the axes and reverse the sequence
+    windows = np.lib.stride_tricks.sliding_window_view(padded, seq_len, axis=0)
+    return windows.transpose(0, 2, 1)[:, ::-1, :]
+
+
+# convert dataframe to 3D tensor (for use with keras models)
+# Same layout as sequence_view(), but materialised as a contiguous array (float32 by default, which is what keras
+# would convert it to anyway)
+def df_to_tensor(df, seq_len, dtype=np.float32):
+    return np.ascontiguousarray(sequence_view(df, seq_len, dtype=dtype))
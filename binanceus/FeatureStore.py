@@ -0,0 +1,72 @@
+# On-disk store for calculated indicators (features), shared by strategy variants that use the same indicator code
+#
+# The PCA_* and NNBC_* variants all inherit add_indicators() etc. from their base class, and only differ in how
+# they generate training labels, so comparing variants (or re-running a backtest) otherwise recalculates exactly the
+# same indicators for every strategy and pair. Entries are keyed by pair, timeframe, the input candles (which covers
+# the timerange) and a hash of the source code of the indicator functions (plus any settings they use), so editing
+# the indicators automatically invalidates old entries
+#
+# Entries are stored as Feather files (which can be memory mapped) if pyarrow is installed, otherwise with joblib.
+# Eviction (size/age) is the same as for the model cache
+
+import hashlib
+import inspect
+from pathlib import Path
+
+import pandas as pd
+
+from ModelCache import ModelCache
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+
+class FeatureStore(ModelCache):
+
+    suffix = ".feather" if feather is not None else ".joblib"
+    description = "Feature"
+
+    # returns a hash of the source code of the supplied functions, classes or modules
+    @staticmethod
+    def code_hash(*objects) -> str:
+        h = hashlib.sha1()
+        for obj in objects:
+            try:
+                source = inspect.getsource(obj)
+            except (OSError, TypeError):
+                source = repr(obj)  # source not available, fall back to the name
+            h.update(source.encode())
+        return h.hexdigest()
+
+    # returns the key for the indicators of a dataframe. Only the candle data is hashed (not any indicators that
+    # have already been added), so the key is the same whatever stage the dataframe is at
+    def feature_key(self, name: str, pair: str, timeframe: str, dataframe: pd.DataFrame, code: str, *items) -> str:
+        candles = dataframe[[col for col in ['date', 'open', 'high', 'low', 'close', 'volume']
+                             if col in dataframe.columns]]
+        return self.key(name, "{}_{}".format(pair, timeframe), candles, code, *items)
+
+    def read(self, path: Path):
+        if feather is not None:
+            return feather.read_table(path, memory_map=True).to_pandas()
+        return super().read(path)
+
+    def write(self, obj, path: Path):
+        # feather only supports a default index, so the index is not stored (restored by get())
+        obj = obj.reset_index(drop=True)
+        if feather is not None:
+            feather.write_feather(obj, path)
+        else:
+            super().write(obj, path)
+
+    # returns the stored features for key, or builds them with build() (and stores them) if not present
+    # The result has the same index as dataframe
+    def get(self, key: str, dataframe: pd.DataFrame, build) -> pd.DataFrame:
+        features = self.load(key)
+        if (features is None) or (features.shape[0] != dataframe.shape[0]):
+            features = build(dataframe)
+            self.save(key, features)
+        else:
+            features.index = dataframe.index
+        return features
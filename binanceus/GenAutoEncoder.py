@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import operator
 
 import numpy as np
@@ -32,6 +34,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+
 import logging
 import warnings
 
@@ -42,18 +46,21 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 import custom_indicators as cta
 from finta import TA as fta
 
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.metrics import classification_report
-from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.preprocessing import StandardScaler, RobustScaler, MinMaxScaler
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-
-from sklearn.metrics import make_scorer
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.model_selection import cross_validate
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+classification_report = lazy_from('sklearn.metrics', 'classification_report')
+ConfusionMatrixDisplay = lazy_from('sklearn.metrics', 'ConfusionMatrixDisplay')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+
+make_scorer = lazy_from('sklearn.metrics', 'make_scorer')
+accuracy_score = lazy_from('sklearn.metrics', 'accuracy_score')
+precision_score = lazy_from('sklearn.metrics', 'precision_score')
+recall_score = lazy_from('sklearn.metrics', 'recall_score')
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+cross_validate = lazy_from('sklearn.model_selection', 'cross_validate')
 
 import random
 
@@ -64,18 +71,15 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 
 from AutoEncoder import AutoEncoder
 from LSTMAutoEncoder import LSTMAutoEncoder
@@ -0,0 +1,55 @@
+# Runs keras model predictions over (potentially large) tensors, for the Predict_* strategies
+#
+# The model is wrapped in a tf.function with a fixed input signature ([batch_size, seq_len, nfeatures]), so it is
+# traced (compiled) once and then re-used for every chunk, rather than calling model.predict() on each chunk (which
+# sets up a new data pipeline every time). Chunks are streamed through the function and written into a preallocated
+# output array. The last chunk is zero padded to the full batch size, so the input signature never changes
+#
+# The input can be a (read-only) view, e.g. from DataframeUtils.sequence_view(), since only one chunk at a time is
+# converted to a contiguous float32 array
+
+import numpy as np
+from LazyImport import lazy_import
+tf = lazy_import('tensorflow')
+
+
+class InferenceEngine:
+
+    def __init__(self, model, seq_len: int, nfeatures: int, batch_size: int = 256):
+        self.model = model
+        self.seq_len = seq_len
+        self.nfeatures = nfeatures
+        self.batch_size = batch_size
+
+        # staging buffer for the (padded) last chunk
+        self.batch = np.zeros((batch_size, seq_len, nfeatures), dtype=np.float32)
+
+        signature = [tf.TensorSpec(shape=(batch_size, seq_len, nfeatures), dtype=tf.float32)]
+        self.predict_fn = tf.function(self.predict_batch, input_signature=signature)
+
+    # returns the first output of the model for each row in the batch (same as model.predict()[:, 0], flattened)
+    def predict_batch(self, batch):
+        output = self.model(batch, training=False)
+        return tf.reshape(output, (self.batch_size, -1))[:, 0]
+
+    # returns True if the engine can be used for the supplied model & input shape
+    def matches(self, model, seq_len: int, nfeatures: int) -> bool:
+        return (model is self.model) and (seq_len == self.seq_len) and (nfeatures == self.nfeatures)
+
+    # runs the model over tensor ([nrows, seq_len, nfeatures]) and returns the predictions (one per row)
+    def predict(self, tensor) -> np.ndarray:
+        nrows = np.shape(tensor)[0]
+        predictions = np.empty(nrows, dtype=np.float64)
+
+        for start in range(0, nrows, self.batch_size):
+            end = min(start + self.batch_size, nrows)
+            size = end - start
+            if size == self.batch_size:
+                chunk = np.ascontiguousarray(tensor[start:end], dtype=np.float32)
+            else:
+                self.batch[:size] = tensor[start:end]
+                self.batch[size:] = 0.0
+                chunk = self.batch
+            predictions[start:end] = self.predict_fn(chunk).numpy()[:size]
+
+        return predictions
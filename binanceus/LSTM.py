@@ -6,7 +6,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from sklearn.preprocessing import RobustScaler
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -33,6 +32,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+
 import logging
 import warnings
 
@@ -43,8 +45,8 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 import custom_indicators as cta
 from finta import TA as fta
 
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 from tqdm import tqdm
 import time
 
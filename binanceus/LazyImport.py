@@ -0,0 +1,137 @@
+# Lazy (deferred) imports of the heavy ML libraries (tensorflow, keras, sklearn, xgboost, statsmodels etc.)
+#
+# freqtrade imports every file in the strategy directory while looking for a strategy, so any module that imports
+# tensorflow at the top makes loading *any* strategy (e.g. a DWT one) slow and memory hungry. Modules should use:
+#
+#   tf = lazy_import('tensorflow')                            instead of  import tensorflow as tf
+#   layers = lazy_import('keras.layers')                      instead of  from keras import layers
+#   XGBClassifier = lazy_from('xgboost', 'XGBClassifier')     instead of  from xgboost import XGBClassifier
+#
+# The real import happens the first time an attribute is used (or the class/function is called), i.e. when a model is
+# actually built or loaded. After that, there is very little overhead (attributes are copied onto the proxy)
+#
+# Limitations: the proxies can't be used as base classes, or in isinstance()/issubclass() checks, before they have
+# been resolved (use resolve() for that). Modules that define keras layers (Attention, Transformer etc.) therefore
+# define them inside a function, which is only run when one of the layers is first used (see lazy_definitions())
+# Annotations such as 'encoder: keras.Model' are evaluated at import, so files using them need
+# 'from __future__ import annotations'
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+
+    def __init__(self, name: str, on_load=None):
+        super().__init__(name)
+        self.__dict__['_lazy_loaded'] = False
+        self.__dict__['_lazy_on_load'] = on_load
+
+    def _load(self):
+        module = importlib.import_module(self.__name__)
+        if not self.__dict__['_lazy_loaded']:
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_loaded'] = True
+            if self.__dict__['_lazy_on_load'] is not None:
+                self.__dict__['_lazy_on_load'](module)
+        return module
+
+    def __getattr__(self, attr):
+        # only called for attributes that are not (yet) in __dict__
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_lazy_loaded'] else "not loaded"
+        return "<lazy module '{}' ({})>".format(self.__name__, state)
+
+
+class LazyObject:
+
+    def __init__(self, module: str, name: str):
+        self._lazy_module = module
+        self._lazy_name = name
+        self._lazy_object = None
+
+    def resolve(self):
+        if self._lazy_object is None:
+            self._lazy_object = getattr(importlib.import_module(self._lazy_module), self._lazy_name)
+        return self._lazy_object
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # only called for attributes that are not set in __init__
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return "<lazy {}.{}>".format(self._lazy_module, self._lazy_name)
+
+
+# returns the module (if it has already been imported) or a proxy that imports it on first use
+# on_load(module) is called once the module has been imported (straight away, if it already has been)
+def lazy_import(name: str, on_load=None):
+    module = sys.modules.get(name, None)
+    if module is not None:
+        if on_load is not None:
+            on_load(module)
+        return module
+    return LazyModule(name, on_load)
+
+
+# returns name from module (if module has already been imported), or a proxy that imports it on first use
+# (only names that are already defined are returned directly, so this does not trigger lazy_definitions())
+def lazy_from(module: str, name: str):
+    loaded = sys.modules.get(module, None)
+    if (loaded is not None) and (name in vars(loaded)):
+        return vars(loaded)[name]
+    return LazyObject(module, name)
+
+
+# returns a module level __getattr__ for modules whose classes can't be defined until a heavy library is imported
+# (e.g. subclasses of keras.layers.Layer). define() imports the library and returns a dict of the definitions, and is
+# only called when one of names is first used. The definitions are then added to the module, e.g.
+#
+#   def define_layers() -> dict:
+#       from keras.layers import Layer
+#       class Attention(Layer): ...
+#       return {'Attention': Attention}
+#
+#   __getattr__ = lazy_definitions(globals(), define_layers, ['Attention'])
+#
+# The names are not listed by dir(), so freqtrade's strategy search does not trigger the import either
+def lazy_definitions(namespace: dict, define, names: list):
+
+    def __getattr__(name):
+        if name not in names:
+            raise AttributeError("module '{}' has no attribute '{}'".format(namespace['__name__'], name))
+        for key, value in define().items():
+            if isinstance(value, (type, types.FunctionType)):
+                # so that they can be pickled, and are reported as <module>.<name>
+                value.__qualname__ = key
+            namespace[key] = value
+        return namespace[name]
+
+    return __getattr__
+
+
+# the tensorflow set up used by the strategies (fixed seed, warnings only). Applied when tensorflow is first used,
+# so use:  tf = lazy_import('tensorflow', on_load=setup_tensorflow)
+def setup_tensorflow(tf, seed=42):
+    tf.random.set_seed(seed)
+    tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
+
+
+# returns the real object behind a lazy proxy (or the object itself, if it is not a proxy)
+def resolve(obj):
+    if isinstance(obj, LazyObject):
+        return obj.resolve()
+    if isinstance(obj, LazyModule):
+        return obj._load()
+    return obj
@@ -0,0 +1,128 @@
+# On-disk cache for trained models (anything that joblib can save), keyed by a fingerprint of the training data
+# and settings. Used to avoid re-training identical models on every backtest, hyperopt, plot or restart
+#
+# Entries are evicted (oldest first) when they are older than max_age_days, or when the total size of the cache
+# exceeds max_size_mb. Loading an entry counts as using it, so the least recently used entries are removed first
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+class ModelCache:
+
+    suffix = ".joblib"  # file type of entries
+    description = "Model"  # used in messages
+
+    def __init__(self, cache_dir, max_size_mb=500.0, max_age_days=30.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+
+    # returns a hash of the supplied items (dataframes, series, arrays or simple values)
+    @staticmethod
+    def fingerprint(*items) -> str:
+        h = hashlib.sha1()
+        for item in items:
+            if isinstance(item, pd.DataFrame):
+                h.update(str(list(item.columns)).encode())
+                h.update(pd.util.hash_pandas_object(item, index=False).to_numpy().tobytes())
+            elif isinstance(item, pd.Series):
+                h.update(pd.util.hash_pandas_object(item, index=False).to_numpy().tobytes())
+            elif isinstance(item, np.ndarray):
+                h.update(str(item.shape).encode())
+                h.update(np.ascontiguousarray(item).tobytes())
+            else:
+                h.update(repr(item).encode())
+            h.update(b'|')
+        return h.hexdigest()
+
+    # returns the cache key for a model (strategy, pair and fingerprint of the data/settings)
+    def key(self, strategy: str, pair: str, *items) -> str:
+        return "{}_{}_{}".format(strategy, pair.replace("/", "_").replace(":", "_"), self.fingerprint(*items))
+
+    def get_path(self, key: str) -> Path:
+        return self.cache_dir / (key + self.suffix)
+
+    # reads/writes an entry. Subclasses can override these to use a different file format
+    def read(self, path: Path):
+        return joblib.load(path)
+
+    def write(self, obj, path: Path):
+        joblib.dump(obj, path)
+
+    # returns the cached object, or None if not present
+    def load(self, key: str):
+        path = self.get_path(key)
+        obj = None
+        if path.exists():
+            try:
+                obj = self.read(path)
+                os.utime(path)  # mark as recently used
+            except Exception as e:
+                print("    Error loading cached {} ({}): {}".format(self.description.lower(), path.name, e))
+                obj = None
+
+        if obj is None:
+            self.misses += 1
+            print("    {} cache miss ({} hits, {} misses)".format(self.description, self.hits, self.misses))
+        else:
+            self.hits += 1
+            print("    {} cache hit ({} hits, {} misses): {}".format(self.description, self.hits, self.misses,
+                                                                  path.name))
+        return obj
+
+    def save(self, key: str, obj):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.get_path(key)
+
+        # write to a temporary file first, so that other processes never see a partial file
+        tmp_path = path.with_suffix(".{}.tmp".format(os.getpid()))
+        try:
+            self.write(obj, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print("    Error saving {} to cache ({}): {}".format(self.description.lower(), path.name, e))
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+
+        self.evict()
+
+    # remove entries that are too old, then the least recently used entries until the cache is small enough
+    def evict(self):
+        if not self.cache_dir.exists():
+            return
+
+        entries = []
+        for path in self.cache_dir.glob("*" + self.suffix):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                pass  # removed by another process
+
+        entries.sort()
+        now = time.time()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if ((now - mtime) <= self.max_age) and (total_size <= self.max_size):
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            removed += 1
+
+        if removed > 0:
+            print("    Removed {} {}(s) from cache ({:.1f}MB left)".format(removed, self.description.lower(),
+                                                                     total_size / (1024 * 1024)))
@@ -0,0 +1,167 @@
+# Process-wide, in-memory registry of loaded models (keras .h5 and sklearn/joblib .sav files)
+# Used by NNBC and the anomaly detectors, so that each saved model is only read from disk (and deserialised) once,
+# and is then shared by every strategy instance (and pair) that asks for the same file
+#
+# Entries are keyed by the absolute path of the file. If the file is changed on disk (e.g. re-saved by another
+# process), the next get() reloads it. Models that are saved by this process should be registered with put(), so that
+# the registry does not hand out a stale copy
+#
+# Least recently used entries are evicted when the (estimated) total size exceeds max_memory_mb. The size of an entry
+# is estimated from the size of its file, which is close enough for both keras weights and sklearn estimators
+#
+# Models are shared, and fit() changes a model in place, so anything that re-trains a model it got from the registry
+# must first take a private copy with copy_for_training() (otherwise training by one strategy would change the model
+# used by every other strategy, and the shared model would no longer match its file)
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import joblib
+
+from LazyImport import lazy_import, lazy_from
+
+keras = lazy_import('keras')
+clone = lazy_from('sklearn.base', 'clone')
+
+
+class ModelRegistry:
+
+    def __init__(self, max_memory_mb=1000.0):
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self.entries = OrderedDict()  # path: (model, mtime, size), least recently used first
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.shared = weakref.WeakSet()  # every model handed out (or registered), even if since evicted
+
+    @staticmethod
+    def get_key(path) -> str:
+        return os.path.abspath(str(path))
+
+    @staticmethod
+    def file_info(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime, stat.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    # returns the model stored in path, loading it with loader(path) if it is not already loaded (or has changed)
+    # Returns None if the file does not exist, or could not be loaded (the loader should print the reason)
+    def get(self, path, loader):
+        key = self.get_key(path)
+        with self.lock:
+            mtime, size = self.file_info(key)
+            if mtime is None:
+                self._remove(key)
+                return None
+
+            entry = self.entries.get(key)
+            if (entry is not None) and (entry[1] == mtime):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            # not loaded, or changed on disk. Loading is done while holding the lock, so that a model that is requested
+            # by several strategies at once is still only loaded once
+            self.misses += 1
+            self._remove(key)
+            model = loader(key)
+            if model is not None:
+                self._add(key, model, mtime, size)
+            return model
+
+    # registers a model that has just been saved to path (so that the saved version does not need to be re-loaded)
+    def put(self, path, model):
+        key = self.get_key(path)
+        with self.lock:
+            self._remove(key)
+            mtime, size = self.file_info(key)
+            if (mtime is not None) and (model is not None):
+                self._add(key, model, mtime, size)
+
+    # returns a copy of model that can be re-trained without affecting anyone else, made with copier(model)
+    # (e.g. clone_keras or clone_sklearn). Models that did not come from the registry are returned as they are
+    def copy_for_training(self, model, copier):
+        with self.lock:
+            shared = (model is not None) and (model in self.shared)
+        if not shared:
+            return model
+        return copier(model)
+
+    # removes the entry for path (if present)
+    def remove(self, path):
+        with self.lock:
+            self._remove(self.get_key(path))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memory = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'models': len(self.entries),
+                'memory_mb': self.memory / (1024 * 1024),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    # internal functions, must be called with the lock held
+
+    def _add(self, key, model, mtime, size):
+        self.entries[key] = (model, mtime, size)
+        self.shared.add(model)
+        self.memory += size
+        self._evict()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.memory -= entry[2]
+
+    def _evict(self):
+        # always keep the most recently added model, even if it is bigger than the budget on its own
+        while (self.memory > self.max_memory) and (len(self.entries) > 1):
+            key, (_, _, size) = self.entries.popitem(last=False)
+            self.memory -= size
+            self.evictions += 1
+            print("    Model registry: evicted {} ({:.1f}MB in use)".format(os.path.basename(key),
+                                                                           self.memory / (1024 * 1024)))
+
+
+# loader for sklearn (joblib) models. Numpy arrays in the model (e.g. the trees of an IsolationForest) are memory
+# mapped rather than copied, so the OS can share the pages and only reads what is actually used
+def load_joblib(path):
+    try:
+        return joblib.load(path, mmap_mode='r')
+    except Exception as e:
+        print("    Error loading model from {}: {}".format(path, e))
+        return None
+
+
+# copier for keras models: same architecture, weights and compile settings (optimizer state is not copied)
+def clone_keras(model):
+    copy = keras.models.clone_model(model)
+    copy.set_weights(model.get_weights())
+    try:
+        copy.compile_from_config(model.get_compile_config())
+    except Exception:
+        # older keras (or a model that was never compiled): use the settings that the loaders use
+        copy.compile(metrics=['accuracy', 'mse'], loss='mse', optimizer=keras.optimizers.Adam(learning_rate=0.001))
+    return copy
+
+
+# copier for sklearn estimators: same parameters, not fitted (sklearn fit() starts from scratch anyway)
+def clone_sklearn(model):
+    return clone(model)
+
+
+# the registry used by all strategies in this process
+model_registry = ModelRegistry()
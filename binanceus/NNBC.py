@@ -1,4 +1,5 @@
 import operator
+import time
 
 import numpy as np
 from enum import Enum
@@ -32,6 +33,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+
 import logging
 import warnings
 
@@ -40,21 +43,28 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import DataframeUtils
+import Sampling
+from ModelRegistry import model_registry, clone_keras
+from FeatureStore import FeatureStore
 from finta import TA as fta
 
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.metrics import classification_report
-from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.preprocessing import StandardScaler, RobustScaler
-import sklearn.decomposition as skd
-from sklearn.preprocessing import LabelEncoder, StandardScaler, MinMaxScaler
-
-from sklearn.metrics import make_scorer
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.model_selection import cross_validate
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+classification_report = lazy_from('sklearn.metrics', 'classification_report')
+ConfusionMatrixDisplay = lazy_from('sklearn.metrics', 'ConfusionMatrixDisplay')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+skd = lazy_import('sklearn.decomposition')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+
+make_scorer = lazy_from('sklearn.metrics', 'make_scorer')
+accuracy_score = lazy_from('sklearn.metrics', 'accuracy_score')
+precision_score = lazy_from('sklearn.metrics', 'precision_score')
+recall_score = lazy_from('sklearn.metrics', 'recall_score')
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+cross_validate = lazy_from('sklearn.model_selection', 'cross_validate')
 
 import random
 
@@ -65,20 +75,17 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 from tqdm import tqdm
-import Attention
+Attention = lazy_import('Attention')
 import RBM
 
 """
@@ -215,6 +222,14 @@ class NNBC(IStrategy):
     cherrypick_data = False
     refit_model = True  # only set to True when training. If False, then existing model is used, if present
     use_full_dataset = True  # use the entire dataset for training (in backtest/hyperopt)
+    compact_features = False  # normalise into a single float32 array (in place), rather than float64 copies
+
+    # store of calculated indicators (on disk), used in backtest/hyperopt/plot modes. Indicators are shared by all
+    # variants that use the same indicator code, so comparing variants only calculates them once per pair
+    use_feature_store = True
+    feature_store_size_mb = 2000.0  # max total size of stored indicators
+    feature_store_age_days = 7.0  # stored indicators older than this are removed
+    feature_store: FeatureStore = None
 
     buy_tag = 'buy'
     sell_tag = 'sell'
@@ -230,6 +245,7 @@ class NNBC(IStrategy):
     first_run = True  # used to identify first time through buy/sell populate funcs
 
     dbg_scan_classifiers = True  # if True, scan all viable classifiers and choose the best. Very slow!
+    scan_timeout = 600.0  # max time (seconds) allowed to train each classifier in a scan (0 means no limit)
     dbg_test_classifier = True  # test clasifiers after fitting
     dbg_verbose = True  # controls debug output
     dbg_curr_df: DataFrame = None  # for debugging of current dataframe
@@ -346,7 +362,6 @@ class NNBC(IStrategy):
 
         self.set_state(curr_pair, self.State.POPULATE)
         self.curr_lookahead = int(12 * self.lookahead_hours)
-        self.dbg_curr_df = dataframe
 
         # reset profit/loss thresholds
         self.profit_threshold = self.default_profit_threshold
@@ -377,21 +392,29 @@ class NNBC(IStrategy):
         print(curr_pair)
 
         # populate the normal dataframe
-        dataframe = self.add_indicators(dataframe)
-
-        buys, sells = self.create_training_data(dataframe)
+        dataframe = self.get_indicators(curr_pair, dataframe)
 
-        # drop last group (because there cannot be a prediction)
-        df = dataframe.iloc[:-self.curr_lookahead]
-        buys = buys.iloc[:-self.curr_lookahead]
-        sells = sells.iloc[:-self.curr_lookahead]
+        # debug indicators are added to this frame (which is a new one if the indicators came from the feature store)
+        self.dbg_curr_df = dataframe
 
-        # Principal Component Analysis of inf data
+        # profit/loss thresholds for this pair. These are needed on every call (NNBC_jump and NNBC_profit use them in
+        # their entry/exit conditions), but labels are only generated when the models are trained
+        self.set_gain_thresholds(dataframe)
 
         # train the models on the informative data
-        if self.dbg_verbose:
-            print("    training models...")
-        self.train_models(curr_pair, df, buys, sells)
+        # The training labels are only generated (or fetched from the cache) if the models will actually be trained
+        if self.training_due(curr_pair):
+            buys, sells = self.get_training_labels(curr_pair, dataframe)
+
+            # drop last group (because there cannot be a prediction)
+            df = dataframe.iloc[:-self.curr_lookahead]
+            buys = buys.iloc[:-self.curr_lookahead]
+            sells = sells.iloc[:-self.curr_lookahead]
+
+            if self.dbg_verbose:
+                print("    training models...")
+            self.train_models(curr_pair, df, buys, sells)
+
         # add predictions
 
         if self.dbg_verbose:
@@ -742,17 +765,13 @@ class NNBC(IStrategy):
 
         return dataframe
 
-    # calculate future gains. Used for setting targets
-    def add_future_data(self, dataframe: DataFrame) -> DataFrame:
+    # adds the future gain (%) over the lookahead period to future_df, measured on the 'full' DWT of the close (or on the
+    # close itself), split into future_profit & future_loss. Returns the name of the price column used
+    def add_future_gain(self, future_df: DataFrame) -> str:
 
         # yes, we lookahead in the data!
         lookahead = self.curr_lookahead
 
-        win_size = max(lookahead, 14)
-
-        # make a copy of the dataframe so that we do not put any forward looking data into the main dataframe
-        future_df = dataframe.copy()
-
         # we can either use the actual closing price, or the DWT model (smoother)
 
         use_dwt = True
@@ -760,12 +779,44 @@ class NNBC(IStrategy):
             price_col = 'full_dwt'
 
             # get the 'full' DWT transform. This models the entire dataframe, so cannot be used in the 'main' dataframe
-            future_df['full_dwt'] = self.get_dwt(dataframe['close'])
+            future_df['full_dwt'] = self.get_dwt(future_df['close'])
 
         else:
             price_col = 'close'
             future_df['full_dwt'] = 0.0
 
+        # calculate future gains
+        future_df['future_close'] = future_df[price_col].shift(-lookahead)
+
+        future_df['future_gain'] = 100.0 * (future_df['future_close'] - future_df[price_col]) / future_df[price_col]
+        future_df['future_gain'].clip(lower=-5.0, upper=5.0, inplace=True)
+
+        future_df['future_profit'] = future_df['future_gain'].clip(lower=0.0)
+        future_df['future_loss'] = future_df['future_gain'].clip(upper=0.0)
+
+        return price_col
+
+    # sets the profit/loss thresholds for the pair being populated, from the future gains in dataframe
+    # The thresholds are used by the training labels and by some variants' entry/exit conditions, so they are set on
+    # every call (not just when labels are generated, which may only happen when the models are trained)
+    def set_gain_thresholds(self, dataframe: DataFrame):
+        future_df = dataframe[['close']].copy()
+        self.add_future_gain(future_df)
+        self.update_gain_thresholds(future_df)
+
+    # calculate future gains. Used for setting targets
+    def add_future_data(self, dataframe: DataFrame) -> DataFrame:
+
+        # yes, we lookahead in the data!
+        lookahead = self.curr_lookahead
+
+        win_size = max(lookahead, 14)
+
+        # make a copy of the dataframe so that we do not put any forward looking data into the main dataframe
+        future_df = dataframe.copy()
+
+        # calculate future gains
+        price_col = self.add_future_gain(future_df)
 
         # these look backward, but are here to be safe
         # dataframe['dwt_deriv'] = np.gradient(dataframe['dwt_smooth'])
@@ -773,19 +824,10 @@ class NNBC(IStrategy):
         future_df['dwt_top'] = np.where(qtpylib.crossed_below(future_df['dwt_deriv'], 0.0), 1, 0)
         future_df['dwt_bottom'] = np.where(qtpylib.crossed_above(future_df['dwt_deriv'], 0.0), 1, 0)
 
-        # calculate future gains
-        future_df['future_close'] = future_df[price_col].shift(-lookahead)
-
-        future_df['future_gain'] = 100.0 * (future_df['future_close'] - future_df[price_col]) / future_df[price_col]
-        future_df['future_gain'].clip(lower=-5.0, upper=5.0, inplace=True)
-
         # gain from beginning of window to end of window
         future_df['future_win_gain'] = 100.0 * (future_df['dwt'].shift(-self.curr_lookahead) - future_df['dwt'] /
                                                 future_df['dwt'])
 
-        future_df['future_profit'] = future_df['future_gain'].clip(lower=0.0)
-        future_df['future_loss'] = future_df['future_gain'].clip(upper=0.0)
-
         # get rolling mean & stddev so that we have a localised estimate of (recent) future activity
         # Note: window in past because we already looked forward
         future_df['profit_mean'] = future_df['future_profit'].rolling(win_size).mean()
@@ -840,8 +882,9 @@ class NNBC(IStrategy):
         # )
         future_df['future_nseq_up'] = future_df['dwt_nseq_up'].shift(-lookahead)
 
-        future_df['future_nseq_up_mean'] = future_df['future_nseq_up'].rolling(window=future_win).mean()
-        future_df['future_nseq_up_std'] = future_df['future_nseq_up'].rolling(window=future_win).std()
+        nseq_up_stats = DataframeUtils.forward_rolling(future_df['future_nseq_up'], int(win_size), stats=('mean', 'std'))
+        future_df['future_nseq_up_mean'] = nseq_up_stats['mean']
+        future_df['future_nseq_up_std'] = nseq_up_stats['std']
         future_df['future_nseq_up_thresh'] = future_df['future_nseq_up_mean'] + self.n_profit_stddevs * future_df[
             'future_nseq_up_std']
 
@@ -853,14 +896,16 @@ class NNBC(IStrategy):
         # print(future_df['future_nseq_dn'])
         future_df['future_nseq_dn'] = future_df['dwt_nseq_dn'].shift(-lookahead)
 
-        future_df['future_nseq_dn_mean'] = future_df['future_nseq_dn'].rolling(future_win).mean()
-        future_df['future_nseq_dn_std'] = future_df['future_nseq_dn'].rolling(future_win).std()
+        nseq_dn_stats = DataframeUtils.forward_rolling(future_df['future_nseq_dn'], int(win_size), stats=('mean', 'std'))
+        future_df['future_nseq_dn_mean'] = nseq_dn_stats['mean']
+        future_df['future_nseq_dn_std'] = nseq_dn_stats['std']
         future_df['future_nseq_dn_thresh'] = future_df['future_nseq_dn_mean'] \
                                              - self.n_loss_stddevs * future_df['future_nseq_dn_std']
 
         # Recent min/max
-        future_df['future_min'] = future_df['dwt_smooth'].rolling(window=future_win).min()
-        future_df['future_max'] = future_df['dwt_smooth'].rolling(window=future_win).max()
+        minmax_stats = DataframeUtils.forward_rolling(future_df['dwt_smooth'], int(win_size), stats=('min', 'max'))
+        future_df['future_min'] = minmax_stats['min']
+        future_df['future_max'] = minmax_stats['max']
         future_df['future_maxmin'] = 100.0 * (future_df['future_max'] - future_df['future_min']) / \
                                      future_df['future_max']
         future_df['future_delta_min'] = 100.0 * (future_df['future_min'] - future_df['close']) / \
@@ -868,7 +913,11 @@ class NNBC(IStrategy):
         future_df['future_delta_max'] = 100.0 * (future_df['future_max'] - future_df['close']) / \
                                         future_df['close']
 
-        # get average gain & stddev
+        return future_df
+
+    # sets the profit/loss thresholds from the average gain & stddev in future_df (see add_future_data())
+    # Called whenever future data is used, whether it was just calculated or came from the feature store
+    def update_gain_thresholds(self, future_df: DataFrame):
         profit_mean = future_df['future_profit'].mean()
         profit_std = future_df['future_profit'].std()
         loss_mean = future_df['future_loss'].mean()
@@ -885,14 +934,72 @@ class NNBC(IStrategy):
             print("    Loss threshold {:.4f} -> {:.4f}".format(self.loss_threshold, newval))
             self.loss_threshold = newval
 
-        return future_df
-
     ################################
 
+    # returns True if train_models() will train the models (only done in backtest mode)
+    def training_due(self, curr_pair) -> bool:
+        return self.dp.runmode.value in ('backtest')
+
+    # returns the buy/sell labels for the dataframe. Labels are cached (per pair), keyed by the data and the
+    # settings that affect them, so they are only generated once for any given set of candles
+    def get_training_labels(self, curr_pair, dataframe: DataFrame):
+        key = DataframeUtils.label_key(dataframe, self.__class__.__name__, self.lookahead_hours,
+                                       self.n_profit_stddevs, self.n_loss_stddevs)
+        labels, cached = DataframeUtils.get_cached_labels(curr_pair, key,
+                                                           lambda: self.create_training_data(dataframe),
+                                                           debug_df=self.dbg_curr_df)
+        if cached and self.dbg_verbose:
+            print("    using cached training labels")
+        return labels
+
+    def get_feature_store(self) -> FeatureStore:
+        # shared by all instances, stored in the 'models/features' subdirectory of this file's location
+        if NNBC.feature_store is None:
+            store_dir = Path(__file__).parent / "models" / "features"
+            NNBC.feature_store = FeatureStore(store_dir, max_size_mb=self.feature_store_size_mb,
+                                              max_age_days=self.feature_store_age_days)
+        return NNBC.feature_store
+
+    # feature store key, covering the code and settings used to calculate the indicators (and future data)
+    def get_feature_key(self, name, curr_pair, dataframe: DataFrame) -> str:
+        store = self.get_feature_store()
+        code = store.code_hash(self.add_indicators, self.add_future_data, self.add_future_gain,
+                               self.get_dwt, self.roll_get_dwt, self.roll_smooth, self.norm_column, cta)
+        # named after the class that defines the indicators, since they are shared by all of its variants
+        base = type(self).add_indicators.__qualname__.split('.')[0]
+        return store.feature_key(base + "_" + name, curr_pair, self.timeframe, dataframe, code,
+                                 self.curr_lookahead, self.dwt_window, self.startup_candle_count,
+                                 self.n_profit_stddevs, self.n_loss_stddevs, self.dp.runmode.value)
+
+    def use_stored_features(self) -> bool:
+        return self.use_feature_store and (self.dp.runmode.value in ('hyperopt', 'backtest', 'plot'))
+
+    # returns the dataframe with indicators added (from the feature store, if they have already been calculated)
+    def get_indicators(self, curr_pair, dataframe: DataFrame) -> DataFrame:
+        if not self.use_stored_features():
+            return self.add_indicators(dataframe)
+        key = self.get_feature_key("indicators", curr_pair, dataframe)
+        return self.get_feature_store().get(key, dataframe, self.add_indicators)
+
+    # returns the dataframe with the future data (used to create labels) added, and sets the profit/loss thresholds
+    # from it
+    def get_future_data(self, dataframe: DataFrame) -> DataFrame:
+        def build(df):
+            return self.add_future_data(df.copy())
+
+        if not self.use_stored_features():
+            future_df = build(dataframe)
+        else:
+            key = self.get_feature_key("future", self.curr_pair, dataframe)
+            future_df = self.get_feature_store().get(key, dataframe, build)
+
+        self.update_gain_thresholds(future_df)
+        return future_df
+
     # creates the buy/sell labels absed on looking ahead into the supplied dataframe
     def create_training_data(self, dataframe: DataFrame):
 
-        future_df = self.add_future_data(dataframe.copy())
+        future_df = self.get_future_data(dataframe)
 
         future_df['train_buy'] = 0.0
         future_df['train_sell'] = 0.0
@@ -1096,9 +1203,7 @@ class NNBC(IStrategy):
     def remove_debug_columns(self, dataframe: DataFrame) -> DataFrame:
         drop_list = dataframe.filter(regex='^%').columns
         if len(drop_list) > 0:
-            for col in drop_list:
-                dataframe = dataframe.drop(col, axis=1)
-            dataframe.reindex()
+            dataframe = dataframe.drop(columns=drop_list)
         return dataframe
 
     # compress the supplied dataframe
@@ -1108,7 +1213,20 @@ class NNBC(IStrategy):
         return pd.DataFrame(self.compressor.transform(dataframe))
 
     # Normalise a dataframe
-    def norm_dataframe(self, dataframe: DataFrame) -> DataFrame:
+    # If fit is True, fits a new scaler for the current pair, otherwise re-uses the one fitted during training
+    def norm_dataframe(self, dataframe: DataFrame, fit=True) -> DataFrame:
+        tag = self.__class__.__name__
+
+        # compact: single float32 array, normalised in place (the tensors are float32 anyway)
+        if self.compact_features:
+            features = DataframeUtils.FeatureMatrix.from_dataframe(dataframe, year=True)
+            scaler = None if fit else DataframeUtils.scaler_registry.get(self.curr_pair, tag)
+            if scaler is None:
+                scaler = self.get_scaler()
+                scaler.fit(features.values)
+                DataframeUtils.scaler_registry.set(scaler, self.curr_pair, tag)
+            return DataframeUtils.transform_features(features, scaler).values
+
         self.check_inf(dataframe)
 
         df = dataframe.copy()
@@ -1129,9 +1247,15 @@ class NNBC(IStrategy):
         df.set_index('date')
         df.reindex()
 
-        scaler = self.get_scaler()
+        scaler = None if fit else DataframeUtils.scaler_registry.get(self.curr_pair, tag)
+        if scaler is None:
+            scaler = self.get_scaler()
+            df_norm = scaler.fit_transform(df)
+            DataframeUtils.scaler_registry.set(scaler, self.curr_pair, tag)
+        else:
+            df_norm = scaler.transform(df)
 
-        return scaler.fit_transform(df)
+        return df_norm
 
     # Normalise a dataframe using Z-Score normalisation (mean=0, stddev=1)
     def zscore_dataframe(self, dataframe: DataFrame) -> DataFrame:
@@ -1157,107 +1281,24 @@ class NNBC(IStrategy):
 
     # remove outliers from normalised dataframe
     def remove_outliers(self, df_norm: DataFrame, buys, sells):
-
-        # for col in df_norm.columns.values:
-        #     if col != 'date':
-        #         df_norm = df_norm[(df_norm[col] <= 3.0)]
-        # return df_norm
-        df = df_norm.copy()
-        df['%temp_buy'] = buys.copy()
-        df['%temp_sell'] = sells.copy()
-        #
-        df2 = df[((df >= -3.0) & (df <= 3.0)).all(axis=1)]
-        # df_out = df[~((df >= -3.0) & (df <= 3.0)).all(axis=1)] # for debug
-        ndrop = df_norm.shape[0] - df2.shape[0]
+        index = Sampling.inlier_index(df_norm, limit=3.0)
+        ndrop = df_norm.shape[0] - len(index)
         if ndrop > 0:
-            b = df2['%temp_buy'].copy()
-            s = df2['%temp_sell'].copy()
-            df2.drop('%temp_buy', axis=1, inplace=True)
-            df2.drop('%temp_sell', axis=1, inplace=True)
-            df2.reindex()
-            # if self.dbg_verbose:
             print("    Removed ", ndrop, " outliers")
-            # print(" df2:", df2)
-            # print(" df_out:", df_out)
-            # print ("df_norm:", df_norm.shape, "df2:", df2.shape, "df_out:", df_out.shape)
+            return Sampling.take(df_norm, index), Sampling.take(buys, index), Sampling.take(sells, index)
         else:
             # no outliers, just return originals
-            df2 = df_norm
-            b = buys
-            s = sells
-        return df2, b, s
+            return df_norm, buys, sells
 
     # build a 'viable' dataframe sample set. Needed because the positive labels are sparse
     # Not entirely sure this works with Neural Nets because they look at sequences
+    # Rows are selected by index (the label of a sequence is the label of its first, i.e. most recent, row), and the
+    # tensors are gathered from a sequence view once, at the end
     def build_viable_dataset(self, size: int, df_norm, buys, sells):
 
-        # copy and combine the data into one dataframe
-        df = df_norm.copy()
-
-        df_type = type(df).__name__
-        if 'array' in df_type:
-            # np.array
-            buy_col = np.shape(df)[1]
-            sell_col = buy_col + 1
-            df = np.hstack((df, np.array(buys).reshape(-1, 1), np.array(sells).reshape(-1, 1)))
-
-        else:
-            # dataframe
-            df['%temp_buy'] = buys.copy()
-            df['%temp_sell'] = sells.copy()
-            buy_col = df.columns.get_loc('%temp_buy')
-            sell_col = df.columns.get_loc('%temp_sell')
-
-        tensor = self.df_to_tensor(df, self.seq_len)
-
-        # print("df_norm:{} df:{} tensor:{}".format(np.shape(df_norm), np.shape(df), np.shape(tensor)))
-        # print("buy_col:{} sell_col:{}".format(buy_col, sell_col))
-
-        buy_idx = np.array([], dtype=int)
-        sell_idx = np.array([], dtype=int)
-        nosig_idx = np.array([], dtype=int)
-        buy_tensor = np.array([], dtype=float)
-        sell_tensor = np.array([], dtype=float)
-        nosig_tensor = np.array([], dtype=float)
-
-        # identify buys, sells, no signal (probably a fast way to this)
-        for row in range(np.shape(tensor)[0]):
-            if tensor[row][0][buy_col] == 1:
-                buy_idx = np.append(buy_idx, row)
-            if tensor[row][0][sell_col] == 1:
-                sell_idx = np.append(sell_idx, row)
-            if (tensor[row][0][buy_col] == 0) & (tensor[row][0][sell_col] == 0):
-                nosig_idx = np.append(nosig_idx, row)
-
-        buy_tensor = tensor[buy_idx].copy()
-        sell_tensor = tensor[sell_idx].copy()
-        nosig_tensor = tensor[nosig_idx].copy()
-
-        num_buys = np.shape(buy_tensor)[0]
-        num_sells = np.shape(sell_tensor)[0]
-        num_nosig = np.shape(nosig_tensor)[0]
-        # print("df:{} num_buys:{} num_sells:{} num_nosig:{}".format(np.shape(tensor)[0], num_buys, num_sells, num_nosig))
-
-        # print("raw:")
-        # print("tensor:{} buy_tensor:{}, sell_tensor:{}, nosig_tensor:{}".format(np.shape(tensor),
-        #                                                                         np.shape(buy_tensor),
-        #                                                                         np.shape(sell_tensor),
-        #                                                                         np.shape(nosig_tensor)))
-        # print(sell_tensor)
-
-        # DEBUG
-        for row in range(np.shape(sell_tensor)[0]):
-            if buy_tensor[row][0][buy_col] != 1:
-                print("invalid buy entry ({:.2f}) in row {}".format(buy_tensor[row][0][buy_col], row))
-                print(sell_tensor[row][0])
-
-            if sell_tensor[row][0][sell_col] != 1:
-                print("invalid sell entry ({:.2f}) in row {}".format(sell_tensor[row][0][sell_col], row))
-                print(sell_tensor[row][0])
-
-            if (nosig_tensor[row][0][buy_col] != 0) & (sell_tensor[row][0][sell_col] != 0):
-                print("invalid nosig entry ({:.2f}) in row {}".format(nosig_tensor[row][0][sell_col], row))
-                print(sell_tensor[row][0])
+        buy_idx, sell_idx, nosig_idx = Sampling.signal_index(buys, sells)
+        num_buys = len(buy_idx)
+        num_sells = len(sell_idx)
 
         # make sure there aren't too many buys & sells
         # We are aiming for a roughly even split between buys, sells, and 'no signal' (no buy or sell)
@@ -1267,47 +1308,30 @@ class NNBC(IStrategy):
             sig_size = int(size / 3)
             if (num_buys > sig_size) & (num_sells > sig_size):
                 # resize both buy & sell to 1/3 of requested size
-                buy_tensor, _ = train_test_split(buy_tensor, train_size=sig_size, shuffle=True)
-                sell_tensor, _ = train_test_split(sell_tensor, train_size=sig_size, shuffle=True)
+                buy_idx = Sampling.subsample(buy_idx, sig_size)
+                sell_idx = Sampling.subsample(sell_idx, sig_size)
             else:
                 # only one them is too big, so figure out which
                 if (num_buys > num_sells):
-                    buy_tensor, _ = train_test_split(buy_tensor, train_size=max_signals - num_sells, shuffle=True)
+                    buy_idx = Sampling.subsample(buy_idx, max_signals - num_sells)
                 else:
-                    sell_tensor, _ = train_test_split(sell_tensor, train_size=max_signals - num_buys, shuffle=True)
+                    sell_idx = Sampling.subsample(sell_idx, max_signals - num_buys)
 
         # extract enough rows to fill the requested size
         fill_size = size - min(num_buys, int(size / 3)) - min(num_sells, int(size / 3))
-        nosig_tensor, _ = train_test_split(nosig_tensor, train_size=fill_size, shuffle=True)
-        # print("viable df - buys:{} sells:{} fill:{}".format(df_buy.shape[0], df_sell.shape[0], df_nosig.shape[0]))
-
-        # concatenate the arrays
-        t2 = np.concatenate((buy_tensor, sell_tensor, nosig_tensor))
+        nosig_idx = Sampling.subsample(nosig_idx, fill_size)
 
         # shuffle rows, so that buys, sells & nothing are intermixed
-        np.random.shuffle(t2)
-        # np.random.shuffle(t2)
-
-        # print("trimmed:")
-        # print("buy_tensor:{}, sell_tensor:{}, nosig_tensor:{} t2:{}".format(np.shape(buy_tensor),
-        #                                                                     np.shape(sell_tensor),
-        #                                                                     np.shape(nosig_tensor),
-        #                                                                     np.shape(t2)))
-        # print(t2)
+        index = np.concatenate((buy_idx, sell_idx, nosig_idx))
+        np.random.shuffle(index)
 
-        # separate out the data, buys & sells
-        b = t2[:, :, buy_col].copy()
-        s = t2[:, :, sell_col].copy()
+        # gather the sequences (data, buys & sells)
+        tensor = DataframeUtils.sequence_view(df_norm, self.seq_len)[index]
+        labels = DataframeUtils.sequence_view(np.column_stack((buys, sells)), self.seq_len)[index]
+        b = labels[:, :, 0].copy()
+        s = labels[:, :, 1].copy()
 
-        # print("b:{:.0f} s:{:.0f}".format(b[:, 0].sum(), s[:, 0].sum()))
-
-        t3 = np.zeros((np.shape(t2)[0], np.shape(t2)[1], np.shape(t2)[2] - 2), dtype=float)
-        for row in range(np.shape(t2)[0]):
-            for seq in range(np.shape(t2)[1]):
-                features = np.delete(t2[row][seq], [buy_col, sell_col])
-                t3[row][seq] = features
-
-        return t3, b, s
+        return tensor, b, s
 
     # build a dataset that mimics 'live' runs
     def build_standard_dataset(self, size: int, df_norm: DataFrame, buys, sells):
@@ -1636,46 +1660,8 @@ class NNBC(IStrategy):
         return MinMaxScaler()
 
     def df_to_tensor(self, df, seq_len):
-        # input format = [nrows, nfeatures], output = [nrows, seq_len, nfeatures]
-        # print("df type:", type(df))
-        if not isinstance(df, type([np.ndarray, np.array])):
-            data = np.array(df)
-        else:
-            data = df
-
-        nrows = np.shape(data)[0]
-        nfeatures = np.shape(data)[1]
-        tensor_arr = np.zeros((nrows, seq_len, nfeatures), dtype=float)
-        zero_row = np.zeros((nfeatures), dtype=float)
-        # tensor_arr = []
-
-        # print("data:{} tensor:{}".format(np.shape(data), np.shape(tensor_arr)))
-        # print("nrows:{} nfeatures:{}".format(nrows, nfeatures))
-
-        reverse = True
-
-        # fill the first part (0..seqlen rows), which are only sparsely populated
-        for row in range(seq_len):
-            for seq in range(seq_len):
-                if seq >= (seq_len - row - 1):
-                    src_row = (row + seq) - seq_len + 1
-                    tensor_arr[row][seq] = data[src_row]
-                else:
-                    tensor_arr[row][seq] = zero_row
-            if reverse:
-                tensor_arr[row] = np.flipud(tensor_arr[row])
-
-        # fill the rest
-        # print("Data:{}, len:{}".format(np.shape(data), seq_len))
-        for row in range(seq_len, nrows):
-            tensor_arr[row] = data[(row - seq_len) + 1:row + 1]
-            if reverse:
-                tensor_arr[row] = np.flipud(tensor_arr[row])
-
-        # print("data: ", data)
-        # print("tensor: ", tensor_arr)
-        # print("data:{} tensor:{}".format(np.shape(data), np.shape(tensor_arr)))
-        return tensor_arr
+        # input format = [nrows, nfeatures], output = [nrows, seq_len, nfeatures] (float32)
+        return DataframeUtils.df_to_tensor(df, seq_len)
 
     #######################################
 
@@ -1702,26 +1688,29 @@ class NNBC(IStrategy):
         return model_path
 
     def load_model(self, clf_name, tag):
-        model = None
         model_path = self.get_model_path(clf_name, tag)
 
-        # load saved model if present
-        if os.path.exists(model_path):
-            print("    Loading existing model ({})...".format(model_path))
+        def loader(path):
+            print("    Loading existing model ({})...".format(path))
             try:
-                model = keras.models.load_model(model_path, compile=False)
+                model = keras.models.load_model(path, compile=False)
                 # optimizer = keras.optimizers.Adam()
                 optimizer = keras.optimizers.Adam(learning_rate=0.001)
                 model.compile(metrics=['accuracy', 'mse'], loss='mse', optimizer=optimizer)
-                self.is_trained = True
-
+                return model
             except Exception as e:
                 print("    ", str(e))
-                print("    Error loading model from {}. Check whether model format changed".format(model_path))
-                self.is_trained = False
+                print("    Error loading model from {}. Check whether model format changed".format(path))
+                return None
+
+        # load saved model if present (only read from disk once per process, then shared)
+        if os.path.exists(model_path):
+            model = model_registry.get(model_path, loader)
         else:
             print("    model not found ({})...".format(model_path))
-            self.is_trained = False
+            model = None
+
+        self.is_trained = model is not None
 
         return model
 
@@ -1742,7 +1731,7 @@ class NNBC(IStrategy):
                 print("*** ERR: no existing model. You should run backtest first!")
         return model
 
-    def fit_classifier(self, classifier, name, tag, tensor, labels, test_tensor, test_labels):
+    def fit_classifier(self, classifier, name, tag, tensor, labels, test_tensor, test_labels, time_limit=0):
 
         # load existing model, if it exists
         checkpoint = self.get_checkpoint_path(name, tag)
@@ -1756,6 +1745,9 @@ class NNBC(IStrategy):
 
         if classifier is None:
             classifier, _ = self.classifier_factory(name, tensor, labels)
+        else:
+            # the loaded model is shared (other strategies may be using it), so re-train a copy
+            classifier = model_registry.copy_for_training(classifier, clone_keras)
 
         if classifier is None:
             print("    Could not create classifier")
@@ -1793,6 +1785,18 @@ class NNBC(IStrategy):
             save_best_only=True,
             verbose=0)
 
+        callbacks = [plateau_callback, early_callback, checkpoint_callback]
+
+        # callback to stop training once time_limit seconds have passed
+        if time_limit > 0:
+            start_time = time.perf_counter()
+
+            def check_time(batch, logs):
+                if (time.perf_counter() - start_time) > time_limit:
+                    classifier.stop_training = True
+
+            callbacks.append(keras.callbacks.LambdaCallback(on_train_batch_end=check_time))
+
         # df_tensor = np.reshape(df_tensor, (np.shape(df_tensor)[0], np.shape(df_tensor)[1], np.shape(df_tensor)[2]))
         # lbl_tensor = np.array(lbl_tensor).reshape(np.shape(df_tensor)[0], np.shape(df_tensor)[1], np.shape(df_tensor)[2]))
 
@@ -1802,7 +1806,7 @@ class NNBC(IStrategy):
         fhis = classifier.fit(tensor, labels,
                               batch_size=self.batch_size,
                               epochs=self.num_epochs,
-                              callbacks=[plateau_callback, early_callback, checkpoint_callback],
+                              callbacks=callbacks,
                               validation_data=(test_tensor, test_labels),
                               verbose=1)
 
@@ -1810,7 +1814,9 @@ class NNBC(IStrategy):
         # classifier = self.get_model_weights(classifier, name, tag)
 
         # save the model
-        keras.models.save_model(classifier, filepath=self.get_model_path(name, tag))
+        model_path = self.get_model_path(name, tag)
+        keras.models.save_model(classifier, filepath=model_path)
+        model_registry.put(model_path, classifier)
 
         self.is_trained = True
 
@@ -2184,7 +2190,9 @@ class NNBC(IStrategy):
 
                 # fit to the training data
                 clf_dict[clf_name] = clf
-                clf = self.fit_classifier(clf, clf_name, tag, tsr_train, res_train, tsr_test, res_test)
+                # keras models already use all available cores, so they are trained one at a time (with a time limit)
+                clf = self.fit_classifier(clf, clf_name, tag, tsr_train, res_train, tsr_test, res_test,
+                                          time_limit=self.scan_timeout)
 
                 # assess using the test data. Do *not* use the training data for testing
                 pred_test = self.get_classifier_predictions(clf, tsr_test)
@@ -2225,7 +2233,7 @@ class NNBC(IStrategy):
 
         if clf is not None:
             # print("    predicting... - dataframe:", dataframe.shape)
-            df_norm = self.norm_dataframe(dataframe)
+            df_norm = self.norm_dataframe(dataframe, fit=False)
             if self.compress_data:
                 df_norm = self.compress_dataframe(df_norm)
 
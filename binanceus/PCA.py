@@ -6,7 +6,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from xgboost import XGBClassifier
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -33,6 +32,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from
+XGBClassifier = lazy_from('xgboost', 'XGBClassifier')
+
 import logging
 import warnings
 
@@ -41,40 +43,55 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import ClassifierScan
+import DataframeUtils
+import Sampling
+from ModelCache import ModelCache
+from FeatureStore import FeatureStore
+from RetrainScheduler import RetrainScheduler
+from WalkForward import WalkForward
 from finta import TA as fta
 
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.metrics import classification_report
-from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.preprocessing import StandardScaler, RobustScaler, MinMaxScaler
-import sklearn.decomposition as skd
-from sklearn.svm import SVC, SVR
-from sklearn.utils.fixes import loguniform
-from sklearn import preprocessing
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import GridSearchCV
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, AdaBoostClassifier, VotingClassifier
-from sklearn.naive_bayes import GaussianNB, MultinomialNB
-from sklearn.neural_network import MLPClassifier, BernoulliRBM
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.linear_model import LogisticRegression, SGDClassifier
-from sklearn.svm import LinearSVC
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis, LinearDiscriminantAnalysis
-from sklearn.linear_model import LogisticRegression
-from sklearn.manifold import LocallyLinearEmbedding
-
-from sklearn.metrics import make_scorer
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.model_selection import cross_validate
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+classification_report = lazy_from('sklearn.metrics', 'classification_report')
+ConfusionMatrixDisplay = lazy_from('sklearn.metrics', 'ConfusionMatrixDisplay')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+skd = lazy_import('sklearn.decomposition')
+SVC = lazy_from('sklearn.svm', 'SVC')
+SVR = lazy_from('sklearn.svm', 'SVR')
+loguniform = lazy_from('sklearn.utils.fixes', 'loguniform')
+preprocessing = lazy_import('sklearn.preprocessing')
+DecisionTreeClassifier = lazy_from('sklearn.tree', 'DecisionTreeClassifier')
+GridSearchCV = lazy_from('sklearn.model_selection', 'GridSearchCV')
+RandomForestClassifier = lazy_from('sklearn.ensemble', 'RandomForestClassifier')
+GradientBoostingClassifier = lazy_from('sklearn.ensemble', 'GradientBoostingClassifier')
+AdaBoostClassifier = lazy_from('sklearn.ensemble', 'AdaBoostClassifier')
+VotingClassifier = lazy_from('sklearn.ensemble', 'VotingClassifier')
+GaussianNB = lazy_from('sklearn.naive_bayes', 'GaussianNB')
+MultinomialNB = lazy_from('sklearn.naive_bayes', 'MultinomialNB')
+MLPClassifier = lazy_from('sklearn.neural_network', 'MLPClassifier')
+BernoulliRBM = lazy_from('sklearn.neural_network', 'BernoulliRBM')
+KNeighborsClassifier = lazy_from('sklearn.neighbors', 'KNeighborsClassifier')
+LogisticRegression = lazy_from('sklearn.linear_model', 'LogisticRegression')
+SGDClassifier = lazy_from('sklearn.linear_model', 'SGDClassifier')
+LinearSVC = lazy_from('sklearn.svm', 'LinearSVC')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+QuadraticDiscriminantAnalysis = lazy_from('sklearn.discriminant_analysis', 'QuadraticDiscriminantAnalysis')
+LinearDiscriminantAnalysis = lazy_from('sklearn.discriminant_analysis', 'LinearDiscriminantAnalysis')
+LocallyLinearEmbedding = lazy_from('sklearn.manifold', 'LocallyLinearEmbedding')
+
+make_scorer = lazy_from('sklearn.metrics', 'make_scorer')
+accuracy_score = lazy_from('sklearn.metrics', 'accuracy_score')
+precision_score = lazy_from('sklearn.metrics', 'precision_score')
+recall_score = lazy_from('sklearn.metrics', 'recall_score')
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+cross_validate = lazy_from('sklearn.model_selection', 'cross_validate')
 
 import random
+import time
 
 from prettytable import PrettyTable
 
@@ -172,6 +189,48 @@ class PCA(IStrategy):
 
     num_pairs = 0
     pair_model_info = {}  # holds model-related info for each pair
+
+    # cache of trained models (on disk), so that runs over the same data do not have to re-train
+    use_model_cache = True
+    model_cache_size_mb = 500.0  # max total size of cached models
+    model_cache_age_days = 30.0  # cached models older than this are removed
+    model_cache: ModelCache = None
+
+    # store of calculated indicators (on disk), used in backtest/hyperopt/plot modes. Indicators are shared by all
+    # variants that use the same indicator code, so comparing variants only calculates them once per pair
+    use_feature_store = True
+    feature_store_size_mb = 2000.0  # max total size of stored indicators
+    feature_store_age_days = 7.0  # stored indicators older than this are removed
+    feature_store: FeatureStore = None
+
+    # incremental training: between full refits, just fold the new candles into the PCA (IncrementalPCA) and the
+    # classifiers, which must support partial_fit (e.g. SGD, GaussianNB, MLP with the sgd or adam solver)
+    incremental_training = False
+    incremental_classifier = 'GaussianNB'  # classifier used in incremental mode (unless scanning classifiers)
+    full_refit_interval = 24  # number of incremental updates between full refits
+    drift_threshold = 1.0  # full refit if new data is further than this (mean z-score) from the data seen so far
+
+    # compact features: train on a single float32 array (normalised & clipped in place) rather than float64 copies
+    # of the dataframe. Uses much less memory per pair, results differ only by float32 rounding
+    compact_features = False
+
+    # retrain scheduling. In live/dry-run modes, at most retrain_max_pairs pairs are retrained per bot loop, and no more
+    # once retrain_max_seconds have been spent training in that loop (0 means no limit)
+    # Pairs without a model are always trained, so the first loop after startup trains every pair (and takes as long
+    # as it did before scheduling was added). The budget applies to the retrains after that
+    retrain_max_pairs = 1
+    retrain_max_seconds = 0.0
+    retrain_scheduler: RetrainScheduler = None
+
+    # walk-forward backtesting (backtest/hyperopt/plot only). Rather than training once on the whole timerange (which
+    # includes the candles being predicted), retrain every walk_forward_step candles on the previous
+    # walk_forward_train_size candles and only predict the candles that follow (as would happen in live mode)
+    # Fitted models for each window are stored in the model cache, so re-runs over the same data are fast
+    walk_forward = False
+    walk_forward_train_size = 975
+    walk_forward_step = 144
+    walk_forward_workers = 4  # windows are trained in parallel, using this many processes
+
     classifier_stats = {}  # holds statistics for each type of classifier (useful to rank classifiers
 
     # debug flags
@@ -179,6 +238,8 @@ class PCA(IStrategy):
     first_run = True  # used to identify first time through entry/exit populate funcs
 
     dbg_scan_classifiers = False  # if True, scan all viable classifiers and choose the best. Very slow!
+    scan_max_workers = 4  # max number of processes used to scan classifiers (1 means scan in this process)
+    scan_timeout = 300.0  # max time (seconds) allowed to fit & score each classifier in a scan (0 means no limit)
     dbg_test_classifier = True  # test clasifiers after fitting
     dbg_analyse_pca = False  # analyze PCA weights
     dbg_verbose = False  # controls debug output
@@ -301,7 +362,6 @@ class PCA(IStrategy):
 
         self.set_state(curr_pair, self.State.POPULATE)
         self.curr_lookahead = int(12 * self.lookahead_hours)
-        self.dbg_curr_df = dataframe
 
         # reset profit/loss thresholds
         self.profit_threshold = self.default_profit_threshold
@@ -324,7 +384,6 @@ class PCA(IStrategy):
         # if first time through for this pair, add entry to pair_model_info
         if not (curr_pair in self.pair_model_info):
             self.pair_model_info[curr_pair] = {
-                'interval': 0,
                 'pca_size': 0,
                 'pca': None,
                 'clf_entry_name': "",
@@ -332,34 +391,51 @@ class PCA(IStrategy):
                 'clf_exit_name': "",
                 'clf_exit': None
             }
-        else:
-            # decrement interval. When this reaches 0 it will trigger re-fitting of the data
-            self.pair_model_info[curr_pair]['interval'] = self.pair_model_info[curr_pair]['interval'] - 1
 
         # populate the normal dataframe
-        dataframe = self.add_indicators(dataframe)
+        dataframe = self.get_indicators(curr_pair, dataframe)
 
-        entries, exits = self.create_training_data(dataframe)
+        # debug indicators are added to this frame (which is a new one if the indicators came from the feature store)
+        self.dbg_curr_df = dataframe
 
-        # drop last group (because there cannot be a prediction)
-        df = dataframe.iloc[:-self.curr_lookahead]
-        entries = entries.iloc[:-self.curr_lookahead]
-        exits = exits.iloc[:-self.curr_lookahead]
+        # profit/loss thresholds for this pair (labels generated below recalculate them, from the same data)
+        self.set_gain_thresholds(dataframe)
 
         # Principal Component Analysis of inf data
 
-        # train the models on the informative data
-        if self.dbg_verbose:
-            print("    training models...")
-        self.train_models(curr_pair, df, entries, exits)
-        # add predictions
+        if self.walk_forward and (self.dp.runmode.value in ('hyperopt', 'backtest', 'plot')):
+            # out of sample predictions, from models trained on rolling windows
+            pred_entries, pred_exits = self.walk_forward_predictions(curr_pair, dataframe)
 
-        if self.dbg_verbose:
-            print("    running predictions...")
+        else:
+            # train the models on the informative data
+            # The training labels are only generated (or fetched from the cache) if the models will actually be trained
+            if self.training_due(curr_pair, dataframe):
+                start = time.perf_counter()
+                entries, exits = self.get_training_labels(curr_pair, dataframe)
+
+                # drop last group (because there cannot be a prediction)
+                df = dataframe.iloc[:-self.curr_lookahead]
+                entries = entries.iloc[:-self.curr_lookahead]
+                exits = exits.iloc[:-self.curr_lookahead]
+
+                if self.dbg_verbose:
+                    print("    training models...")
+                self.train_models(curr_pair, df, entries, exits)
+
+                info = self.pair_model_info[curr_pair]
+                success = (info['clf_entry'] is not None) and (info['clf_exit'] is not None)
+                self.get_retrain_scheduler().trained(curr_pair, success, time.perf_counter() - start)
+
+            # add predictions
+
+            if self.dbg_verbose:
+                print("    running predictions...")
+
+            # get predictions (Note: do not modify dataframe between calls)
+            pred_entries = self.predict_entry(dataframe, curr_pair)
+            pred_exits = self.predict_exit(dataframe, curr_pair)
 
-        # get predictions (Note: do not modify dataframe between calls)
-        pred_entries = self.predict_entry(dataframe, curr_pair)
-        pred_exits = self.predict_exit(dataframe, curr_pair)
         dataframe['predict_entry'] = pred_entries
         dataframe['predict_exit'] = pred_exits
 
@@ -724,18 +800,13 @@ class PCA(IStrategy):
 
         return dataframe
 
-    # calculate future gains. Used for setting targets
-    def add_future_data(self, dataframe: DataFrame) -> DataFrame:
+    # adds the future gain (%) over the lookahead period to future_df, measured on the 'full' DWT of the close (or on the
+    # close itself), split into future_profit & future_loss. Returns the name of the price column used
+    def add_future_gain(self, future_df: DataFrame) -> str:
 
         # yes, we lookahead in the data!
         lookahead = self.curr_lookahead
 
-        win_size = max(lookahead, 14)
-
-        # make a copy of the dataframe so that we do not put any forward looking data into the main dataframe
-        # Also, use a different name to avoid cut & paste errors
-        future_df = dataframe.copy()
-
         # we can either use the actual closing price, or the DWT model (smoother)
 
         use_dwt = True
@@ -743,7 +814,7 @@ class PCA(IStrategy):
             price_col = 'full_dwt'
 
             # get the 'full' DWT transform. This models the entire dataframe, so cannot be used in the 'main' dataframe
-            future_df['full_dwt'] = self.get_dwt(dataframe['close'])
+            future_df['full_dwt'] = self.get_dwt(future_df['close'])
 
         else:
             price_col = 'close'
@@ -758,6 +829,31 @@ class PCA(IStrategy):
         future_df['future_profit'] = future_df['future_gain'].clip(lower=0.0)
         future_df['future_loss'] = future_df['future_gain'].clip(upper=0.0)
 
+        return price_col
+
+    # sets the profit/loss thresholds for the pair being populated, from the future gains in dataframe
+    # The thresholds are used by the training labels and by some variants' entry/exit conditions, so they are set on
+    # every call (not just when labels are generated, which may only happen when the models are trained)
+    def set_gain_thresholds(self, dataframe: DataFrame):
+        future_df = dataframe[['close']].copy()
+        self.add_future_gain(future_df)
+        self.update_gain_thresholds(future_df)
+
+    # calculate future gains. Used for setting targets
+    def add_future_data(self, dataframe: DataFrame) -> DataFrame:
+
+        # yes, we lookahead in the data!
+        lookahead = self.curr_lookahead
+
+        win_size = max(lookahead, 14)
+
+        # make a copy of the dataframe so that we do not put any forward looking data into the main dataframe
+        # Also, use a different name to avoid cut & paste errors
+        future_df = dataframe.copy()
+
+        # calculate future gains
+        price_col = self.add_future_gain(future_df)
+
         # get rolling mean & stddev so that we have a localised estimate of (recent) future activity
         # Note: window in past because we already looked forward
         future_df['profit_mean'] = future_df['future_profit'].rolling(win_size).mean()
@@ -799,7 +895,7 @@ class PCA(IStrategy):
         future_df['dwt_dir_dn'] = np.where(dataframe['dwt'].diff() < 0, 1, 0)
 
         # build forward-looking sum of up/down trends
-        future_win = pd.api.indexers.FixedForwardWindowIndexer(window_size=int(win_size))  # don't use a big window
+        future_win = int(win_size)  # forward-looking window. Don't use a big window
 
         # future_df['future_nseq'] = future_df['curr_trend'].rolling(window=future_win, min_periods=1).sum()
 
@@ -812,8 +908,9 @@ class PCA(IStrategy):
         # future_df['future_nseq_up'] = future_df['future_nseq'].clip(lower=0.0)
         future_df['future_nseq_up'] = future_df['dwt_nseq_up'].shift(-win_size)
 
-        future_df['future_nseq_up_mean'] = future_df['future_nseq_up'].rolling(window=future_win).mean()
-        future_df['future_nseq_up_std'] = future_df['future_nseq_up'].rolling(window=future_win).std()
+        nseq_up_stats = DataframeUtils.forward_rolling(future_df['future_nseq_up'], future_win, stats=('mean', 'std'))
+        future_df['future_nseq_up_mean'] = nseq_up_stats['mean']
+        future_df['future_nseq_up_std'] = nseq_up_stats['std']
         future_df['future_nseq_up_thresh'] = future_df['future_nseq_up_mean'] + self.n_profit_stddevs * future_df[
             'future_nseq_up_std']
 
@@ -826,16 +923,18 @@ class PCA(IStrategy):
         # future_df['future_nseq_dn'] = future_df['future_nseq'].clip(upper=0.0)
         future_df['future_nseq_dn'] = future_df['dwt_nseq_dn'].shift(-win_size)
 
-        future_df['future_nseq_dn_mean'] = future_df['future_nseq_dn'].rolling(future_win).mean()
-        future_df['future_nseq_dn_std'] = future_df['future_nseq_dn'].rolling(future_win).std()
+        nseq_dn_stats = DataframeUtils.forward_rolling(future_df['future_nseq_dn'], future_win, stats=('mean', 'std'))
+        future_df['future_nseq_dn_mean'] = nseq_dn_stats['mean']
+        future_df['future_nseq_dn_std'] = nseq_dn_stats['std']
         future_df['future_nseq_dn_thresh'] = future_df['future_nseq_dn_mean'] \
                                              - self.n_loss_stddevs * future_df['future_nseq_dn_std']
 
         # Recent min/max
         # future_df['future_min'] = future_df[price_col].rolling(window=future_win).min()
         # future_df['future_max'] = future_df[price_col].rolling(window=future_win).max()
-        future_df['future_min'] = future_df['dwt'].rolling(window=future_win).min()
-        future_df['future_max'] = future_df['dwt'].rolling(window=future_win).max()
+        minmax_stats = DataframeUtils.forward_rolling(future_df['dwt'], future_win, stats=('min', 'max'))
+        future_df['future_min'] = minmax_stats['min']
+        future_df['future_max'] = minmax_stats['max']
 
         future_df['future_maxmin'] = 100.0 * (future_df['future_max'] - future_df['future_min']) / \
                                   future_df['future_max']
@@ -846,7 +945,11 @@ class PCA(IStrategy):
 
         future_df['future_maxmin'] = future_df['future_maxmin'].clip(lower=0.0, upper=10.0)
 
-        # get average gain & stddev
+        return future_df
+
+    # sets the profit/loss thresholds from the average gain & stddev in future_df (see add_future_data())
+    # Called whenever future data is used, whether it was just calculated or came from the feature store
+    def update_gain_thresholds(self, future_df: DataFrame):
         profit_mean = future_df['future_profit'].mean()
         profit_std = future_df['future_profit'].std()
         loss_mean = future_df['future_loss'].mean()
@@ -865,15 +968,130 @@ class PCA(IStrategy):
                 print("    Loss threshold {:.4f} -> {:.4f}".format(self.loss_threshold, newval))
             self.loss_threshold = newval
 
+    ################################
+
+    # returns the scheduler that decides when each pair is (re-)trained
+    def get_retrain_scheduler(self) -> RetrainScheduler:
+        if self.retrain_scheduler is None:
+            # backtest/hyperopt/plot populate each pair once, so no budget is applied and the schedule is reproducible
+            live = self.dp.runmode.value not in ('hyperopt', 'backtest', 'plot')
+            self.retrain_scheduler = RetrainScheduler(min_interval=2, max_interval=max(32, self.curr_lookahead),
+                                                      max_pairs_per_loop=self.retrain_max_pairs if live else 0,
+                                                      max_seconds_per_loop=self.retrain_max_seconds if live else 0.0,
+                                                      deterministic=not live)
+        return self.retrain_scheduler
+
+    # returns True if the models for the pair should be (re-)trained on this call (one call per pair per candle)
+    def training_due(self, curr_pair, dataframe: DataFrame) -> bool:
+        info = self.pair_model_info[curr_pair]
+        has_model = (info['clf_entry'] is not None) and (info['clf_exit'] is not None)
+        return self.get_retrain_scheduler().is_due(curr_pair, dataframe['date'].iloc[-1], has_model=has_model)
+
+    # number of candles that the training labels look ahead. The future_nseq_* columns are shifted forward by win_size
+    # and then rolled forward over another win_size, so this is 2 * win_size (see add_future_data())
+    def get_label_horizon(self) -> int:
+        return 2 * max(self.curr_lookahead, 14)
+
+    # returns entry/exit predictions for the dataframe, using a model trained on the preceding candles for each window
+    # (see WalkForward.py). The labels for each window are generated from the candles before it only (not taken from
+    # the label cache or feature store, which hold labels for the whole dataframe)
+    # The models for each window are stored in pair_model_info under a temporary key (pair@date), which also makes the
+    # model cache entries unique to the pair and window
+    def walk_forward_predictions(self, curr_pair, dataframe: DataFrame):
+
+        def get_labels(df):
+            return self.create_training_data(df, partial=True)
+
+        def fit_predict(window, df_train, train_entries, train_exits, df_predict):
+            key = "{}@{}".format(curr_pair, dataframe['date'].iloc[window[0]])
+            self.pair_model_info[key] = {
+                'pca_size': 0,
+                'pca': None,
+                'clf_entry_name': "",
+                'clf_entry': None,
+                'clf_exit_name': "",
+                'clf_exit': None
+            }
+            try:
+                self.train_models(key, df_train, train_entries, train_exits)
+                return self.predict_entry(df_predict, key), self.predict_exit(df_predict, key)
+            finally:
+                del self.pair_model_info[key]
+                DataframeUtils.scaler_registry.remove(key, self.__class__.__name__)
+
+        # generating labels changes the gain thresholds, so restore them afterwards
+        thresholds = (self.profit_threshold, self.loss_threshold)
+        walker = WalkForward(train_size=self.walk_forward_train_size, step=self.walk_forward_step,
+                             horizon=self.get_label_horizon(), max_workers=self.walk_forward_workers)
+        try:
+            return walker.run(dataframe, get_labels, fit_predict)
+        finally:
+            self.profit_threshold, self.loss_threshold = thresholds
+
+    def get_feature_store(self) -> FeatureStore:
+        # shared by all instances, stored in the 'models/features' subdirectory of this file's location
+        if PCA.feature_store is None:
+            store_dir = Path(__file__).parent / "models" / "features"
+            PCA.feature_store = FeatureStore(store_dir, max_size_mb=self.feature_store_size_mb,
+                                             max_age_days=self.feature_store_age_days)
+        return PCA.feature_store
+
+    # feature store key, covering the code and settings used to calculate the indicators (and future data)
+    def get_feature_key(self, name, curr_pair, dataframe: DataFrame) -> str:
+        store = self.get_feature_store()
+        code = store.code_hash(self.add_indicators, self.add_hidden_indicators, self.add_future_data,
+                               self.add_future_gain,
+                               self.get_dwt, self.roll_get_dwt, self.roll_smooth, self.norm_column, cta)
+        # named after the class that defines the indicators, since they are shared by all of its variants
+        base = type(self).add_indicators.__qualname__.split('.')[0]
+        return store.feature_key(base + "_" + name, curr_pair, self.timeframe, dataframe, code,
+                                 self.curr_lookahead, self.dwt_window, self.startup_candle_count,
+                                 self.n_profit_stddevs, self.n_loss_stddevs, self.dp.runmode.value)
+
+    def use_stored_features(self) -> bool:
+        return self.use_feature_store and (self.dp.runmode.value in ('hyperopt', 'backtest', 'plot'))
+
+    # returns the dataframe with indicators added (from the feature store, if they have already been calculated)
+    def get_indicators(self, curr_pair, dataframe: DataFrame) -> DataFrame:
+        if not self.use_stored_features():
+            return self.add_indicators(dataframe)
+        key = self.get_feature_key("indicators", curr_pair, dataframe)
+        return self.get_feature_store().get(key, dataframe, self.add_indicators)
+
+    # returns the dataframe with the hidden indicators and future data (used to create labels) added, and sets the
+    # profit/loss thresholds from it
+    # If partial is True (part of the dataframe, as used by walk-forward), the feature store is not used
+    def get_future_data(self, dataframe: DataFrame, partial=False) -> DataFrame:
+        def build(df):
+            return self.add_future_data(self.add_hidden_indicators(df.copy()))
+
+        if partial or not self.use_stored_features():
+            future_df = build(dataframe)
+        else:
+            key = self.get_feature_key("future", self.curr_pair, dataframe)
+            future_df = self.get_feature_store().get(key, dataframe, build)
+
+        self.update_gain_thresholds(future_df)
         return future_df
 
-    ################################
+    # returns the entry/exit labels for the dataframe. Labels are cached (per pair), keyed by the data and the
+    # settings that affect them, so they are only generated once for any given set of candles
+    def get_training_labels(self, curr_pair, dataframe: DataFrame):
+        key = DataframeUtils.label_key(dataframe, self.__class__.__name__, self.lookahead_hours,
+                                       self.n_profit_stddevs, self.n_loss_stddevs)
+        labels, cached = DataframeUtils.get_cached_labels(curr_pair, key,
+                                                           lambda: self.create_training_data(dataframe),
+                                                           debug_df=self.dbg_curr_df)
+        if cached and self.dbg_verbose:
+            print("    using cached training labels")
+        return labels
 
     # creates the entry/exit labels absed on looking ahead into the supplied dataframe
-    def create_training_data(self, dataframe: DataFrame):
+    # If partial is True (part of the dataframe, as used by walk-forward), the feature store is not used and no debug
+    # indicators are added
+    def create_training_data(self, dataframe: DataFrame, partial=False):
 
-        future_df = self.add_hidden_indicators(dataframe.copy())
-        future_df = self.add_future_data(future_df)
+        future_df = self.get_future_data(dataframe, partial=partial)
 
         future_df['train_entry'] = 0.0
         future_df['train_exit'] = 0.0
@@ -890,8 +1108,9 @@ class PCA(IStrategy):
         if entries.sum() < 3:
             print("OOPS! <3 ({:.0f}) exit signals generated. Check training criteria".format(exits.sum()))
 
-        self.save_debug_data(future_df)
-        self.save_debug_indicators(future_df)
+        if not partial:
+            self.save_debug_data(future_df)
+            self.save_debug_indicators(future_df)
 
         return entries, exits
 
@@ -1058,13 +1277,23 @@ class PCA(IStrategy):
     def remove_debug_columns(self, dataframe: DataFrame) -> DataFrame:
         drop_list = dataframe.filter(regex='^%').columns
         if len(drop_list) > 0:
-            for col in drop_list:
-                dataframe = dataframe.drop(col, axis=1)
-            dataframe.reindex()
+            dataframe = dataframe.drop(columns=drop_list)
         return dataframe
 
-    # Normalise a dataframe
-    def norm_dataframe(self, dataframe: DataFrame) -> DataFrame:
+    # Normalise a dataframe. Uses the supplied scaler, otherwise fits a new one and stores it in the scaler registry
+    # for pair (see train_models()). Optionally clips to +/- clip
+    def norm_dataframe(self, dataframe: DataFrame, scaler=None, clip=None, pair="") -> DataFrame:
+        tag = self.__class__.__name__
+
+        if self.compact_features:
+            features = DataframeUtils.FeatureMatrix.from_dataframe(dataframe)
+            if scaler is None:
+                scaler = self.get_scaler()
+                scaler.fit(features.values)
+                DataframeUtils.scaler_registry.set(scaler, pair, tag)
+            DataframeUtils.transform_features(features, scaler, clip=clip)
+            return features.to_dataframe()
+
         self.check_inf(dataframe)
 
         df = dataframe.copy()
@@ -1086,9 +1315,15 @@ class PCA(IStrategy):
         df.reindex()
 
         cols = df.columns
-        self.scaler = self.get_scaler()
+        if scaler is None:
+            scaler = self.get_scaler()
+            df = pd.DataFrame(scaler.fit_transform(df), columns=cols)
+            DataframeUtils.scaler_registry.set(scaler, pair, tag)
+        else:
+            df = pd.DataFrame(scaler.transform(df), columns=cols)
 
-        df = pd.DataFrame(self.scaler.fit_transform(df), columns=cols)
+        if clip is not None:
+            df = df.clip(lower=-clip, upper=clip)
 
         return df
 
@@ -1116,112 +1351,22 @@ class PCA(IStrategy):
 
     # remove outliers from normalised dataframe
     def remove_outliers(self, df_norm: DataFrame, entries, exits):
-
-        # for col in df_norm.columns.values:
-        #     if col != 'date':
-        #         df_norm = df_norm[(df_norm[col] <= 3.0)]
-        # return df_norm
-        df = df_norm.copy()
-        df['%temp_entry'] = entries.copy()
-        df['%temp_exit'] = exits.copy()
-        #
-        df2 = df[((df >= -3.0) & (df <= 3.0)).all(axis=1)]
-        # df_out = df[~((df >= -3.0) & (df <= 3.0)).all(axis=1)] # for debug
-        ndrop = df_norm.shape[0] - df2.shape[0]
+        index = Sampling.inlier_index(df_norm, limit=3.0)
+        ndrop = df_norm.shape[0] - len(index)
         if ndrop > 0:
-            b = df2['%temp_entry'].copy()
-            s = df2['%temp_exit'].copy()
-            df2.drop('%temp_entry', axis=1, inplace=True)
-            df2.drop('%temp_exit', axis=1, inplace=True)
-            df2.reindex()
-            # if self.dbg_verbose:
             print("    Removed ", ndrop, " outliers")
-            # print(" df2:", df2)
-            # print(" df_out:", df_out)
-            # print ("df_norm:", df_norm.shape, "df2:", df2.shape, "df_out:", df_out.shape)
+            return Sampling.take(df_norm, index), Sampling.take(entries, index), Sampling.take(exits, index)
         else:
             # no outliers, just return originals
-            df2 = df_norm
-            b = entries
-            s = exits
-        return df2, b, s
+            return df_norm, entries, exits
 
     # build a 'viable' dataframe sample set. Needed because the positive labels are sparse
+    # Selects (shuffled) row indices, then gathers the data & labels once
     def build_viable_dataset(self, size: int, df_norm: DataFrame, entries, exits):
-        # if self.dbg_verbose:
-        #     print("     df_norm:{} size:{} entries:{} exits:{}".format(df_norm.shape, size, entries.shape[0], exits.shape[0]))
-
-        # copy and combine the data into one dataframe
-        df = df_norm.copy()
-        df['%temp_entry'] = entries.copy()
-        df['%temp_exit'] = exits.copy()
-
-        # df_entry = df[( (df['%temp_entry'] > 0) ).all(axis=1)]
-        # df_exit = df[((df['%temp_exit'] > 0)).all(axis=1)]
-        # df_nosig = df[((df['%temp_entry'] == 0) & (df['%temp_exit'] == 0)).all(axis=1)]
-
-        df_entry = df.loc[df['%temp_entry'] == 1]
-        df_exit = df.loc[df['%temp_exit'] == 1]
-        df_nosig = df.loc[(df['%temp_entry'] == 0) & (df['%temp_exit'] == 0)]
-
-        # make sure there aren't too many entries & exits
-        # We are aiming for a roughly even split between entries, exits, and 'no signal' (no entry or exit)
-        max_signals = int(2 * size / 3)
-        entry_train_size = df_entry.shape[0]
-        exit_train_size = df_exit.shape[0]
-
-        if max_signals > df_nosig.shape[0]:
-            max_signals = int((size - df_nosig.shape[0])) - 1
-
-        if ((df_entry.shape[0] + df_exit.shape[0]) > max_signals):
-            # both exceed max?
-            sig_size = int(max_signals / 2)
-            # if self.dbg_verbose:
-            #     print("     sig_size:{} max_signals:{} entries:{} exits:{}".format(sig_size, max_signals, df_entry.shape[0],
-            #                                                                     df_exit.shape[0]))
-
-            if (df_entry.shape[0] > sig_size) & (df_exit.shape[0] > sig_size):
-                # resize both entry & exit to 1/3 of requested size
-                entry_train_size = sig_size
-                exit_train_size = sig_size
-            else:
-                # only one them is too big, so figure out which
-                if (df_entry.shape[0] > df_exit.shape[0]):
-                    entry_train_size = max_signals - df_exit.shape[0]
-                else:
-                    exit_train_size = max_signals - df_entry.shape[0]
-
-            # if self.dbg_verbose:
-            #     print("     entry_train_size:{} exit_train_size:{}".format(entry_train_size, exit_train_size))
-
-        if entry_train_size < df_entry.shape[0]:
-            df_entry, _ = train_test_split(df_entry, train_size=entry_train_size, shuffle=True)
-        if exit_train_size < df_exit.shape[0]:
-            df_exit, _ = train_test_split(df_exit, train_size=exit_train_size, shuffle=True)
-
-        # extract enough rows to fill the requested size
-        fill_size = size - entry_train_size - exit_train_size - 1
-        # if self.dbg_verbose:
-        #     print("     df_nosig:{} fill_size:{}".format(df_nosig.shape, fill_size))
-
-        if fill_size < df_nosig.shape[0]:
-            df_nosig, _ = train_test_split(df_nosig, train_size=fill_size, shuffle=True)
-
-        # print("viable df - entries:{} exits:{} fill:{}".format(df_entry.shape[0], df_exit.shape[0], df_nosig.shape[0]))
-
-        # concatenate the dataframes
-        frames = [df_entry, df_exit, df_nosig]
-        df2 = pd.concat(frames)
-
-        # shuffle rows
-        df2 = df2.sample(frac=1)
-
-        # separate out the data, entries & exits
-        b = df2['%temp_entry'].copy()
-        s = df2['%temp_exit'].copy()
-        df2.drop('%temp_entry', axis=1, inplace=True)
-        df2.drop('%temp_exit', axis=1, inplace=True)
-        df2.reindex()
+        index = Sampling.viable_index(size, entries, exits, shuffle=True)
+        df2 = Sampling.take(df_norm, index)
+        b = Sampling.take(entries, index)
+        s = Sampling.take(exits, index)
 
         if self.dbg_verbose:
             print("     df2:", df2.shape, " b:", b.shape, " s:", s.shape)
@@ -1238,17 +1383,23 @@ class PCA(IStrategy):
 
     # train the PCA reduction and classification models
 
+    # Note: when to (re-)train is decided by the retrain scheduler (see training_due())
     def train_models(self, curr_pair, dataframe: DataFrame, entries, exits):
 
-        # only run if interval reaches 0 (no point retraining every camdle)
-        count = self.pair_model_info[curr_pair]['interval']
-        if (count > 0):
-            self.pair_model_info[curr_pair]['interval'] = count - 1
+        # in incremental mode, just add the new data to the existing models (unless a full refit is needed)
+        if self.incremental_training and self.update_models(curr_pair, dataframe, entries, exits):
             return
-        else:
-            # reset interval to a random number between 1 and the amount of lookahead
-            # self.pair_model_info[curr_pair]['interval'] = random.randint(1, self.curr_lookahead)
-            self.pair_model_info[curr_pair]['interval'] = random.randint(2, max(32, self.curr_lookahead))
+
+        # use cached models if the same data & settings have already been used for training
+        cache_key = ""
+        if self.use_model_cache:
+            cache_key = self.get_model_cache_key(curr_pair, dataframe, entries, exits)
+            models = self.get_model_cache().load(cache_key)
+            if models is not None:
+                self.pair_model_info[curr_pair].update(models)
+                self.pair_model_info[curr_pair]['updates'] = 0
+                self.pair_model_info[curr_pair]['pending'] = None
+                return
 
         # Reset models for this pair. Makes it safe to just return on error
         self.pair_model_info[curr_pair]['pca_size'] = 0
@@ -1273,10 +1424,11 @@ class PCA(IStrategy):
         remove_outliers = False
         if remove_outliers:
             # norm dataframe before splitting, otherwise variances are skewed
-            full_df_norm = self.norm_dataframe(dataframe)
+            full_df_norm = self.norm_dataframe(dataframe, pair=curr_pair)
             full_df_norm, entries, exits = self.remove_outliers(full_df_norm, entries, exits)
         else:
-            full_df_norm = self.norm_dataframe(dataframe).clip(lower=-3.0, upper=3.0)  # supress outliers
+            full_df_norm = self.norm_dataframe(dataframe, clip=3.0, pair=curr_pair)  # supress outliers
+        scaler = DataframeUtils.scaler_registry.get(curr_pair, self.__class__.__name__)
 
         # constrain size to what will be available in run modes
         data_size = int(min(975, full_df_norm.shape[0]))
@@ -1313,6 +1465,8 @@ class PCA(IStrategy):
         # create the PCA analysis model
 
         pca = self.get_pca(df_train)
+        if self.incremental_training:
+            pca = self.get_incremental_pca(df_train, pca.n_components_)
 
         df_train_pca = DataFrame(pca.transform(df_train))
 
@@ -1353,6 +1507,14 @@ class PCA(IStrategy):
         self.pair_model_info[curr_pair]['clf_entry'] = entry_clf
         self.pair_model_info[curr_pair]['clf_exit_name'] = exit_clf_name
         self.pair_model_info[curr_pair]['clf_exit'] = exit_clf
+        self.pair_model_info[curr_pair]['scaler'] = scaler
+        self.pair_model_info[curr_pair]['last_date'] = dataframe['date'].iloc[-1] if ('date' in dataframe) else None
+        self.pair_model_info[curr_pair]['updates'] = 0
+        self.pair_model_info[curr_pair]['pending'] = None
+
+        if self.use_model_cache:
+            models = {k: self.pair_model_info[curr_pair][k] for k in self.cached_model_info}
+            self.get_model_cache().save(cache_key, models)
 
         # if scan specified, test against the test dataframe
         if self.dbg_test_classifier and self.dbg_verbose:
@@ -1372,6 +1534,88 @@ class PCA(IStrategy):
                 print(classification_report(test_exit_labels, pred_exits))
                 print("")
 
+    # entries in pair_model_info that are saved in the model cache
+    cached_model_info = ['pca_size', 'pca', 'clf_entry_name', 'clf_entry', 'clf_exit_name', 'clf_exit',
+                         'scaler', 'last_date']
+
+    def get_model_cache(self) -> ModelCache:
+        # shared by all instances, stored in the 'models/cache' subdirectory of this file's location
+        if PCA.model_cache is None:
+            cache_dir = Path(__file__).parent / "models" / "cache"
+            PCA.model_cache = ModelCache(cache_dir, max_size_mb=self.model_cache_size_mb,
+                                         max_age_days=self.model_cache_age_days)
+        return PCA.model_cache
+
+    # cache key covers the training data and labels, plus the settings used to generate labels & classifiers
+    # The code that builds & trains the models is hashed too, so that editing it does not load stale models
+    def get_model_cache_key(self, curr_pair, dataframe: DataFrame, entries, exits) -> str:
+        code = FeatureStore.code_hash(self.train_models, self.get_scaler, self.norm_dataframe, self.remove_outliers,
+                                      self.build_viable_dataset, self.get_pca, self.get_entry_classifier,
+                                      self.get_exit_classifier, self.find_best_classifier, self.classifier_factory)
+        return self.get_model_cache().key(self.__class__.__name__, curr_pair,
+                                          dataframe, entries, exits, code,
+                                          self.lookahead_hours, self.n_profit_stddevs, self.n_loss_stddevs,
+                                          self.default_classifier, self.dbg_scan_classifiers,
+                                          self.incremental_training, self.incremental_classifier,
+                                          self.compact_features, self.classifier_list, self.min_f1_score)
+
+    # incremental update of the models for a pair, using only the candles added since the last fit
+    # Returns False if a full refit is needed instead (no suitable models, scheduled refit or drift detected)
+    def update_models(self, curr_pair, dataframe: DataFrame, entries, exits) -> bool:
+        info = self.pair_model_info[curr_pair]
+        pca = info.get('pca', None)
+        clf_entry = info.get('clf_entry', None)
+        clf_exit = info.get('clf_exit', None)
+
+        if not isinstance(pca, skd.IncrementalPCA) or (info.get('scaler', None) is None) or \
+                (info.get('last_date', None) is None) or ('date' not in dataframe.columns):
+            return False
+
+        if not (hasattr(clf_entry, 'partial_fit') and hasattr(clf_exit, 'partial_fit')):
+            return False
+
+        if info['updates'] >= self.full_refit_interval:
+            print("    Scheduled full refit after {} incremental updates".format(info['updates']))
+            return False
+
+        new_rows = (dataframe['date'] > info['last_date']).to_numpy()
+        if not new_rows.any():
+            return True
+
+        df_norm = self.norm_dataframe(dataframe.loc[new_rows], scaler=info['scaler'], clip=3.0)
+
+        # check whether the new data still looks like the data that the models were trained on
+        drift = (np.abs(df_norm.mean().to_numpy() - pca.mean_) / np.sqrt(pca.var_ + 1e-12)).mean()
+        if drift > self.drift_threshold:
+            print("    Drift detected ({:.2f}), full refit".format(drift))
+            return False
+
+        # IncrementalPCA needs at least n_components samples per update, so hold on to the rows until there are enough
+        pending = df_norm if info['pending'] is None else pd.concat([info['pending'], df_norm])
+        if pending.shape[0] >= pca.n_components_:
+            pca.partial_fit(pending)
+            info['pending'] = None
+        else:
+            info['pending'] = pending
+
+        df_norm_pca = pca.transform(df_norm)
+        clf_entry.partial_fit(df_norm_pca, np.asarray(entries)[new_rows].astype(int))
+        clf_exit.partial_fit(df_norm_pca, np.asarray(exits)[new_rows].astype(int))
+
+        info['last_date'] = dataframe['date'].iloc[-1]
+        info['updates'] = info['updates'] + 1
+
+        print("    Incremental update: {} new candles ({} updates since full refit)".format(new_rows.sum(),
+                                                                                        info['updates']))
+        return True
+
+    # returns an IncrementalPCA model (with the same settings as get_pca()), so that new data can be added later
+    def get_incremental_pca(self, df_norm: DataFrame, ncols: int):
+        # a single partial_fit() of all the data gives the same result as a (full) PCA
+        pca = skd.IncrementalPCA(n_components=ncols, whiten=True)
+        pca.partial_fit(df_norm)
+        return pca
+
     autoencoder = None
 
     # get the PCA model for the supplied dataframe (dataframe must be normalised)
@@ -1579,7 +1823,8 @@ class PCA(IStrategy):
                     print("    Finding best entry classifier:")
                 clf, name = self.find_best_classifier(df_norm, labels, tag="entry")
             else:
-                clf, name = self.classifier_factory(self.default_classifier, df_norm, labels)
+                clf_type = self.incremental_classifier if self.incremental_training else self.default_classifier
+                clf, name = self.classifier_factory(clf_type, df_norm, labels)
                 clf = clf.fit(df_norm, labels)
 
         return clf, name
@@ -1608,7 +1853,8 @@ class PCA(IStrategy):
                     print("    Finding best exit classifier:")
                 clf, name = self.find_best_classifier(df_norm, labels, tag="exit")
             else:
-                clf, name = self.classifier_factory(self.default_classifier, df_norm, labels)
+                clf_type = self.incremental_classifier if self.incremental_training else self.default_classifier
+                clf, name = self.classifier_factory(clf_type, df_norm, labels)
                 clf = clf.fit(df_norm, labels)
 
         return clf, name
@@ -1729,39 +1975,39 @@ class PCA(IStrategy):
             print("    Insufficient +ve (test) results: ", res_test.sum())
             return None, ""
 
+        # create the classifiers here, then fit & score them in parallel
+        classifiers = {}
         for cname in self.classifier_list:
             clf, _ = self.classifier_factory(cname, df_train, res_train)
-
             if clf is not None:
+                classifiers[cname] = clf
 
-                # fit to the training data
-                clf_dict[cname] = clf
-                clf = clf.fit(df_train, res_train)
+        scores = ClassifierScan.scan_classifiers(classifiers, df_train, res_train, df_test, res_test,
+                                                 max_workers=self.scan_max_workers, timeout=self.scan_timeout)
 
-                # assess using the test data. Do *not* use the training data for testing
-                pred_test = clf.predict(df_test)
-                # score = f1_score(results, prediction, average=None)[1]
-                score = f1_score(res_test, pred_test, average='macro')
+        # process in list order, so that the result does not depend on which classifier finished first
+        for cname, (clf, score, elapsed) in scores.items():
+            clf_dict[cname] = clf
 
-                if self.dbg_verbose:
-                    print("      {0:<20}: {1:.3f}".format(cname, score))
+            if self.dbg_verbose:
+                print("      {0:<20}: {1:.3f} ({2:.1f}s)".format(cname, score, elapsed))
 
-                if score > best_score:
-                    best_score = score
-                    best_classifier = cname
+            if score > best_score:
+                best_score = score
+                best_classifier = cname
 
-                # update classifier stats
-                if tag:
-                    if not (tag in self.classifier_stats):
-                        self.classifier_stats[tag] = {}
+            # update classifier stats
+            if tag:
+                if not (tag in self.classifier_stats):
+                    self.classifier_stats[tag] = {}
 
-                    if not (cname in self.classifier_stats[tag]):
-                        self.classifier_stats[tag][cname] = {'count': 0, 'score': 0.0, 'selected': 0}
+                if not (cname in self.classifier_stats[tag]):
+                    self.classifier_stats[tag][cname] = {'count': 0, 'score': 0.0, 'selected': 0}
 
-                    curr_count = self.classifier_stats[tag][cname]['count']
-                    curr_score = self.classifier_stats[tag][cname]['score']
-                    self.classifier_stats[tag][cname]['count'] = curr_count + 1
-                    self.classifier_stats[tag][cname]['score'] = (curr_score * curr_count + score) / (curr_count + 1)
+                curr_count = self.classifier_stats[tag][cname]['count']
+                curr_score = self.classifier_stats[tag][cname]['score']
+                self.classifier_stats[tag][cname]['count'] = curr_count + 1
+                self.classifier_stats[tag][cname]['score'] = (curr_score * curr_count + score) / (curr_count + 1)
 
         if best_score <= 0.0:
             print("   No classifier found")
@@ -1797,7 +2043,9 @@ class PCA(IStrategy):
 
         if clf:
             # print("    predicting... - dataframe:", dataframe.shape)
-            df_norm = self.norm_dataframe(dataframe)
+            # use the scaler fitted when training (stored, and cached, with the other models for the pair)
+            df_norm = self.norm_dataframe(dataframe, scaler=self.pair_model_info[pair].get('scaler', None),
+                                          pair=pair)
             df_norm_pca = pca.transform(df_norm)
             predict = clf.predict(df_norm_pca)
 
@@ -1812,7 +2060,6 @@ class PCA(IStrategy):
 
         if clf is None:
             print("    No entry Classifier for pair ", pair, " -Skipping predictions")
-            self.pair_model_info[pair]['interval'] = min(self.pair_model_info[pair]['interval'], 4)
             predict = df['close'].copy()  # just to get the size
             predict = 0.0
             return predict
@@ -1844,7 +2091,6 @@ class PCA(IStrategy):
         clf = self.pair_model_info[pair]['clf_exit']
         if clf is None:
             print("    No exit Classifier for pair ", pair, " -Skipping predictions")
-            self.pair_model_info[pair]['interval'] = min(self.pair_model_info[pair]['interval'], 4)
             predict = df['close']  # just to get the size
             predict = 0.0
             return predict
@@ -32,6 +32,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from
+
 import logging
 import warnings
 
@@ -42,35 +44,39 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 import custom_indicators as cta
 from finta import TA as fta
 
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
-from sklearn.metrics import classification_report
-from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.preprocessing import StandardScaler, RobustScaler
-import sklearn.decomposition as skd
-from sklearn.svm import SVC
-from sklearn.utils.fixes import loguniform
-from sklearn import preprocessing
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import GridSearchCV
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, AdaBoostClassifier, VotingClassifier
-from sklearn.naive_bayes import GaussianNB, MultinomialNB
-from sklearn.neural_network import MLPClassifier
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.linear_model import LogisticRegression, SGDClassifier
-from sklearn.svm import LinearSVC
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis, LinearDiscriminantAnalysis
-from sklearn.linear_model import LogisticRegression
-
-from sklearn.metrics import make_scorer
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.model_selection import cross_validate
+RandomizedSearchCV = lazy_from('sklearn.model_selection', 'RandomizedSearchCV')
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+classification_report = lazy_from('sklearn.metrics', 'classification_report')
+ConfusionMatrixDisplay = lazy_from('sklearn.metrics', 'ConfusionMatrixDisplay')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+skd = lazy_import('sklearn.decomposition')
+SVC = lazy_from('sklearn.svm', 'SVC')
+loguniform = lazy_from('sklearn.utils.fixes', 'loguniform')
+preprocessing = lazy_import('sklearn.preprocessing')
+DecisionTreeClassifier = lazy_from('sklearn.tree', 'DecisionTreeClassifier')
+GridSearchCV = lazy_from('sklearn.model_selection', 'GridSearchCV')
+RandomForestClassifier = lazy_from('sklearn.ensemble', 'RandomForestClassifier')
+GradientBoostingClassifier = lazy_from('sklearn.ensemble', 'GradientBoostingClassifier')
+AdaBoostClassifier = lazy_from('sklearn.ensemble', 'AdaBoostClassifier')
+VotingClassifier = lazy_from('sklearn.ensemble', 'VotingClassifier')
+GaussianNB = lazy_from('sklearn.naive_bayes', 'GaussianNB')
+MultinomialNB = lazy_from('sklearn.naive_bayes', 'MultinomialNB')
+MLPClassifier = lazy_from('sklearn.neural_network', 'MLPClassifier')
+KNeighborsClassifier = lazy_from('sklearn.neighbors', 'KNeighborsClassifier')
+LogisticRegression = lazy_from('sklearn.linear_model', 'LogisticRegression')
+SGDClassifier = lazy_from('sklearn.linear_model', 'SGDClassifier')
+LinearSVC = lazy_from('sklearn.svm', 'LinearSVC')
+LabelEncoder = lazy_from('sklearn.preprocessing', 'LabelEncoder')
+QuadraticDiscriminantAnalysis = lazy_from('sklearn.discriminant_analysis', 'QuadraticDiscriminantAnalysis')
+LinearDiscriminantAnalysis = lazy_from('sklearn.discriminant_analysis', 'LinearDiscriminantAnalysis')
+
+make_scorer = lazy_from('sklearn.metrics', 'make_scorer')
+accuracy_score = lazy_from('sklearn.metrics', 'accuracy_score')
+precision_score = lazy_from('sklearn.metrics', 'precision_score')
+recall_score = lazy_from('sklearn.metrics', 'recall_score')
+f1_score = lazy_from('sklearn.metrics', 'f1_score')
+cross_validate = lazy_from('sklearn.model_selection', 'cross_validate')
 
 import random
 
@@ -4,7 +4,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from statsmodels.discrete.discrete_model import Probit
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -30,6 +29,9 @@ import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
+
+from LazyImport import lazy_from
+Probit = lazy_from('statsmodels.discrete.discrete_model', 'Probit')
 sys.path.append(str(Path(__file__)))
 
 import logging
@@ -6,7 +6,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from sklearn.preprocessing import RobustScaler, MinMaxScaler, StandardScaler
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -34,6 +33,11 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+
 import logging
 import warnings
 
@@ -42,17 +46,21 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import DataframeUtils
+from InferenceEngine import InferenceEngine
+from RetrainScheduler import RetrainScheduler
 from finta import TA as fta
 
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 from tqdm import tqdm
-from tqdm.keras import TqdmCallback
+TqdmCallback = lazy_from('tqdm.keras', 'TqdmCallback')
 
 import random
-import Time2Vector
-import Transformer
-import Attention
+import time
+Time2Vector = lazy_import('Time2Vector')
+Transformer = lazy_import('Transformer')
+Attention = lazy_import('Attention')
 
 """
 ####################################################################################
@@ -160,6 +168,14 @@ class Predict_LSTM(IStrategy):
     batch_size = 512 # batch size for training
     predict_batch_size = 256
 
+    # in live/dry runs, keep the scaler and previous predictions until the model is reloaded, and only run predictions
+    # for new candles. If False, the scaler is refitted and all candles are predicted on every call
+    incremental_predictions = True
+
+    # in live/dry runs, at most retrain_max_pairs pairs reload their model weights in any one bot loop
+    retrain_max_pairs = 1
+    retrain_scheduler: RetrainScheduler = None
+
     # debug flags
     first_time = True  # mostly for debug
     first_run = True  # used to identify first time through buy/sell populate funcs
@@ -535,6 +551,15 @@ class Predict_LSTM(IStrategy):
 
     ################################
 
+    # returns the scheduler that decides when each pair reloads its model (only used in live/dry-run modes)
+    def get_retrain_scheduler(self) -> RetrainScheduler:
+        if self.retrain_scheduler is None:
+            live = self.dp.runmode.value not in ('hyperopt', 'backtest', 'plot')
+            self.retrain_scheduler = RetrainScheduler(min_interval=2, max_interval=max(12, self.curr_lookahead),
+                                                      max_pairs_per_loop=self.retrain_max_pairs if live else 0,
+                                                      deterministic=not live)
+        return self.retrain_scheduler
+
     def train_model(self, dataframe: DataFrame, pair) -> DataFrame:
 
 
@@ -543,12 +568,12 @@ class Predict_LSTM(IStrategy):
 
         # if first time through for this pair, add entry to pair_model_info
         if not (pair in self.pair_model_info):
-            self.pair_model_info[pair] = {'model': None, 'interval':0, 'score':0.0}
+            self.pair_model_info[pair] = {'model': None, 'score':0.0}
 
         if self.pair_model_info[pair]['model'] == None:
             print("    Creating model for: ", pair, " seq_len:", nfeatures)
             self.pair_model_info[pair]['model'] = self.get_model(nfeatures, self.seq_len)
-            self.pair_model_info[pair]['interval'] = 0
+            self.get_retrain_scheduler().reset(pair)
 
 
         model = self.pair_model_info[pair]['model']
@@ -556,18 +581,16 @@ class Predict_LSTM(IStrategy):
         # if in a run mode, then periodically load weights and just return
         if self.dp.runmode.value not in ('hyperopt', 'backtest', 'plot'):
 
-            # only run if interval reaches 0 (no point retraining every camdle)
-            count = self.pair_model_info[pair]['interval']
-            if (count > 0):
-                self.pair_model_info[pair]['interval'] = count - 1
-                print("Skipping re-train for {} candles".format(self.pair_model_info[pair]['interval']))
-
-            else:
-                # reset interval to a random number between 1 and the amount of lookahead
-                self.pair_model_info[pair]['interval'] = random.randint(2, max(12, self.curr_lookahead))
+            # only reload when the scheduler says so (no point reloading every candle)
+            scheduler = self.get_retrain_scheduler()
+            if scheduler.is_due(pair, dataframe['date'].iloc[-1]):
+                start = time.perf_counter()
 
                 # reload the existing weights, if present
                 self.pair_model_info[pair]['model'] = self.get_model_weights(model)
+                self.reset_predictions(pair)
+
+                scheduler.trained(pair, True, time.perf_counter() - start)
 
             # return without training
             return dataframe
@@ -737,6 +760,7 @@ class Predict_LSTM(IStrategy):
         # update the pair info
         self.pair_model_info[pair]['model'] = model
         self.pair_model_info[pair]['score'] = results[0]
+        self.reset_predictions(pair)
         if results[0] > self.max_train_loss:
             print("    WARNING: high loss: {:.3f}".format(results[0]))
 
@@ -774,36 +798,8 @@ class Predict_LSTM(IStrategy):
         # return MinMaxScaler()
 
     def df_to_tensor(self, data, seq_len):
-        # input format = [nrows, nfeatures] output = [nrows, seq_len, nfeatures]
-        nrows = np.shape(data)[0]
-        nfeatures = np.shape(data)[1]
-        tensor_arr = np.zeros((nrows, seq_len, nfeatures), dtype=float)
-        zero_row = np.zeros((nfeatures), dtype=float)
-        # tensor_arr = []
-
-        reverse = True
-
-        # fill the first part (0..seqlen rows), which are only sparsely populated
-        for row in range(seq_len):
-            for seq in range(seq_len):
-                if seq >= (seq_len - row - 1):
-                    tensor_arr[row][seq] = data[(row + seq) - seq_len + 1]
-                else:
-                    tensor_arr[row][seq] = zero_row
-            if reverse:
-                tensor_arr[row] = np.flipud(tensor_arr[row])
-
-        # fill the rest
-        # print("Data:{}, len:{}".format(np.shape(data), seq_len))
-        for row in range(seq_len, nrows):
-            tensor_arr[row] = data[(row - seq_len) + 1:row + 1]
-            if reverse:
-                tensor_arr[row] = np.flipud(tensor_arr[row])
-
-        # print("data: ", data)
-        # print("tensor: ", tensor_arr)
-        # print("data:{} tensor:{}".format(np.shape(data), np.shape(tensor_arr)))
-        return tensor_arr
+        # input format = [nrows, nfeatures], output = [nrows, seq_len, nfeatures] (float32)
+        return DataframeUtils.df_to_tensor(data, seq_len)
 
     def get_model(self, nfeatures: int, seq_len: int):
         model = keras.Sequential()
@@ -872,19 +868,26 @@ class Predict_LSTM(IStrategy):
 
     ################################
 
+    # clear the cached inference engine, scaler and predictions for the pair (call whenever the model changes)
+    def reset_predictions(self, pair):
+        self.pair_model_info[pair]['engine'] = None
+        self.pair_model_info[pair]['scaler'] = None
+        self.pair_model_info[pair]['predictions'] = None
+
+    # returns the inference engine for the current model, creating (and compiling) it if necessary
+    def get_inference_engine(self, nfeatures: int) -> InferenceEngine:
+        info = self.pair_model_info[self.curr_pair]
+        engine = info.get('engine', None)
+        if (engine is None) or not engine.matches(info['model'], self.seq_len, nfeatures):
+            engine = InferenceEngine(info['model'], self.seq_len, nfeatures, batch_size=self.predict_batch_size)
+            info['engine'] = engine
+        return engine
+
     # get predictions. Note that the input must already be in tensor format
     def get_predictions(self, df_chunk: np.array):
+        return self.get_inference_engine(np.shape(df_chunk)[2]).predict(df_chunk)
 
-        # get the model
-        model = self.pair_model_info[self.curr_pair]['model']
-
-        # run the prediction
-        preds_notrend = model.predict(df_chunk, verbose=0)
-        preds_notrend = np.array(preds_notrend[:, 0]).reshape(-1, 1)
-
-        return preds_notrend[:, 0]
-
-    # run prediction in batches over the entire history
+    # run prediction over the entire history (or just the new candles, in live modes)
     def batch_predictions(self, dataframe: DataFrame):
 
         # check that model exists
@@ -900,59 +903,50 @@ class Predict_LSTM(IStrategy):
             predictions = dataframe['close']
             return predictions
 
+        info = self.pair_model_info[self.curr_pair]
+        incremental = self.incremental_predictions and ('date' in dataframe.columns) and \
+                      (self.dp.runmode.value not in ('hyperopt', 'backtest', 'plot'))
+
         # scale/normalise
         df = self.convert_date(dataframe)
         # tgt_col = df.columns.get_loc("close")
         tgt_col = df.columns.get_loc("smooth")
-        scaler = self.get_scaler()
 
-        scaler = scaler.fit(df)
+        scaler = info.get('scaler', None) if incremental else None
+        if scaler is None:
+            scaler = self.get_scaler().fit(df)
+            info['scaler'] = scaler
+            info['predictions'] = None
         df_norm = scaler.transform(df)
 
-        # df_norm3 = np.reshape(df_chunk, (np.shape(df_chunk)[0], self.seq_len, np.shape(df_chunk)[1]))
+        # re-use previous predictions, if available
+        nrows = dataframe.shape[0]
+        predictions = np.full(nrows, np.nan)
+        prev_preds = info.get('predictions', None) if incremental else None
+        if prev_preds is not None:
+            predictions[:] = prev_preds.reindex(pd.Index(dataframe['date'])).to_numpy()
+        new_rows = np.flatnonzero(np.isnan(predictions))
 
-        # convert dataframe to tensor
-        df_tensor = self.df_to_tensor(df_norm, self.seq_len)
-
-        # prediction does not work well when run over a large dataset, so divide into chunks and predict for each one
-        # then concatenate the results and return
-        preds_notrend: np.array = []
-        batch_size = self.predict_batch_size
-        nruns = int(dataframe.shape[0] / batch_size)
-        for i in tqdm(range(nruns), desc="    Predicting…", ascii=True, ncols=75):
-            # for i in range(nruns):
-            start = i * batch_size
-            end = start + batch_size
-            # print("start:{} end:{}".format(start, end))
-            chunk = df_tensor[start:end]
-            # print(chunk)
-            preds = self.get_predictions(chunk)
-            # print(preds)
-            preds_notrend = np.concatenate((preds_notrend, preds))
-
-        # copy whatever is leftover
-        start = nruns * batch_size
-        end = dataframe.shape[0]
-        # print("start:{} end:{}".format(start, end))
-        if end > start:
-            chunk = df_tensor[start:end]
-            preds = self.get_predictions(chunk)
-            preds_notrend = np.concatenate((preds_notrend, preds))
+        # convert to tensor (a view, so no copy) and run the predictions (in chunks) for the new rows
+        df_tensor = DataframeUtils.sequence_view(df_norm, self.seq_len)
+        if len(new_rows) < nrows:
+            df_tensor = df_tensor[new_rows]
+        preds_notrend = self.get_predictions(df_tensor)
 
         # re-scale the predictions
-        # slight cheat - replace 'gain' column with predictions, then inverse scale
-        cl_col = df_norm[:, tgt_col]
-
-        df_norm[:, tgt_col] = preds_notrend
-        inv_y = scaler.inverse_transform(df_norm)
-        # print("preds_notrend:", preds_notrend.shape, " df_norm:", df_norm.shape, " inv_y:", inv_y.shape)
-        predictions = inv_y[:, tgt_col]
+        # slight cheat - replace target column with predictions, then inverse scale
+        new_norm = df_norm[new_rows]
+        new_norm[:, tgt_col] = preds_notrend
+        predictions[new_rows] = scaler.inverse_transform(new_norm)[:, tgt_col]
 
         if tgt_col == 'gain':
             # using gain rather than price, so add gain to current price
             predictions = (1.0 + predictions) * dataframe['close']
 
-        print("runs:{} predictions:{}".format(nruns, len(predictions)))
+        if incremental:
+            info['predictions'] = pd.Series(predictions, index=pd.Index(dataframe['date']))
+
+        print("    predictions:{} (new:{})".format(len(predictions), len(new_rows)))
         return predictions
 
     # returns (rolling) smoothed version of input column
@@ -6,7 +6,6 @@ from enum import Enum
 import pywt
 import talib.abstract as ta
 from scipy.ndimage import gaussian_filter1d
-from sklearn.preprocessing import RobustScaler, MinMaxScaler, StandardScaler
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import arrow
@@ -34,6 +33,11 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+from LazyImport import lazy_import, lazy_from
+RobustScaler = lazy_from('sklearn.preprocessing', 'RobustScaler')
+MinMaxScaler = lazy_from('sklearn.preprocessing', 'MinMaxScaler')
+StandardScaler = lazy_from('sklearn.preprocessing', 'StandardScaler')
+
 import logging
 import warnings
 
@@ -44,15 +48,15 @@ warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 import custom_indicators as cta
 from finta import TA as fta
 
-import keras
-from keras import layers
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
 from tqdm import tqdm
-from tqdm.keras import TqdmCallback
+TqdmCallback = lazy_from('tqdm.keras', 'TqdmCallback')
 
 import random
 
 from Predict_LSTM import Predict_LSTM
-from Transformer import TransformerEncoder
+TransformerEncoder = lazy_from('Transformer', 'TransformerEncoder')
 
 """
 ####################################################################################
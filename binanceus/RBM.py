@@ -1,5 +1,6 @@
-import tensorflow as tf
 import numpy as np
+from LazyImport import lazy_import
+tf = lazy_import('tensorflow')
 
 # Restricted Boltzmann Machine
 
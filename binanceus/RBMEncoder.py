@@ -2,7 +2,8 @@
 import numpy as np
 from pandas import DataFrame, Series
 import pandas as pd
-from sklearn.neural_network import BernoulliRBM
+from LazyImport import lazy_import, lazy_from, setup_tensorflow
+BernoulliRBM = lazy_from('sklearn.neural_network', 'BernoulliRBM')
 
 import random
 import os
@@ -10,17 +11,14 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 
-import tensorflow as tf
+tf = lazy_import('tensorflow', on_load=setup_tensorflow)
 
 seed = 42
 os.environ['PYTHONHASHSEED'] = str(seed)
 random.seed(seed)
-tf.random.set_seed(seed)
 np.random.seed(seed)
 
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.WARN)
-
-import keras
+keras = lazy_import('keras')
 
 
 
@@ -0,0 +1,152 @@
+# Schedules the (re-)training of models for each pair, for the PCA and Predict_* strategies
+#
+# freqtrade calls populate_indicators() once per pair in each bot loop (new candle). Previously each pair picked a
+# random retrain interval, so several pairs would often retrain in the same loop (and stall order handling). This
+# scheduler spreads the work out:
+#   - each pair counts down a per-pair interval (once per loop), then becomes 'due'
+#   - only max_pairs_per_loop pairs are trained in any one loop, and no more once max_seconds_per_loop have been spent
+#     on training (0 means no limit, which is what backtests use since every pair is only populated once)
+#   - pairs that do not have a model yet are always trained when due (they can't produce any signals otherwise), so
+#     the first loop after startup trains every pair, however the budget is set
+#   - due pairs are served in the order they became due (round-robin), so a pair can't be starved by others
+#   - pairs whose training fails back off exponentially (min_interval * 2^failures, up to max_backoff loops), rather
+#     than retrying every few candles
+#
+# In deterministic mode, each pair's intervals come from a random generator seeded from the pair name, so the
+# schedule is the same on every run (whatever order the pairs are processed in)
+
+import random
+import zlib
+from collections import OrderedDict
+
+
+class RetrainScheduler:
+
+    def __init__(self, min_interval=2, max_interval=32, max_pairs_per_loop=0, max_seconds_per_loop=0.0,
+                 max_backoff=256, deterministic=False, seed=27):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.max_pairs_per_loop = max_pairs_per_loop
+        self.max_seconds_per_loop = max_seconds_per_loop
+        self.max_backoff = max_backoff
+        self.deterministic = deterministic
+        self.seed = seed
+
+        self.pairs = {}  # pair: state (see get_state())
+        self.waiting = OrderedDict()  # pairs that are due, in the order they became due
+
+        self.loop_key = None  # identifies the current loop (e.g. date of the latest candle)
+        self.loop_count = 0
+        self.loop_pairs = 0  # number of pairs trained in this loop
+        self.loop_seconds = 0.0  # time spent training in this loop
+
+        # metrics
+        self.num_trained = 0
+        self.num_failed = 0
+        self.num_deferred = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def get_state(self, pair) -> dict:
+        if pair not in self.pairs:
+            if self.deterministic:
+                rng = random.Random(self.seed ^ zlib.crc32(pair.encode()))
+            else:
+                rng = random.Random()
+            # new pairs are due straight away
+            self.pairs[pair] = {'countdown': 0, 'failures': 0, 'last_loop': self.loop_count, 'rng': rng,
+                                'has_model': False}
+        return self.pairs[pair]
+
+    def start_loop(self, loop_key):
+        if loop_key != self.loop_key:
+            self.loop_key = loop_key
+            self.loop_count += 1
+            self.loop_pairs = 0
+            self.loop_seconds = 0.0
+
+    # returns True if pair should be trained now. loop_key identifies the bot loop (anything that changes once per
+    # loop, such as the date of the latest candle), and is used to count down intervals and apply the per-loop budget
+    # Calling this more than once for a pair in the same loop does not count down again
+    # has_model says whether the pair currently has a usable model. If not supplied, a pair is assumed to have one once
+    # it has been trained successfully. Pairs without a model are not subject to the per-loop budget
+    def is_due(self, pair, loop_key, has_model=None) -> bool:
+        self.start_loop(loop_key)
+        state = self.get_state(pair)
+
+        if state['last_loop'] != self.loop_count:
+            state['last_loop'] = self.loop_count
+            if state['countdown'] > 0:
+                state['countdown'] = state['countdown'] - 1
+
+        if state['countdown'] > 0:
+            return False
+
+        if pair not in self.waiting:
+            self.waiting[pair] = self.loop_count
+
+        if has_model is None:
+            has_model = state['has_model']
+
+        if has_model and not self.budget_available(pair):
+            self.num_deferred += 1
+            print("    Retrain deferred for {} ({} pair(s) waiting)".format(pair, len(self.waiting)))
+            return False
+
+        del self.waiting[pair]
+        self.loop_pairs += 1
+        return True
+
+    # checks the per-loop budget. Pairs that have been waiting longer (and are still active) get first claim on the
+    # remaining slots, even if they have not been populated yet in this loop
+    def budget_available(self, pair) -> bool:
+        if (self.max_seconds_per_loop > 0) and (self.loop_seconds >= self.max_seconds_per_loop):
+            return False
+
+        if self.max_pairs_per_loop <= 0:
+            return True
+
+        ahead = 0
+        for waiting_pair in self.waiting:
+            if waiting_pair == pair:
+                break
+            # ignore pairs that have not been seen recently (e.g. removed from the whitelist)
+            if self.pairs[waiting_pair]['last_loop'] >= (self.loop_count - 1):
+                ahead += 1
+
+        return (self.loop_pairs + ahead) < self.max_pairs_per_loop
+
+    # records the outcome of training pair (which took elapsed seconds), and sets the interval until the next retrain
+    def trained(self, pair, success: bool, elapsed=0.0):
+        state = self.get_state(pair)
+
+        self.loop_seconds += elapsed
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+        if success:
+            self.num_trained += 1
+            state['failures'] = 0
+            state['has_model'] = True
+            state['countdown'] = state['rng'].randint(self.min_interval, self.max_interval)
+        else:
+            self.num_failed += 1
+            state['failures'] = state['failures'] + 1
+            state['countdown'] = min(self.min_interval * (2 ** state['failures']), self.max_backoff)
+            print("    Training failed for {} ({} in a row), retry in {} candles".format(pair, state['failures'],
+                                                                                     state['countdown']))
+
+    # forces a retrain of pair the next time it is checked
+    def reset(self, pair):
+        self.get_state(pair)['countdown'] = 0
+
+    def stats(self) -> dict:
+        count = self.num_trained + self.num_failed
+        return {
+            'trained': self.num_trained,
+            'failed': self.num_failed,
+            'deferred': self.num_deferred,
+            'waiting': len(self.waiting),
+            'mean_seconds': (self.total_seconds / count) if count > 0 else 0.0,
+            'max_seconds': self.max_seconds
+        }
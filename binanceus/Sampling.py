@@ -0,0 +1,109 @@
+# Sampling of training data, using row indices rather than copies of the data
+# Used to build 'viable' (class balanced) training sets and to remove outliers, for the ML strategies
+#
+# Everything here works on integer index arrays over the (normalised) features and the label vectors, so the data is
+# only gathered once, at the end (see take()). The data can be a DataFrame, Series, numpy array or FeatureMatrix
+
+import numpy as np
+import pandas as pd
+
+from LazyImport import lazy_from
+train_test_split = lazy_from('sklearn.model_selection', 'train_test_split')
+
+
+# gathers the rows in index from data (one copy). Labels are gathered the same way, so they stay aligned
+def take(data, index):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.iloc[index]
+    elif hasattr(data, 'take') and not isinstance(data, np.ndarray):
+        return data.take(index)  # FeatureMatrix
+    else:
+        return np.asarray(data)[index]
+
+
+# returns the indices of the entry (buy), exit (sell) and 'no signal' rows
+# A row that is both an entry and an exit appears in both entry and exit indices
+def signal_index(entries, exits):
+    entries = np.asarray(entries)
+    exits = np.asarray(exits)
+    entry_idx = np.flatnonzero(entries == 1)
+    exit_idx = np.flatnonzero(exits == 1)
+    nosig_idx = np.flatnonzero((entries == 0) & (exits == 0))
+    return entry_idx, exit_idx, nosig_idx
+
+
+# returns (up to) size entries from index. Same selection as train_test_split() on the data itself
+def subsample(index, size: int, shuffle=True, random_state=None):
+    if size >= len(index):
+        return index
+    if size <= 0:
+        return index[:0]
+    sample, _ = train_test_split(index, train_size=size, shuffle=shuffle, random_state=random_state)
+    return sample
+
+
+# returns the number of entries, exits and 'no signal' rows to use for a viable dataset of the requested size
+# We are aiming for a roughly even split between entries, exits, and 'no signal' (no entry or exit)
+def viable_sizes(size: int, num_entries: int, num_exits: int, num_nosig: int):
+    max_signals = int(2 * size / 3)
+    entry_size = num_entries
+    exit_size = num_exits
+
+    if max_signals > num_nosig:
+        max_signals = int((size - num_nosig)) - 1
+
+    if (num_entries + num_exits) > max_signals:
+        sig_size = int(max_signals / 2)
+        if (num_entries > sig_size) & (num_exits > sig_size):
+            # resize both entry & exit to 1/3 of requested size
+            entry_size = sig_size
+            exit_size = sig_size
+        else:
+            # only one them is too big, so figure out which
+            if num_entries > num_exits:
+                entry_size = max_signals - num_exits
+            else:
+                exit_size = max_signals - num_entries
+
+    # enough rows to fill the requested size
+    fill_size = size - entry_size - exit_size - 1
+
+    return entry_size, exit_size, fill_size
+
+
+# returns the row indices of a 'viable' dataset (includes all entries/exits, if possible). Needed because the
+# positive labels are sparse. Rows are ordered entries, exits, no signal, unless shuffle is True (in which case the
+# subsets are also chosen at random)
+def viable_index(size: int, entries, exits, shuffle=True, random_state=None):
+    entry_idx, exit_idx, nosig_idx = signal_index(entries, exits)
+    entry_size, exit_size, fill_size = viable_sizes(size, len(entry_idx), len(exit_idx), len(nosig_idx))
+
+    index = np.concatenate((subsample(entry_idx, entry_size, shuffle=shuffle, random_state=random_state),
+                            subsample(exit_idx, exit_size, shuffle=shuffle, random_state=random_state),
+                            subsample(nosig_idx, fill_size, shuffle=shuffle, random_state=random_state)))
+
+    if shuffle:
+        rng = np.random.RandomState(random_state) if random_state is not None else np.random
+        index = index[rng.permutation(len(index))]
+
+    return index
+
+
+# returns the row indices where all values are within +/- limit (NaNs count as outliers)
+# Checked one column at a time, so the only temporary is a boolean per row
+def inlier_index(data, limit=3.0):
+    if isinstance(data, pd.DataFrame):
+        columns = (data[col].to_numpy() for col in data.columns)
+        nrows = data.shape[0]
+    else:
+        values = np.asarray(data.values if hasattr(data, 'values') else data)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        columns = (values[:, i] for i in range(values.shape[1]))
+        nrows = values.shape[0]
+
+    mask = np.ones(nrows, dtype=bool)
+    for col in columns:
+        mask &= (col >= -limit) & (col <= limit)
+
+    return np.flatnonzero(mask)
@@ -1,8 +1,18 @@
 
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
 import numpy as np
 
+sys.path.append(str(Path(__file__).parent))
 
-def chunkify(data, seq_len):
+import DataframeUtils
+
+
+# original (loop based) version, used as the reference for DataframeUtils.df_to_tensor()
+def chunkify_loop(data, seq_len):
     # input format = [nrows, nfeatures] output = [nrows, seq_len, nfeatures]
     nrows = np.shape(data)[0]
     nfeatures = np.shape(data)[1]
@@ -33,9 +43,46 @@ def chunkify(data, seq_len):
 
     # print("data: ", data)
     # print("chunked: ", chunked_array)
+    return chunked_array
+
+def chunkify(data, seq_len):
+    chunked_array = DataframeUtils.df_to_tensor(data, seq_len)
     print("data:{} chunked:{}".format(np.shape(data), np.shape(chunked_array)))
     return chunked_array
 
+def check_parity():
+    rng = np.random.default_rng(0)
+    ok = True
+    for nrows, nfeatures, seq_len in ((12, 6, 4), (100, 1, 8), (500, 20, 32), (40, 3, 40)):
+        data = rng.normal(size=(nrows, nfeatures))
+        ref = chunkify_loop(data, seq_len)
+        view = DataframeUtils.sequence_view(data, seq_len, dtype=np.float64)
+        tensor = DataframeUtils.df_to_tensor(data, seq_len)
+        match = np.array_equal(ref, view) and np.allclose(ref, tensor, rtol=1e-6, atol=1e-6) and \
+                (tensor.dtype == np.float32) and tensor.flags['C_CONTIGUOUS']
+        print("    rows:{} features:{} seq_len:{} {}".format(nrows, nfeatures, seq_len, 'OK' if match else 'MISMATCH'))
+        ok = ok and match
+    return ok
+
+def measure(func):
+    # returns (time, peak memory) of func()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def benchmark(nrows=10000, nfeatures=100, seq_len=32):
+    data = np.random.default_rng(0).normal(size=(nrows, nfeatures))
+    print("    rows:{} features:{} seq_len:{}".format(nrows, nfeatures, seq_len))
+    for name, func in (('loop (float64)', lambda: chunkify_loop(data, seq_len)),
+                       ('sequence_view', lambda: DataframeUtils.sequence_view(data, seq_len)),
+                       ('df_to_tensor (float32)', lambda: DataframeUtils.df_to_tensor(data, seq_len))):
+        elapsed, peak = measure(func)
+        print("    {:24s} time:{:8.3f}s peak memory:{:8.1f}MB".format(name, elapsed, peak / (1024 * 1024)))
+
 def main():
 
     nrows = 12
@@ -74,5 +121,16 @@ def main():
         print(chunk2[i])
     print("")
 
+    print("Parity (vs loop version):")
+    ok = check_parity()
+    print("")
+
+    print("Benchmark:")
+    benchmark()
+    print("")
+
+    if not ok:
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,49 +1,59 @@
 import numpy as np
 import pandas as pd
 import os, datetime
-import tensorflow as tf
-from keras.models import *
-from keras.layers import *
-
-
-class Time2Vector(Layer):
-    def __init__(self, seq_len, **kwargs):
-        super(Time2Vector, self).__init__()
-        self.seq_len = seq_len
-
-    def build(self, input_shape):
-        '''Initialize weights and biases with shape (batch, seq_len)'''
-        self.weights_linear = self.add_weight(name='weight_linear',
-                                              shape=(int(self.seq_len),),
-                                              initializer='uniform',
-                                              trainable=True)
-
-        self.bias_linear = self.add_weight(name='bias_linear',
-                                           shape=(int(self.seq_len),),
-                                           initializer='uniform',
-                                           trainable=True)
-
-        self.weights_periodic = self.add_weight(name='weight_periodic',
-                                                shape=(int(self.seq_len),),
-                                                initializer='uniform',
-                                                trainable=True)
-
-        self.bias_periodic = self.add_weight(name='bias_periodic',
-                                             shape=(int(self.seq_len),),
-                                             initializer='uniform',
-                                             trainable=True)
-
-    def call(self, x):
-        '''Calculate linear and periodic time features'''
-        x = tf.math.reduce_mean(x[:, :, :4], axis=-1)
-        time_linear = self.weights_linear * x + self.bias_linear  # Linear time feature
-        time_linear = tf.expand_dims(time_linear, axis=-1)  # Add dimension (batch, seq_len, 1)
-
-        time_periodic = tf.math.sin(tf.multiply(x, self.weights_periodic) + self.bias_periodic)
-        time_periodic = tf.expand_dims(time_periodic, axis=-1)  # Add dimension (batch, seq_len, 1)
-        return tf.concat([time_linear, time_periodic], axis=-1)  # shape = (batch, seq_len, 2)
-
-    def get_config(self):  # Needed for saving and loading model with custom layer
-        config = super().get_config().copy()
-        config.update({'seq_len': self.seq_len})
-        return config
\ No newline at end of file
+
+from LazyImport import lazy_definitions
+
+
+# The keras layers are defined when one of them is first used (see LazyImport.lazy_definitions()), so that importing
+# this file (which freqtrade does for every file in the strategy directory) does not load tensorflow
+def define_layers() -> dict:
+    import tensorflow as tf
+    from keras.layers import Layer
+
+    class Time2Vector(Layer):
+        def __init__(self, seq_len, **kwargs):
+            super(Time2Vector, self).__init__()
+            self.seq_len = seq_len
+
+        def build(self, input_shape):
+            '''Initialize weights and biases with shape (batch, seq_len)'''
+            self.weights_linear = self.add_weight(name='weight_linear',
+                                                  shape=(int(self.seq_len),),
+                                                  initializer='uniform',
+                                                  trainable=True)
+
+            self.bias_linear = self.add_weight(name='bias_linear',
+                                               shape=(int(self.seq_len),),
+                                               initializer='uniform',
+                                               trainable=True)
+
+            self.weights_periodic = self.add_weight(name='weight_periodic',
+                                                    shape=(int(self.seq_len),),
+                                                    initializer='uniform',
+                                                    trainable=True)
+
+            self.bias_periodic = self.add_weight(name='bias_periodic',
+                                                 shape=(int(self.seq_len),),
+                                                 initializer='uniform',
+                                                 trainable=True)
+
+        def call(self, x):
+            '''Calculate linear and periodic time features'''
+            x = tf.math.reduce_mean(x[:, :, :4], axis=-1)
+            time_linear = self.weights_linear * x + self.bias_linear  # Linear time feature
+            time_linear = tf.expand_dims(time_linear, axis=-1)  # Add dimension (batch, seq_len, 1)
+
+            time_periodic = tf.math.sin(tf.multiply(x, self.weights_periodic) + self.bias_periodic)
+            time_periodic = tf.expand_dims(time_periodic, axis=-1)  # Add dimension (batch, seq_len, 1)
+            return tf.concat([time_linear, time_periodic], axis=-1)  # shape = (batch, seq_len, 2)
+
+        def get_config(self):  # Needed for saving and loading model with custom layer
+            config = super().get_config().copy()
+            config.update({'seq_len': self.seq_len})
+            return config
+
+    return {'Time2Vector': Time2Vector}
+
+
+__getattr__ = lazy_definitions(globals(), define_layers, ['Time2Vector'])
@@ -0,0 +1,143 @@
+# Walk-forward backtesting for the ML strategies
+#
+# In backtest mode, populate_indicators() is called once with the whole timerange, so a model trained there has seen
+# the 'future' that it is then asked to predict. Walk-forward emulates live re-training instead: the timerange is cut
+# into windows, and for each window a model is trained on the preceding train_size candles only, then used to predict
+# the next step candles (out of sample). The predictions for all windows are stitched together
+#
+# Indicators are calculated once (on the whole dataframe) and sliced for each window. Training labels are not: they are
+# built from whole-series calculations (DWT of the entire close, thresholds from the mean/std of future gains etc.),
+# so each window's labels are generated from the candles before the window only. Labels look up to horizon candles
+# into the future, so the training rows for a window also stop horizon candles before the window starts (their labels
+# would otherwise be incomplete)
+#
+# Windows are independent, so they can run in parallel. This uses forked worker processes (the strategy is inherited
+# by the workers, rather than pickled), so it is only available where fork is supported, and should not be used with
+# tensorflow/keras models (which are not fork safe). Otherwise, windows are run in this process
+# The workers are daemonic, so they can't start processes of their own: anything called by fit_predict() that would
+# (e.g. ClassifierScan.scan_classifiers()) has to run in the worker process instead
+
+import multiprocessing
+import time
+
+import numpy as np
+
+
+# the job being run by the worker processes (set before the workers are forked)
+_worker_job = None
+
+
+def _run_window(window):
+    return _worker_job.run_window(window)
+
+
+class WalkForward:
+
+    def __init__(self, train_size: int, step: int, horizon: int, context=0, max_workers=1):
+        self.train_size = train_size
+        self.step = max(1, step)
+        self.horizon = horizon  # number of candles that the labels look ahead
+        self.context = context  # rows before each window that the predictor needs (e.g. sequence length)
+        self.max_workers = max_workers
+
+        self.dataframe = None
+        self.get_labels = None
+        self.fit_predict = None
+
+    # returns the windows for a dataframe of nrows rows, as (start, end) row indices. The model for each window is
+    # trained on rows [start - horizon - train_size, start - horizon) and predicts rows [start, end)
+    def windows(self, nrows: int):
+        first = self.train_size + self.horizon
+        return [(start, min(start + self.step, nrows)) for start in range(first, nrows, self.step)]
+
+    # returns the (entry, exit) training labels for a window, generated from the rows before the window only
+    def window_labels(self, window):
+        start, _ = window
+        train_end = start - self.horizon
+        train_start = train_end - self.train_size
+        entries, exits = self.get_labels(self.dataframe.iloc[:start])
+        return entries.iloc[train_start:train_end], exits.iloc[train_start:train_end]
+
+    # trains and predicts one window. Returns (window, entry predictions, exit predictions, error message)
+    def run_window(self, window):
+        start, end = window
+        train_end = start - self.horizon
+        train_start = train_end - self.train_size
+        pred_start = max(0, start - self.context)
+
+        try:
+            train_entries, train_exits = self.window_labels(window)
+            pred_entries, pred_exits = self.fit_predict(window,
+                                                        self.dataframe.iloc[train_start:train_end],
+                                                        train_entries, train_exits,
+                                                        self.dataframe.iloc[pred_start:end])
+        except Exception as e:
+            return window, 0.0, 0.0, "{}: {}".format(type(e).__name__, e)
+
+        # only keep the predictions for the window itself (not the context rows)
+        keep = end - start
+        pred_entries = np.asarray(pred_entries, dtype=np.float64)
+        pred_exits = np.asarray(pred_exits, dtype=np.float64)
+        if pred_entries.ndim > 0:
+            pred_entries = pred_entries[-keep:]
+        if pred_exits.ndim > 0:
+            pred_exits = pred_exits[-keep:]
+        return window, pred_entries, pred_exits, ""
+
+    def run(self, dataframe, get_labels, fit_predict):
+        """
+        Runs the walk-forward over dataframe
+        get_labels(df) returns the (entry, exit) training labels for df (Series, same length as df). It is called for
+        each window, with the rows before that window
+        fit_predict(window, df_train, train_entries, train_exits, df_predict) trains a model and returns the
+        (entry, exit) predictions for df_predict (arrays, or scalars if there is no model)
+        Returns the (entry, exit) predictions for the whole dataframe. Rows before the first window are 0
+        """
+
+        self.dataframe = dataframe
+        self.get_labels = get_labels
+        self.fit_predict = fit_predict
+
+        nrows = dataframe.shape[0]
+        windows = self.windows(nrows)
+        pred_entries = np.zeros(nrows, dtype=np.float64)
+        pred_exits = np.zeros(nrows, dtype=np.float64)
+
+        if len(windows) == 0:
+            print("    Walk-forward: not enough data ({} rows, need more than {})".format(
+                nrows, self.train_size + self.horizon))
+            return pred_entries, pred_exits
+
+        nworkers = min(self.max_workers, len(windows))
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            nworkers = 1
+
+        print("    Walk-forward: {} windows of {} candles, trained on {} candles ({} workers)".format(
+            len(windows), self.step, self.train_size, nworkers))
+
+        start_time = time.perf_counter()
+        global _worker_job
+        try:
+            if nworkers <= 1:
+                results = [self.run_window(window) for window in windows]
+            else:
+                _worker_job = self
+                ctx = multiprocessing.get_context('fork')
+                with ctx.Pool(processes=nworkers) as pool:
+                    results = pool.map(_run_window, windows, chunksize=1)
+        finally:
+            _worker_job = None
+            self.dataframe = self.get_labels = self.fit_predict = None
+
+        nfailed = 0
+        for (start, end), window_entries, window_exits, error in results:
+            if error:
+                nfailed += 1
+                print("    Walk-forward: window {}-{} failed ({})".format(start, end, error))
+                continue
+            pred_entries[start:end] = window_entries
+            pred_exits[start:end] = window_exits
+
+        print("    Walk-forward: done in {:.1f}s ({} failed)".format(time.perf_counter() - start_time, nfailed))
+
+        return pred_entries, pred_exits
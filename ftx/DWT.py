@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 import pywt
 import scipy
@@ -80,6 +81,12 @@ class DWT(IStrategy):
 
     custom_trade_info = {}
 
+    # cached model results, so that only new candles are modelled in live/dry-run modes
+    model_cache = rm.ModelCache()
+
+    # if True, model all pairs in a single batch in bot_loop_start() (live/dry-run only)
+    batch_pairs = False
+
     ###################################
 
     # Strategy Specific Variable Storage
@@ -130,6 +137,23 @@ class DWT(IStrategy):
     
     ###################################
 
+    """
+    Batch Model Calculation
+    """
+
+    def bot_loop_start(self, **kwargs) -> None:
+        """
+        If batch_pairs is set, the model is calculated for all pairs in one pass at the start of each loop.
+        populate_indicators() then just picks up the cached results
+        """
+        if self.batch_pairs and self.dp.runmode.value in ('live', 'dry_run'):
+            pairs = self.dp.current_whitelist()
+            dataframes = {pair: self.dp.get_pair_dataframe(pair=pair, timeframe=self.inf_timeframe) for pair in pairs}
+            self.model_cache.update_all(dataframes, self.inf_timeframe, self.dwt_window, rm.dwt_last)
+        return
+
+    ###################################
+
     """
     Indicator Definitions
     """
@@ -143,7 +167,8 @@ class DWT(IStrategy):
 
         # DWT
 
-        informative['dwt_model'] = informative['close'].rolling(window=self.dwt_window).apply(self.model)
+        informative['dwt_model'] = self.model_cache.update(curr_pair, self.inf_timeframe, informative,
+                                                           self.dwt_window, rm.dwt_last)
         # informative['dwt_predict'] = informative['dwt_model'].rolling(window=self.dwt_window).apply(self.predict)
         # informative['stddev'] = informative['close'].rolling(window=self.dwt_window).std()
 
@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 from  pykalman import KalmanFilter
 
@@ -84,18 +85,7 @@ class Kalman(IStrategy):
     # Strategy Specific Variable Storage
 
     kf_window = startup_candle_count
-    filter_list = {}
-    filter_init_list = {}
-
-    kalman_filter = KalmanFilter(
-                transition_matrices=1.0,
-                observation_matrices=1.0,
-                initial_state_mean=0.0,
-                initial_state_covariance=1.0,
-                observation_covariance=0.1,
-                transition_covariance=0.1
-            )
-    current_pair = ""
+    filter_list = {}  # per-window model weights (see rm.kalman_weights()) of the fitted filter for each pair
 
 
     ## Hyperopt Variables
@@ -166,27 +156,12 @@ class Kalman(IStrategy):
 
         # Kalman Filter
 
-        # get filter for current pair
-
-        self.current_pair = curr_pair
-
-        # create if not already done
+        # fit filter for current pair, if not already done
         if not curr_pair in self.filter_list:
-            self.filter_list[curr_pair] = kalman_filter = KalmanFilter(
-                transition_matrices=1.0,
-                observation_matrices=1.0,
-                initial_state_mean=0.0,
-                initial_state_covariance=1.0,
-                observation_covariance=0.1,
-                transition_covariance=0.1
-            )
-            self.filter_init_list[curr_pair] = False
-
+            self.filter_list[curr_pair] = self.fit_filter(informative)
 
-        # set current filter (can't pass parameter to apply())
-        self.kalman_filter = self.filter_list[curr_pair]
-
-        informative['kf_predict'] = informative['close'].rolling(window=self.kf_window).apply(self.model)
+        informative['kf_predict'] = rm.rolling_apply(informative['close'], self.kf_window, rm.kalman_linear_last,
+                                                     params=self.filter_list[curr_pair])
 
         # merge into normal timeframe
         dataframe = merge_informative_pair(dataframe, informative, self.timeframe, self.inf_timeframe, ffill=True)
@@ -228,79 +203,30 @@ class Kalman(IStrategy):
 
     ###################################
 
-    def model(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        # init filter if needed
-        if not self.filter_init_list[self.current_pair]:
-            self.filter_init_list[self.current_pair] = True
-            self.filter_list[self.current_pair] = self.filter_list[self.current_pair].em(scaled, n_iter=6)
-
-        # get the Kalman model
-        restored_sig = self.kalmanModel(scaled, self.kalman_filter)
-
-        # re-trend
-        model = (restored_sig * w_std) + w_mean
-
-        length = len(model)
-        return model[length-1]
-    
-    def scaledModel(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        # get the Fourier model
-        model = self.kalmanModel(scaled, self.kalman_filter)
-
-        length = len(model)
-        return model[length-1]
-
-    def scaledData(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        length = len(scaled)
-        return scaled.ravel()[length-1]
-
-    def kalmanModel(self, data, kfilter: KalmanFilter):
-
-        n = len(data)
-        x = np.array(data)
-
-        # kfilter = kfilter.em(data, n_iter=6)
-
-        # mean, cov = kfilter.filter(x)
-        # kfilter.filter_update(mean[0], cov[0])
-        #
-        # mean = mean.squeeze()
-        # print("model(", len(mean), "): ", mean)
-
-        # predict next close
-        pr_mean, pr_cov = kfilter.smooth(x)
-        restored_sig = pr_mean.squeeze()
-        # print ("Predict(", len(restored_sig), "): ", restored_sig)
-
-
-        ldiff = len(restored_sig) - len(x)
-        model = restored_sig[ldiff:]
+    def fit_filter(self, informative: DataFrame) -> np.ndarray:
+        # fit the noise parameters (em) to the first full window of (scaled) data
+        kfilter = KalmanFilter(
+            transition_matrices=1.0,
+            observation_matrices=1.0,
+            initial_state_mean=0.0,
+            initial_state_covariance=1.0,
+            observation_covariance=0.1,
+            transition_covariance=0.1
+        )
 
-        return model
+        close = informative['close'].to_numpy(dtype=float)
+        w = rm.windows(close, self.kf_window) if len(close) >= self.kf_window else np.empty((0, self.kf_window))
+        w = w[~np.isnan(w).any(axis=1)]
+        if len(w) > 0:
+            scaled, _, _ = rm.detrend(w[:1], ddof=0, fillna=True)
+            kfilter = kfilter.em(scaled[0], n_iter=6)
+
+        # the gains are the same for every window, so pykalman is not needed after this
+        return rm.kalman_weights(self.kf_window,
+                                 float(np.squeeze(kfilter.transition_covariance)),
+                                 float(np.squeeze(kfilter.observation_covariance)),
+                                 float(np.squeeze(kfilter.initial_state_mean)),
+                                 float(np.squeeze(kfilter.initial_state_covariance)))
 
     # ###################################
     # 
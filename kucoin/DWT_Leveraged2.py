@@ -29,6 +29,7 @@ import re
 
 
 import custom_indicators as cta
+import rolling_models as rm
 
 import pywt
 
@@ -139,6 +140,14 @@ class DWT_Leveraged2(IStrategy):
     # Strategy Specific Variable Storage
     dwt_window = startup_candle_count
     custom_trade_info = {}
+    roi_curves = {}  # minimum ROI by trade duration, for each side (see populate_exit_state())
+
+    # cached model results, so that only new candles are modelled in live/dry-run modes
+    model_cache = rm.ModelCache()
+
+    # if True, model all pairs in a single batch in bot_loop_start() (live/dry-run only)
+    batch_pairs = False
+
     custom_fiat = "USDT"  # Only relevant if stake is BTC or ETH
 
     ############################################################################
@@ -154,6 +163,23 @@ class DWT_Leveraged2(IStrategy):
 
     ############################################################################
 
+    """
+    Batch Model Calculation
+    """
+
+    def bot_loop_start(self, **kwargs) -> None:
+        """
+        If batch_pairs is set, the model is calculated for all pairs in one pass at the start of each loop.
+        populate_indicators() then just picks up the cached results
+        """
+        if self.batch_pairs and self.dp.runmode.value in ('live', 'dry_run'):
+            pairs = [pair for pair in self.dp.current_whitelist() if self.isBull(pair) or self.isBear(pair)]
+            dataframes = {pair: self.dp.get_pair_dataframe(pair=pair, timeframe=self.inf_timeframe) for pair in pairs}
+            self.model_cache.update_all(dataframes, self.inf_timeframe, self.dwt_window, rm.dwt_last)
+        return
+
+    ############################################################################
+
     """
     Indicator Definitions
     """
@@ -171,7 +197,8 @@ class DWT_Leveraged2(IStrategy):
             if (self.isBull(curr_pair)) or (self.isBear(curr_pair)):
                 # DWT
 
-                informative['dwt_model'] = informative['close'].rolling(window=self.dwt_window).apply(self.model)
+                informative['dwt_model'] = self.model_cache.update(curr_pair, self.inf_timeframe, informative,
+                                                                   self.dwt_window, rm.dwt_last)
                 # informative['dwt_predict'] = informative['dwt_model'].rolling(window=self.dwt_window).apply(self.predict)
                 # informative['stddev'] = informative['close'].rolling(window=self.dwt_window).std()
 
@@ -376,6 +403,10 @@ class DWT_Leveraged2(IStrategy):
         long_conditions = []
         dataframe.loc[:, 'exit_tag'] = ''
 
+        # per-candle state used by custom_exit()
+        if self.isBull(metadata['pair']) or self.isBear(metadata['pair']):
+            dataframe = self.populate_exit_state(dataframe)
+
         # 'Bull'/long leveraged token
         if self.isBull(metadata['pair']):
 
@@ -461,7 +492,6 @@ class DWT_Leveraged2(IStrategy):
                         current_profit: float, **kwargs) -> float:
 
         dataframe, _ = self.dp.get_analyzed_dataframe(pair=pair, timeframe=self.timeframe)
-        last_candle = dataframe.iloc[-1].squeeze()
         trade_dur = int((current_time.timestamp() - trade.open_date_utc.timestamp()) // 60)
         in_trend = self.custom_trade_info[trade.pair]['had-trend']
 
@@ -473,7 +503,7 @@ class DWT_Leveraged2(IStrategy):
         if current_profit < self.cstop_loss_threshold.value:
             if self.cstop_bail_how.value == 'roc' or self.cstop_bail_how.value == 'any':
                 # Dynamic bailout based on rate of change
-                if last_candle['sroc'] <= self.cstop_bail_roc.value:
+                if dataframe['sroc'].iat[-1] <= self.cstop_bail_roc.value:
                     return 0.01
             if self.cstop_bail_how.value == 'time' or self.cstop_bail_how.value == 'any':
                 # Dynamic bailout based on time, unless time_trend is true and there is a potential reversal
@@ -490,39 +520,52 @@ class DWT_Leveraged2(IStrategy):
     Custom exit
     """
 
+    def populate_exit_state(self, dataframe: DataFrame) -> DataFrame:
+        # Pre-calculates the per-candle trend state and the ROI curves used by custom_exit(), so that the
+        # exit checks only have to look up values. Called from populate_exit_trend(), since the state depends
+        # on the exit (sell) parameters
+
+        dataframe['cexit-long-trend'] = self.exit_trend(dataframe, self.cexit_long_trend_type.value,
+                                                        'rmi-up-trend', 'up', 'candle-up-trend')
+        dataframe['cexit-short-trend'] = self.exit_trend(dataframe, self.cexit_short_trend_type.value,
+                                                         'rmi-up-trend', 'up', 'candle-up-trend')
+
+        # minimum ROI for each trade duration
+        self.roi_curves['long'] = cta.roi_curve(self.cexit_long_roi_type.value, self.cexit_long_roi_start.value,
+                                                self.cexit_long_roi_end.value, self.cexit_long_roi_time.value)
+        self.roi_curves['short'] = cta.roi_curve(self.cexit_short_roi_type.value, self.cexit_short_roi_start.value,
+                                                 self.cexit_short_roi_end.value, self.cexit_short_roi_time.value)
+
+        return dataframe
+
+    def exit_trend(self, dataframe: DataFrame, trend_type: str, rmi_trend: str, ssl_dir: str,
+                   candle_trend: str) -> np.ndarray:
+        in_trend = np.zeros(len(dataframe), dtype=bool)
+        if trend_type == 'rmi' or trend_type == 'any':
+            in_trend |= (dataframe[rmi_trend] == 1).to_numpy()
+        if trend_type == 'ssl' or trend_type == 'any':
+            in_trend |= (dataframe['ssl-dir'] == ssl_dir).to_numpy()
+        if trend_type == 'candle' or trend_type == 'any':
+            in_trend |= (dataframe[candle_trend] == 1).to_numpy()
+        return np.where(in_trend, 1, 0)
+
+    def min_roi(self, side: str, trade_dur: int) -> float:
+        roi_curve = self.roi_curves[side]
+        return roi_curve[min(trade_dur, len(roi_curve) - 1)]
+
     def custom_exit_long(self, pair: str, trade: 'Trade', current_time: 'datetime', current_rate: float,
                              current_profit: float, **kwargs):
 
         dataframe, _ = self.dp.get_analyzed_dataframe(pair=pair, timeframe=self.timeframe)
-        last_candle = dataframe.iloc[-1].squeeze()
-
         trade_dur = int((current_time.timestamp() - trade.open_date_utc.timestamp()) // 60)
         max_profit = max(0.0, trade.calc_profit_ratio(trade.max_rate))
         pullback_value = max(0.0, (max_profit - self.cexit_long_pullback_amount.value))
-        in_trend = False
-
-        # Determine our current ROI point based on the defined type
-        if self.cexit_long_roi_type.value == 'static':
-            min_roi = self.cexit_long_roi_start.value
-        elif self.cexit_long_roi_type.value == 'decay':
-            min_roi = cta.linear_decay(self.cexit_long_roi_start.value, self.cexit_long_roi_end.value, 0,
-                                       self.cexit_long_roi_time.value, trade_dur)
-        elif self.cexit_long_roi_type.value == 'step':
-            if trade_dur < self.cexit_long_roi_time.value:
-                min_roi = self.cexit_long_roi_start.value
-            else:
-                min_roi = self.cexit_long_roi_end.value
-
-        # Determine if there is a trend
-        if self.cexit_long_trend_type.value == 'rmi' or self.cexit_long_trend_type.value == 'any':
-            if last_candle['rmi-up-trend'] == 1:
-                in_trend = True
-        if self.cexit_long_trend_type.value == 'ssl' or self.cexit_long_trend_type.value == 'any':
-            if last_candle['ssl-dir'] == 'up':
-                in_trend = True
-        if self.cexit_long_trend_type.value == 'candle' or self.cexit_long_trend_type.value == 'any':
-            if last_candle['candle-up-trend'] == 1:
-                in_trend = True
+
+        # Determine our current ROI point (see populate_exit_state())
+        min_roi = self.min_roi('long', trade_dur)
+
+        # Determine if there is a trend (see populate_exit_state())
+        in_trend = bool(dataframe['cexit-long-trend'].iat[-1] == 1)
 
         # Don't exit if we are in a trend unless the pullback threshold is met
         if in_trend == True and current_profit > 0:
@@ -557,35 +600,15 @@ class DWT_Leveraged2(IStrategy):
                     current_profit: float, **kwargs):
 
         dataframe, _ = self.dp.get_analyzed_dataframe(pair=pair, timeframe=self.timeframe)
-        last_candle = dataframe.iloc[-1].squeeze()
-
         trade_dur = int((current_time.timestamp() - trade.open_date_utc.timestamp()) // 60)
         max_profit = max(0.0, trade.calc_profit_ratio(trade.max_rate))
         pullback_value = max(0.0, (max_profit - self.cexit_short_pullback_amount.value))
-        in_trend = False
-
-        # Determine our current ROI point based on the defined type
-        if self.cexit_short_roi_type.value == 'static':
-            min_roi = self.cexit_short_roi_start.value
-        elif self.cexit_short_roi_type.value == 'decay':
-            min_roi = cta.linear_decay(self.cexit_short_roi_start.value, self.cexit_short_roi_end.value, 0,
-                                       self.cexit_short_roi_time.value, trade_dur)
-        elif self.cexit_short_roi_type.value == 'step':
-            if trade_dur < self.cexit_short_roi_time.value:
-                min_roi = self.cexit_short_roi_start.value
-            else:
-                min_roi = self.cexit_short_roi_end.value
-
-        # Determine if there is a trend
-        if self.cexit_short_trend_type.value == 'rmi' or self.cexit_short_trend_type.value == 'any':
-            if last_candle['rmi-up-trend'] == 1:
-                in_trend = True
-        if self.cexit_short_trend_type.value == 'ssl' or self.cexit_short_trend_type.value == 'any':
-            if last_candle['ssl-dir'] == 'up':
-                in_trend = True
-        if self.cexit_short_trend_type.value == 'candle' or self.cexit_short_trend_type.value == 'any':
-            if last_candle['candle-up-trend'] == 1:
-                in_trend = True
+
+        # Determine our current ROI point (see populate_exit_state())
+        min_roi = self.min_roi('short', trade_dur)
+
+        # Determine if there is a trend (see populate_exit_state())
+        in_trend = bool(dataframe['cexit-short-trend'].iat[-1] == 1)
 
         # Don't exit if we are in a trend unless the pullback threshold is met
         if in_trend == True and current_profit > 0:
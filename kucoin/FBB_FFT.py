@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 import pywt
 
@@ -161,7 +162,7 @@ class FBB_FFT(IStrategy):
 
         # informative['fft_lookahead'] = informative['close'].rolling(window=self.fft_window).apply(self.predict)
 
-        informative['fft_dev'] = informative['close'].rolling(window=self.fft_window).apply(self.scaledModel)
+        informative['fft_dev'] = rm.rolling_apply(informative['close'], self.fft_window, rm.fft_scaled_last)
         informative['fft_dev'].fillna(0, inplace=True) # missing data can cause issue with ta functions
         informative['fft_slope'] = ta.LINEARREG_SLOPE(informative['fft_dev'], timeperiod=3)
 
@@ -174,7 +175,7 @@ class FBB_FFT(IStrategy):
         # dataframe['fft_lookahead'] = dataframe[f"fft_lookahead_{self.inf_timeframe}"]
         # dataframe['fft_lookahead_diff'] = (dataframe['fft_lookahead'] - dataframe['close']) / dataframe['close']
 
-        dataframe['scaled'] = dataframe['close'].rolling(window=self.fft_window).apply(self.scaledData)
+        dataframe['scaled'] = rm.rolling_apply(dataframe['close'], self.fft_window, rm.scaled_last)
 
         dataframe['fft_dev'] = dataframe[f"fft_dev_{self.inf_timeframe}"]
         dataframe['fft_slope'] = dataframe[f"fft_slope_{self.inf_timeframe}"]
@@ -33,10 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
-
-from  simdkalman import KalmanFilter
-import RollingStandardScaler
-import RollingKalmanSIMD
+import rolling_models as rm
 
 
 """
@@ -82,7 +79,6 @@ class FBB_KalmanSIMD(IStrategy):
     process_only_new_candles = True
 
     custom_trade_info = {}
-    filter_list = {}
 
     ###################################
 
@@ -94,9 +90,6 @@ class FBB_KalmanSIMD(IStrategy):
     kf_window = startup_candle_count
     kf_predict = 0
 
-    rolling_scaler = RollingStandardScaler.RollingStandardScaler(window=kf_window)
-    rolling_kf_inf = RollingKalmanSIMD.RollingKalmanSIMD(window=kf_window)
-
     ## Hyperopt Variables
 
     # FBB_ hyperparams
@@ -166,19 +159,8 @@ class FBB_KalmanSIMD(IStrategy):
 
         # Kalman Filter
 
-        # get filter for current pair
-
-        # create if not already done
-        if not curr_pair in self.filter_list:
-            self.filter_list[curr_pair]  = KalmanFilter(
-                state_transition=1.0,
-                process_noise=2.0,
-                observation_model=1.0,
-                observation_noise=0.5
-            )
-
-        self.rolling_kf_inf.fit(dataframe['close'])
-        informative['kf_dev'] = self.rolling_kf_inf.scaledModel(informative['close'], kfilter=self.filter_list[curr_pair])
+        # Kalman model of the scaled data, all windows smoothed in one batch (default filter parameters)
+        informative['kf_dev'] = rm.rolling_apply(informative['close'], self.kf_window, rm.kalman_scaled_last)
         informative['kf_slope'] = ta.LINEARREG_SLOPE(informative['kf_dev'], timeperiod=3)
 
         # merge into normal timeframe
@@ -186,7 +168,9 @@ class FBB_KalmanSIMD(IStrategy):
 
         # calculate predictive indicators in shorter timeframe (not informative)
 
-        dataframe['scaled'] = self.rolling_scaler.transform(dataframe['close'])
+        # rolling standardisation of close
+        dataframe['scaled'] = (dataframe['close'] - dataframe['close'].rolling(window=self.kf_window).mean()) / \
+                              dataframe['close'].rolling(window=self.kf_window).std()
         dataframe['kf_dev'] = dataframe[f"kf_dev_{self.inf_timeframe}"]
         dataframe['kf_slope'] = dataframe[f"kf_slope_{self.inf_timeframe}"]
         dataframe['kf_dev_diff'] =  (dataframe['kf_dev'] - dataframe['scaled'])
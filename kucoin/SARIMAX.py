@@ -33,6 +33,7 @@ log = logging.getLogger(__name__)
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
 
 import custom_indicators as cta
+import rolling_models as rm
 
 import statsmodels.api as sm
 
@@ -83,9 +84,12 @@ class SARIMAX(IStrategy):
     # Strategy Specific Variable Storage
 
     smax_window = startup_candle_count
-    filter_list = {}
-    filter_init_list = {}
-    current_pair = ""
+    filter_list = {}  # latest fitted model parameters for each pair (used as the starting point for the next fit)
+
+    # the model is only re-fitted every smax_refit_interval candles (or if a candle is more than smax_tolerance
+    # standard errors from the model forecast). Set smax_refit_interval to 1 to fit every window
+    smax_refit_interval = 8
+    smax_tolerance = 3.0
 
 
     ## Hyperopt Variables
@@ -145,15 +149,16 @@ class SARIMAX(IStrategy):
 
         # SARIMAX Filter
 
-        # get filter for current pair
-
-        self.current_pair = curr_pair
-
-        # create if not already done
-        if not curr_pair in self.filter_list:
-            self.filter_init_list[curr_pair] = False
+        # fit (or update) the model for the current pair
+        forecast, self.filter_list[curr_pair] = rm.sarimax_forecast(informative['close'], self.smax_window,
+                                                                     refit_interval=self.smax_refit_interval,
+                                                                     tolerance=self.smax_tolerance,
+                                                                     params=self.filter_list.get(curr_pair))
 
-        informative['smax_predict'] = informative['close'].rolling(window=self.smax_window).apply(self.model)
+        # re-trend, as in the original (per-window) model
+        w_mean = informative['close'].rolling(window=self.smax_window).mean()
+        w_std = informative['close'].rolling(window=self.smax_window).std(ddof=0)
+        informative['smax_predict'] = (forecast * w_std) + w_mean
 
         # merge into normal timeframe
         dataframe = merge_informative_pair(dataframe, informative, self.timeframe, self.inf_timeframe, ffill=True)
@@ -193,38 +198,6 @@ class SARIMAX(IStrategy):
 
         return dataframe
 
-    ###################################
-
-    def model(self, a: np.ndarray) -> np.float:
-
-        # scale the data
-        standardized = a.copy()
-        w_mean = np.mean(standardized)
-        w_std = np.std(standardized)
-        scaled = (standardized - w_mean) / w_std
-        scaled.fillna(0, inplace=True)
-
-        # create filter if needed
-        # if not self.filter_init_list[self.current_pair]:
-        #     self.filter_init_list[self.current_pair] = True
-        # fit an AR(2) model
-        s_model = sm.tsa.SARIMAX(a, order=(2, 0, 0), enforce_invertibility=False, enforce_stationarity=False)
-        # print("params: ", s_model.params_complete)
-
-        result = s_model.fit(disp=False)
-        # print(result.summary())
-        # print("retvals: ", result.mle_retvals)
-        # print("result: ", result)
-
-        # get the prediction
-        forecast = result.forecast(2)
-        predict = [column for column in forecast]
-        # print("predict: ", predict)
-
-        length = len(predict)
-        return (predict[length-1] * w_std) + w_mean
-
-
     # ###################################
     # 
     # # Williams %R
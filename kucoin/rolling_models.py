@@ -0,0 +1,525 @@
+"""
+Rolling Models - batch (vectorised) versions of the rolling models used by the DWT/FFT/Kalman strategies
+
+The strategies originally used something like:
+    informative['close'].rolling(window=N).apply(self.model)
+which calls the model from Python once per candle.
+The functions here build all of the windows at once as a zero-copy strided view of the data and run the model
+over the resulting 2-D array (one row per window). Output is aligned the same way as rolling().apply(),
+i.e. the first (window-1) entries are NaN
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
+from pandas import DataFrame
+
+import pywt
+from scipy.fft import rfft, irfft
+
+
+# max number of windows processed in one pass. Limits the size of the temporary arrays
+chunk_size = 4096
+
+
+"""
+Helper Functions
+"""
+
+def windows(data, window: int) -> np.ndarray:
+    """
+    Returns a read-only (n_windows, window) view of data. No data is copied
+    """
+    return sliding_window_view(np.asarray(data, dtype=float), window)
+
+def apply_chunks(w: np.ndarray, func, params: np.ndarray = None) -> np.ndarray:
+    """
+    Applies func to the (n, window) array w, in chunks of (at most) chunk_size windows.
+    func takes a (n, window) array and returns an array of n values, one per window (i.e. the last model value)
+    If params is supplied (one row of model parameters per window), it is passed to func as a second argument
+    Windows containing NaN give NaN, the same as rolling().apply()
+    """
+    result = np.empty(len(w))
+    for start in range(0, len(w), chunk_size):
+        end = min(start + chunk_size, len(w))
+        chunk = w[start:end]
+        values = func(chunk) if params is None else func(chunk, params[start:end])
+        result[start:end] = np.where(np.isnan(chunk).any(axis=1), np.nan, values)
+    return result
+
+def rolling_apply(data, window: int, func, params: tuple = None) -> np.ndarray:
+    """
+    Applies func to all windows of data. params (optional) are the model parameters, used for all windows
+    Returns an array the same length as data, with NaN in the first (window-1) entries
+    """
+    data = np.asarray(data, dtype=float)
+    result = np.full(len(data), np.nan)
+    if len(data) < window:
+        return result
+
+    views = windows(data, window)
+    if params is not None:
+        params = np.broadcast_to(np.asarray(params, dtype=float), (len(views), len(params)))
+    result[window - 1:] = apply_chunks(views, func, params)
+    return result
+
+def detrend(w: np.ndarray, ddof: int = 1, fillna: bool = False):
+    """
+    Standardises each row of w. Returns scaled data, mean and std
+    ddof=1 matches pandas (Series.std()), ddof=0 matches numpy (np.std()).
+    If fillna is set, NaN values in the scaled data are replaced by 0 (same as scaled.fillna(0))
+    """
+    w_mean = w.mean(axis=1, keepdims=True)
+    w_std = w.std(axis=1, ddof=ddof, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_notrend = (w - w_mean) / w_std
+    if fillna:
+        x_notrend = np.where(np.isnan(x_notrend), 0.0, x_notrend)
+    return x_notrend, w_mean, w_std
+
+
+"""
+DWT
+"""
+
+def dwt_rows(x: np.ndarray, wavelet='haar', wmode='smooth', level=1) -> np.ndarray:
+    """
+    Denoised reconstruction of each row of x. Same algorithm as the per-window dwtModel() in the DWT strategies:
+    full decomposition, hard threshold of all detail coefficients (threshold estimated from the mean absolute
+    deviation of the level 'level' coefficients), then inverse transform
+    """
+    length = x.shape[1]
+
+    coeff = pywt.wavedec(x, wavelet, mode=wmode, axis=-1)
+
+    # remove higher harmonics
+    detail = coeff[-level]
+    madev = np.mean(np.absolute(detail - detail.mean(axis=1, keepdims=True)), axis=1, keepdims=True)
+    sigma = (1 / 0.6745) * madev
+    uthresh = sigma * np.sqrt(2 * np.log(length))
+    coeff[1:] = (np.where(np.less(np.absolute(c), uthresh), 0, c) for c in coeff[1:])
+
+    # inverse transform
+    return pywt.waverec(coeff, wavelet, mode=wmode, axis=-1)
+
+def dwt_last(w: np.ndarray) -> np.ndarray:
+    """
+    DWT model (last value only) of each row of w
+    """
+    x_notrend, w_mean, w_std = detrend(w)
+    restored_sig = dwt_rows(x_notrend)
+    return (restored_sig[:, -1] * w_std[:, 0]) + w_mean[:, 0]
+
+def dwt_model(data, window: int) -> np.ndarray:
+    """
+    Equivalent to: data.rolling(window=window).apply(self.model) in the DWT strategies
+    """
+    return rolling_apply(data, window, dwt_last)
+
+
+"""
+FFT
+"""
+
+def fft_rows(x: np.ndarray, threshold: float = 20.0) -> np.ndarray:
+    """
+    Fourier model of each row of x. Same algorithm as the per-window fourierModel() in the FFT strategies: remove
+    all frequencies with a power spectrum density below threshold, then inverse transform.
+    The data is real, so this uses the real transforms (rfft/irfft), which only calculate the non-negative
+    frequencies. The negative frequencies have the same PSD, so the result is the same as taking the real part of
+    the full complex inverse transform
+    """
+    n = x.shape[1]
+    fft = rfft(x, n, axis=-1)
+
+    # compute power spectrum density (squared magnitude of each fft coefficient)
+    psd = (fft.real * fft.real + fft.imag * fft.imag) / n
+    fft = np.where(psd < threshold, 0, fft)
+
+    # inverse fourier transform
+    return irfft(fft, n, axis=-1)
+
+def fft_last(w: np.ndarray) -> np.ndarray:
+    """
+    FFT model (last value only) of each row of w. Same as model() in the FFT strategies
+    """
+    x_notrend, w_mean, w_std = detrend(w, ddof=0)
+    ys = fft_rows(x_notrend)
+    return (ys[:, -1] * w_std[:, 0]) + w_mean[:, 0]
+
+def fft_predict_last(w: np.ndarray) -> np.ndarray:
+    """
+    Same as fft_last(), but NaN scaled values are replaced by 0. Same as predict() (with no lookahead)
+    in the FBB_FFT strategies
+    """
+    x_notrend, w_mean, w_std = detrend(w, ddof=0, fillna=True)
+    ys = fft_rows(x_notrend)
+    return (ys[:, -1] * w_std[:, 0]) + w_mean[:, 0]
+
+def fft_scaled_last(w: np.ndarray) -> np.ndarray:
+    """
+    FFT model of the scaled data (i.e. not re-trended). Same as scaledModel() in the FFT strategies
+    """
+    x_notrend, _, _ = detrend(w, ddof=0, fillna=True)
+    return fft_rows(x_notrend)[:, -1]
+
+def scaled_last(w: np.ndarray) -> np.ndarray:
+    """
+    Last scaled value of each row of w. Same as scaledData() in the FFT strategies
+    """
+    x_notrend, _, _ = detrend(w, ddof=0, fillna=True)
+    return x_notrend[:, -1]
+
+def fft_model(data, window: int) -> np.ndarray:
+    """
+    Equivalent to: data.rolling(window=window).apply(self.model) in the FFT strategies
+    """
+    return rolling_apply(data, window, fft_last)
+
+
+"""
+Kalman
+"""
+
+def kalman_filter(process_noise=2.0, observation_noise=0.5):
+    """
+    Local level Kalman filter (state_transition=1, observation_model=1), as used by the KalmanSIMD strategies.
+    The noise parameters can be scalars, or arrays with one value per series
+    """
+    # only needed by the Kalman strategies
+    from simdkalman import KalmanFilter
+
+    process_noise = np.asarray(process_noise, dtype=float)
+    observation_noise = np.asarray(observation_noise, dtype=float)
+    if process_noise.ndim > 0:
+        process_noise = process_noise.reshape(-1, 1, 1)
+    if observation_noise.ndim > 0:
+        observation_noise = observation_noise.reshape(-1, 1, 1)
+
+    return KalmanFilter(
+        state_transition=1.0,
+        process_noise=process_noise,
+        observation_model=1.0,
+        observation_noise=observation_noise
+    )
+
+def kalman_fit(data, window: int, n_iter: int = 6, n_windows: int = 64,
+               process_noise=2.0, observation_noise=0.5) -> tuple:
+    """
+    Fits (em) the noise parameters of the filter to a batch of (up to) n_windows scaled windows of data, spread
+    evenly across the data. All windows are fitted in a single pass, and the per-window estimates are averaged.
+    Returns (process_noise, observation_noise), or the initial values if there is not enough data
+    """
+    data = np.asarray(data, dtype=float)
+    if len(data) < window:
+        return (process_noise, observation_noise)
+
+    views = windows(data, window)
+    views = views[~np.isnan(views).any(axis=1)]
+    if len(views) == 0:
+        return (process_noise, observation_noise)
+
+    views = views[np.unique(np.linspace(0, len(views) - 1, min(n_windows, len(views))).astype(int))]
+    x_notrend, _, _ = detrend(views, ddof=0, fillna=True)
+
+    kfilter = kalman_filter(process_noise, observation_noise).em(x_notrend, n_iter=n_iter)
+    return (float(np.mean(kfilter.process_noise)), float(np.mean(kfilter.observation_noise)))
+
+def kalman_rows(x: np.ndarray, params: np.ndarray = None) -> np.ndarray:
+    """
+    Smoothed observations of each row of x. All rows are smoothed in a single (vectorised) call.
+    params is (process_noise, observation_noise), either one pair for all rows or one row per window
+    """
+    if params is None:
+        kfilter = kalman_filter()
+    else:
+        params = np.asarray(params, dtype=float)
+        kfilter = kalman_filter(params[..., 0], params[..., 1])
+
+    return kfilter.smooth(x).observations.mean
+
+def kalman_last(w: np.ndarray, params: np.ndarray = None) -> np.ndarray:
+    """
+    Kalman model (last value only) of each row of w. Same as model() in the KalmanSIMD strategies
+    """
+    x_notrend, w_mean, w_std = detrend(w, ddof=0, fillna=True)
+    restored_sig = kalman_rows(x_notrend, params)
+    return (restored_sig[:, -1] * w_std[:, 0]) + w_mean[:, 0]
+
+def kalman_scaled_last(w: np.ndarray, params: np.ndarray = None) -> np.ndarray:
+    """
+    Kalman model of the scaled data (i.e. not re-trended). Same as scaledModel() in the KalmanSIMD strategies
+    """
+    x_notrend, _, _ = detrend(w, ddof=0, fillna=True)
+    return kalman_rows(x_notrend, params)[:, -1]
+
+
+"""
+Kalman (steady gain)
+
+The pykalman based strategies use a local level model (transition=1, observation=1) with fixed noise parameters.
+For that model the Kalman gain does not depend on the data, so the gain sequence is the same for every window
+(and quickly converges to the steady state gain). The last smoothed value of a window is the same as the last
+filtered value, which is then just a fixed linear combination of the window:
+    model = weights . window + offset
+so the gains are calculated once per pair and all windows are modelled with a single matrix product
+"""
+
+def kalman_weights(window: int, transition_covariance: float, observation_covariance: float,
+                   initial_state_mean: float = 0.0, initial_state_covariance: float = 1.0) -> np.ndarray:
+    """
+    Returns the model parameters for kalman_linear_last(): the weight of each entry of a window, followed by the
+    offset (contribution of the initial state)
+    """
+    gains = np.empty(window)
+    p = initial_state_covariance
+    for t in range(window):
+        if t > 0:
+            p = p + transition_covariance
+        gains[t] = p / (p + observation_covariance)
+        p = (1.0 - gains[t]) * p
+
+    # decay[t] = product of (1 - gain) from step t onwards
+    decay = np.append(np.cumprod((1.0 - gains)[::-1])[::-1], 1.0)
+    weights = gains * decay[1:]
+    offset = decay[0] * initial_state_mean
+    return np.append(weights, offset)
+
+def kalman_linear_raw_last(w: np.ndarray, params: np.ndarray) -> np.ndarray:
+    """
+    Kalman model (last value only) of each (unscaled) row of w.
+    params is the output of kalman_weights(), either for all rows or one row per window
+    """
+    params = np.broadcast_to(params, (len(w), w.shape[1] + 1))
+    return np.einsum('ij,ij->i', w, params[:, :-1]) + params[:, -1]
+
+def kalman_linear_last(w: np.ndarray, params: np.ndarray) -> np.ndarray:
+    """
+    Kalman model (last value only) of each row of w, scaled and re-trended as in model() of the Kalman strategy
+    """
+    x_notrend, w_mean, w_std = detrend(w, ddof=0, fillna=True)
+    restored_sig = kalman_linear_raw_last(x_notrend, params)
+    return (restored_sig * w_std[:, 0]) + w_mean[:, 0]
+
+
+"""
+SARIMAX
+
+Fitting a new SARIMAX model to every window is very slow, so the parameters are only re-estimated every
+refit_interval candles (starting from the previous estimate). Between refits, the fitted model is extended with
+the new candles, which just runs the (state space) filter over them with the same parameters.
+For an AR model, the forecast only depends on the last few candles, so this gives the same forecasts as
+filtering each window separately
+"""
+
+def sarimax_forecast(data, window: int, order=(2, 0, 0), steps: int = 2, refit_interval: int = 8,
+                     tolerance: float = np.inf, params: np.ndarray = None):
+    """
+    Forecast (steps ahead, last value only) of a SARIMAX model for each window of data.
+    A refit is also done if the (standardised) one step forecast error of a new candle exceeds tolerance.
+    params are the initial model parameters (e.g. from a previous call), or None to use the statsmodels defaults
+    Returns (forecasts, params), where params are the latest fitted parameters
+    """
+    # only needed by the SARIMAX strategy
+    import statsmodels.api as sm
+
+    data = np.asarray(data, dtype=float)
+    result = np.full(len(data), np.nan)
+    if len(data) < window:
+        return result, params
+
+    valid = ~np.isnan(windows(data, window)).any(axis=1)
+    nwindows = len(valid)
+    i = 0
+    while i < nwindows:
+        if not valid[i]:
+            i += 1
+            continue
+
+        # refit on window i, starting from the previous parameters
+        end = i + window
+        s_model = sm.tsa.SARIMAX(data[i:end], order=order, enforce_invertibility=False, enforce_stationarity=False)
+        fit = s_model.fit(start_params=params, disp=False)
+        params = fit.params
+        result[end - 1] = fit.forecast(steps)[-1]
+
+        # filter the candles up to the next refit, using the same parameters
+        new_data = data[end:min(i + refit_interval, nwindows) + window - 1]
+        if len(new_data) == 0:
+            i += refit_interval
+            continue
+
+        filtered = fit.extend(new_data)
+        forecast = sarimax_filtered_forecast(filtered, steps)
+
+        # refit early if the model no longer fits the data
+        error = np.abs(filtered.filter_results.standardized_forecasts_error[0])
+        count = np.argmax(error > tolerance) if (error > tolerance).any() else len(new_data)
+
+        result[end:end + count] = forecast[:count]
+        i += count + 1
+
+    result[window - 1:] = np.where(valid, result[window - 1:], np.nan)
+    return result, params
+
+def sarimax_filtered_forecast(filtered, steps: int) -> np.ndarray:
+    """
+    Forecast (steps ahead) from each candle of a filtered (time invariant) state space model
+    """
+    ssm = filtered.model.ssm
+    transition = ssm.transition[:, :, 0]
+    state_intercept = ssm.state_intercept[:, 0]
+
+    # predicted_state[:, t+1] is the one step ahead state, given the data up to t
+    state = filtered.filter_results.predicted_state[:, 1:]
+    for _ in range(steps - 1):
+        state = transition @ state + state_intercept[:, None]
+
+    return (ssm.design[:, :, 0] @ state + ssm.obs_intercept[:, 0][:, None])[0]
+
+
+"""
+Incremental Updates
+"""
+
+def per_window(model):
+    """
+    Wraps a per-window model function (as used with rolling().apply()) so that it can be used wherever a batch
+    function is expected
+    """
+    def func(w: np.ndarray) -> np.ndarray:
+        result = np.full(len(w), np.nan)
+        for i, row in enumerate(w):
+            if not np.isnan(row).any():
+                result[i] = model(pd.Series(row))
+        return result
+
+    return func
+
+
+class ModelCache:
+    """
+    Caches the results of a rolling model per (pair, timeframe, name, window, model function), along with the
+    candles (and parameters) they were calculated from. Instances are often shared by strategy subclasses, so
+    different configurations must not reuse each other's results.
+    In live/dry-run modes (process_only_new_candles) each call typically adds a single candle, so only the
+    windows that end on new candles are calculated and appended to the cached results.
+    A full recalculation is done if the candles do not line up with the cached ones (gap in the data,
+    reload of the startup candles, changed history etc.)
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def clear(self, pair: str = None):
+        if pair is None:
+            self.entries = {}
+        else:
+            self.entries = {key: entry for key, entry in self.entries.items() if key[0] != pair}
+
+    def update(self, pair: str, timeframe: str, dataframe: DataFrame, window: int, func,
+               name: str = 'model', column: str = 'close', params: tuple = None) -> np.ndarray:
+        """
+        Returns the rolling model of dataframe[column],
+        equivalent to rolling_apply(dataframe[column], window, func, params)
+        """
+        return self.update_all({pair: dataframe}, timeframe, window, func, name=name, column=column,
+                               params=None if params is None else {pair: params})[pair]
+
+    def update_all(self, dataframes: dict, timeframe: str, window: int, func,
+                   name: str = 'model', column: str = 'close', params: dict = None) -> dict:
+        """
+        Same as update(), for several pairs at once (dataframes is a dict of pair:dataframe).
+        The windows that need to be calculated for all of the pairs are stacked into a single
+        (total windows, window) array, so the model is run in one pass rather than once per pair.
+        params (optional) is a dict of pair:model parameters, which are passed to func with each window
+        Returns a dict of pair:model
+        """
+        pending = []
+        views = []
+        view_params = []
+        func_name = '{}.{}'.format(getattr(func, '__module__', ''), getattr(func, '__qualname__', repr(func)))
+        for pair, dataframe in dataframes.items():
+            key = (pair, timeframe, name, window, func_name)
+            dates = dataframe['date'].to_numpy(dtype='datetime64[ns]')
+            data = dataframe[column].to_numpy(dtype=float)
+            pair_params = None if params is None else np.asarray(params[pair], dtype=float)
+
+            entry = self.entries.get(key, None)
+            ncached = 0
+            if (entry is not None) and self.same_params(entry['params'], pair_params):
+                ncached = self.overlap(entry, dates, data)
+
+            # only calculate the windows that end on new candles
+            first = max(ncached, window - 1)
+            if len(data) > first:
+                views.append(windows(data, window)[first - window + 1:])
+                if params is not None:
+                    view_params.append(np.tile(pair_params, (len(data) - first, 1)))
+
+            pending.append((key, entry, dates, data, pair_params, ncached, first))
+
+        values = np.empty(0)
+        if views:
+            values = apply_chunks(np.concatenate(views), func,
+                                  np.concatenate(view_params) if params is not None else None)
+
+        results = {}
+        offset = 0
+        for key, entry, dates, data, pair_params, ncached, first in pending:
+            result = np.full(len(data), np.nan)
+            if ncached > 0:
+                result[:ncached] = entry['result'][-ncached:]
+            if len(data) > first:
+                result[first:] = values[offset:offset + len(data) - first]
+                offset += len(data) - first
+            # the start of the dataframe does not have enough history, same as a full recalculation
+            result[:window - 1] = np.nan
+
+            self.entries[key] = {'dates': dates.copy(), 'data': data.copy(), 'result': result.copy(),
+                                 'params': None if pair_params is None else pair_params.copy()}
+            results[key[0]] = result
+
+        return results
+
+    @staticmethod
+    def same_params(cached_params, params) -> bool:
+        """
+        Returns True if the cached results were calculated with the same model parameters
+        """
+        if cached_params is None or params is None:
+            return cached_params is None and params is None
+        return np.array_equal(cached_params, params, equal_nan=True)
+
+    @staticmethod
+    def overlap(entry: dict, dates: np.ndarray, data: np.ndarray) -> int:
+        """
+        Returns the number of (leading) candles in data that have already been processed,
+        or 0 if a full recalculation is needed
+        """
+        cached_dates = entry['dates']
+        cached_data = entry['data']
+        if len(dates) == 0 or len(cached_dates) == 0:
+            return 0
+
+        # position of the last cached candle in the new data
+        last = np.searchsorted(dates, cached_dates[-1])
+        if last >= len(dates) or dates[last] != cached_dates[-1]:
+            return 0
+
+        # more history than before (e.g. startup candles reloaded)
+        n = last + 1
+        if n > len(cached_dates):
+            return 0
+
+        # history must be unchanged
+        if not (np.array_equal(dates[:n], cached_dates[-n:]) and
+                np.array_equal(data[:n], cached_data[-n:], equal_nan=True)):
+            return 0
+
+        # new candles must follow on without any gaps
+        if (len(dates) > n) and (len(cached_dates) > 1):
+            step = cached_dates[-1] - cached_dates[-2]
+            if np.any(np.diff(dates[n - 1:]) != step):
+                return 0
+
+        return n
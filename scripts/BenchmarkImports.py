@@ -0,0 +1,106 @@
+# Script to measure how long it takes (and how much memory it uses) to import each module in an exchange directory
+# freqtrade imports every file in the strategy directory when it looks for a strategy, so a slow import slows down
+# every freqtrade command, whichever strategy is used. This shows which heavy libraries (tensorflow, sklearn etc.) are
+# actually loaded by each module, which should be none since they are imported lazily (see binanceus/LazyImport.py)
+#
+# Each module is imported in a fresh python process, so timings include everything the module pulls in
+#
+# Usage: python BenchmarkImports.py [-e exchange] [-r repeat] [modules...]
+#   e.g. python user_data/strategies/scripts/BenchmarkImports.py -e binanceus 'PCA*' 'NNBC*'
+#
+# Module names can be wildcards (quote them). Needs freqtrade (and any libraries imported by the modules)
+
+
+import sys
+import argparse
+import fnmatch
+import json
+import subprocess
+from pathlib import Path
+
+from tabulate import tabulate
+
+
+strategies_dir = Path(__file__).parent.parent
+
+# libraries that should only be loaded when a model is actually used
+heavy_modules = ['tensorflow', 'keras', 'sklearn', 'xgboost', 'statsmodels', 'h5py', 'torch']
+
+# run in a separate process for each module. Prints the results as JSON
+import_code = """
+import sys, time, json, resource
+sys.path.insert(0, sys.argv[1])
+heavy = sys.argv[3].split(',')
+rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+error = ''
+try:
+    __import__(sys.argv[2])
+except Exception as e:
+    error = '{}: {}'.format(type(e).__name__, e)
+elapsed = time.perf_counter() - start
+rss_end = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB on linux
+print(json.dumps({'time': elapsed, 'memory': (rss_end - rss_start) / scale,
+                  'loaded': [m for m in heavy if m in sys.modules], 'error': error}))
+"""
+
+
+def find_modules(exchange_dir: Path, patterns: list) -> list:
+    names = []
+    for pattern in patterns:
+        matches = sorted(f.stem for f in exchange_dir.glob('*.py') if fnmatch.fnmatch(f.stem, pattern))
+        if not matches:
+            print("No modules match: {} (in {})".format(pattern, exchange_dir))
+        names.extend(name for name in matches if name not in names)
+    return names
+
+
+def time_import(exchange_dir: Path, name: str) -> dict:
+    proc = subprocess.run([sys.executable, '-c', import_code, str(exchange_dir), name, ','.join(heavy_modules)],
+                          capture_output=True, text=True, cwd=str(exchange_dir))
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        errors = proc.stderr.strip().splitlines()
+        return {'time': 0.0, 'memory': 0.0, 'loaded': [], 'error': errors[-1] if errors else 'failed'}
+    return json.loads(lines[-1])
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Measure the import time and memory of the modules in an exchange '
+                                                 'directory')
+    parser.add_argument('modules', nargs='*', default=['*'], help='module names (wildcards allowed, e.g. "PCA*")')
+    parser.add_argument('-e', '--exchange', default='binanceus', help='exchange directory containing the modules')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='number of runs per module (best is reported)')
+    args = parser.parse_args()
+
+    exchange_dir = strategies_dir / args.exchange
+
+    names = find_modules(exchange_dir, args.modules)
+    if not names:
+        sys.exit(1)
+
+    table = []
+    total = 0.0
+    nheavy = 0
+    for name in names:
+        results = [time_import(exchange_dir, name) for _ in range(max(1, args.repeat))]
+        best = min(results, key=lambda r: r['time'])
+        total += best['time']
+        if best['loaded']:
+            nheavy += 1
+        table.append([name, '{:.3f}'.format(best['time']), '{:.1f}'.format(best['memory']),
+                      ', '.join(best['loaded']), best['error'].split('\n')[0][:60]])
+
+    table.sort(key=lambda row: float(row[1]), reverse=True)
+
+    print("")
+    print(tabulate(table, headers=['module', 'time (s)', 'memory (MB)', 'heavy modules loaded', 'error'],
+                   tablefmt='psql'))
+    print("")
+    print("{} modules, total import time: {:.1f}s, {} load heavy modules at import".format(len(names), total, nheavy))
+
+
+if __name__ == '__main__':
+    main()
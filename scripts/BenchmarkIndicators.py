@@ -0,0 +1,273 @@
+# Script to benchmark the (shared) custom indicators against the original dataframe based versions
+# Also checks that both versions produce the same results
+#
+# Usage: python BenchmarkIndicators.py [-n rows] [-c columns] [-r repeat] [indicators...]
+#   e.g. python user_data/strategies/scripts/BenchmarkIndicators.py -n 17280 -c 100 RMI SROC
+#
+# The original versions copy the whole dataframe, so their cost depends on how many columns have already been added
+# by the strategy. Use -c to add that many (dummy) columns to the test data
+
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from tabulate import tabulate
+
+import talib.abstract as ta
+
+
+"""
+Reference implementations, copied from the original custom_indicators.py
+"""
+
+def zema(dataframe, period, field='close'):
+    df = dataframe.copy()
+
+    df['ema1'] = ta.EMA(df[field], timeperiod=period)
+    df['ema2'] = ta.EMA(df['ema1'], timeperiod=period)
+    df['d'] = df['ema1'] - df['ema2']
+    df['zema'] = df['ema1'] + df['d']
+
+    return df['zema']
+
+def RMI(dataframe, *, length=20, mom=5):
+    df = dataframe.copy()
+
+    df['maxup'] = (df['close'] - df['close'].shift(mom)).clip(lower=0)
+    df['maxdown'] = (df['close'].shift(mom) - df['close']).clip(lower=0)
+
+    df.fillna(0, inplace=True)
+
+    df["emaInc"] = ta.EMA(df, price='maxup', timeperiod=length)
+    df["emaDec"] = ta.EMA(df, price='maxdown', timeperiod=length)
+
+    df['RMI'] = np.where(df['emaDec'] == 0, 0, 100 - 100 / (1 + df["emaInc"] / df["emaDec"]))
+
+    return df["RMI"]
+
+def mastreak(dataframe: DataFrame, period: int = 4, field='close'):
+    df = dataframe.copy()
+
+    avgval = zema(df, period, field)
+
+    arr = np.diff(avgval)
+    pos = np.clip(arr, 0, 1).astype(bool).cumsum()
+    neg = np.clip(arr, -1, 0).astype(bool).cumsum()
+    streak = np.where(arr >= 0, pos - np.maximum.accumulate(np.where(arr <= 0, pos, 0)),
+                    -neg + np.maximum.accumulate(np.where(arr >= 0, neg, 0)))
+
+    return np.concatenate((np.full((df['close'].shape[0] - streak.shape[0]), np.nan), streak))
+
+def pcc(dataframe: DataFrame, period: int = 20, mult: int = 2):
+    df = dataframe.copy()
+
+    df['previous_close'] = df['close'].shift()
+
+    df['close_change'] = (df['close'] - df['previous_close']) / df['previous_close'] * 100
+    df['high_change'] = (df['high'] - df['close']) / df['close'] * 100
+    df['low_change'] = (df['low'] - df['close']) / df['close'] * 100
+
+    df['delta'] = df['high_change'] - df['low_change']
+
+    mid = zema(df, period, 'close_change')
+    rangema = zema(df, period, 'delta')
+
+    upper = mid + rangema * mult
+    lower = mid - rangema * mult
+
+    return upper, rangema, lower
+
+def SSLChannels(dataframe, length=10):
+    df = dataframe.copy()
+
+    df['smaHigh'] = df['high'].rolling(length).mean()
+    df['smaLow'] = df['low'].rolling(length).mean()
+
+    df['hlv'] = np.where(df['close'] > df['smaHigh'], 1,
+                         np.where(df['close'] < df['smaLow'], -1, np.nan))
+    df['hlv'] = df['hlv'].ffill()
+
+    df['sslDown'] = np.where(df['hlv'] < 0, df['smaHigh'], df['smaLow'])
+    df['sslUp'] = np.where(df['hlv'] < 0, df['smaLow'], df['smaHigh'])
+
+    return df['sslDown'], df['sslUp']
+
+def SSLChannels_ATR(dataframe, length=7):
+    df = dataframe.copy()
+
+    df['ATR'] = ta.ATR(df, timeperiod=14)
+    df['smaHigh'] = df['high'].rolling(length).mean() + df['ATR']
+    df['smaLow'] = df['low'].rolling(length).mean() - df['ATR']
+    df['hlv'] = np.where(df['close'] > df['smaHigh'], 1, np.where(df['close'] < df['smaLow'], -1, np.nan))
+    df['hlv'] = df['hlv'].ffill()
+    df['sslDown'] = np.where(df['hlv'] < 0, df['smaHigh'], df['smaLow'])
+    df['sslUp'] = np.where(df['hlv'] < 0, df['smaLow'], df['smaHigh'])
+
+    return df['sslDown'], df['sslUp']
+
+def WaveTrend(dataframe, chlen=10, avg=21, smalen=4):
+    df = dataframe.copy()
+
+    df['hlc3'] = (df['high'] + df['low'] + df['close']) / 3
+    df['esa'] = ta.EMA(df['hlc3'], timeperiod=chlen)
+    df['d'] = ta.EMA((df['hlc3'] - df['esa']).abs(), timeperiod=chlen)
+    df['ci'] = (df['hlc3'] - df['esa']) / (0.015 * df['d'])
+    df['tci'] = ta.EMA(df['ci'], timeperiod=avg)
+
+    df['wt1'] = df['tci']
+    df['wt2'] = ta.SMA(df['wt1'], timeperiod=smalen)
+    df['wt1-wt2'] = df['wt1'] - df['wt2']
+
+    return df['wt1'], df['wt2']
+
+def T3(dataframe, length=5):
+    df = dataframe.copy()
+
+    df['xe1'] = ta.EMA(df['close'], timeperiod=length)
+    df['xe2'] = ta.EMA(df['xe1'], timeperiod=length)
+    df['xe3'] = ta.EMA(df['xe2'], timeperiod=length)
+    df['xe4'] = ta.EMA(df['xe3'], timeperiod=length)
+    df['xe5'] = ta.EMA(df['xe4'], timeperiod=length)
+    df['xe6'] = ta.EMA(df['xe5'], timeperiod=length)
+    b = 0.7
+    c1 = -b*b*b
+    c2 = 3*b*b+3*b*b*b
+    c3 = -6*b*b-3*b-3*b*b*b
+    c4 = 1+3*b+b*b*b+3*b*b
+    df['T3Average'] = c1 * df['xe6'] + c2 * df['xe5'] + c3 * df['xe4'] + c4 * df['xe3']
+
+    return df['T3Average']
+
+def SROC(dataframe, roclen=21, emalen=13, smooth=21):
+    df = dataframe.copy()
+
+    roc = ta.ROC(df, timeperiod=roclen)
+    ema = ta.EMA(df, timeperiod=emalen)
+    sroc = ta.ROC(ema, timeperiod=smooth)
+
+    return sroc
+
+
+"""
+Benchmarks. Each entry is (reference function, shared function name, kwargs), using the settings from the strategies
+"""
+
+benchmarks = {
+    'zema': (zema, 'zema', {'period': 30}),
+    'RMI': (RMI, 'RMI', {'length': 24, 'mom': 5}),
+    'mastreak': (mastreak, 'mastreak', {'period': 4}),
+    'pcc': (pcc, 'pcc', {'period': 20, 'mult': 2}),
+    'SSLChannels': (SSLChannels, 'SSLChannels', {'length': 10}),
+    'SSLChannels_ATR': (SSLChannels_ATR, 'SSLChannels_ATR', {'length': 21}),
+    'WaveTrend': (WaveTrend, 'WaveTrend', {}),
+    'T3': (T3, 'T3', {}),
+    'SROC': (SROC, 'SROC', {'roclen': 21, 'emalen': 13, 'smooth': 21}),
+}
+
+
+"""
+Test Data
+"""
+
+def gen_ohlcv(nrows: int, ncols: int, seed: int) -> DataFrame:
+    # deterministic random walk, with a flat section and a gap (NaN) in the data
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.005, nrows)))
+    close[nrows // 3:nrows // 3 + 8] = close[nrows // 3]
+    open_ = np.append(close[0], close[:-1])
+    high = np.maximum(open_, close) * (1.0 + np.abs(rng.normal(0.0, 0.002, nrows)))
+    low = np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, 0.002, nrows)))
+    close[(nrows * 3) // 4] = np.nan
+
+    df = DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                    'volume': rng.lognormal(10.0, 1.0, nrows)})
+
+    # simulate the columns that a strategy has already added
+    extra = DataFrame(rng.normal(size=(nrows, ncols)), columns=['col{}'.format(i) for i in range(ncols)])
+    return pd.concat([df, extra], axis=1)
+
+def as_list(result) -> list:
+    # indicators return a single Series/array or a tuple of them
+    results = result if isinstance(result, tuple) else (result,)
+    return [np.asarray(r, dtype=np.float64) for r in results]
+
+def timeit(func, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the shared indicators against the dataframe versions')
+    parser.add_argument('indicators', nargs='*', default=list(benchmarks.keys()),
+                        help='indicators to benchmark ({})'.format(', '.join(benchmarks.keys())))
+    parser.add_argument('-n', '--rows', type=int, default=17280, help='candles (default: 180 days of 15m)')
+    parser.add_argument('-c', '--columns', type=int, default=50, help='extra (dummy) columns in the dataframe')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of timing runs (best is reported)')
+    parser.add_argument('-t', '--tolerance', type=float, default=1e-9, help='max allowed relative difference')
+    args = parser.parse_args()
+
+    # load the shared indicators from the strategies directory
+    sys.path.append(str(Path(__file__).parent.parent))
+    import shared_indicators as si
+
+    dataframe = gen_ohlcv(args.rows, args.columns, seed=0)
+
+    table = []
+    failed = False
+    for name in args.indicators:
+        if name not in benchmarks:
+            print("Unknown indicator: {}. Valid indicators: {}".format(name, list(benchmarks.keys())))
+            sys.exit(1)
+
+        ref_func, func_name, kwargs = benchmarks[name]
+        func = getattr(si, func_name)
+
+        ref_time, ref = timeit(lambda: ref_func(dataframe, **kwargs), args.repeat)
+        new_time, new = timeit(lambda: func(dataframe, **kwargs), args.repeat)
+
+        ref = as_list(ref)
+        new = as_list(new)
+
+        # results must have the same shape and NaNs, and (close to) the same values
+        ok = len(ref) == len(new)
+        max_diff = 0.0
+        for r, n in zip(ref, new):
+            if (r.shape != n.shape) or not np.array_equal(np.isnan(r), np.isnan(n)):
+                ok = False
+                continue
+            valid = ~np.isnan(r)
+            if valid.any():
+                diff = np.abs(r[valid] - n[valid]) / np.maximum(np.abs(r[valid]), 1e-12)
+                max_diff = max(max_diff, diff.max())
+        ok = ok and (max_diff <= args.tolerance)
+        failed = failed or not ok
+
+        table.append([name, args.rows, args.columns,
+                      '{:.2f}'.format(ref_time * 1000.0), '{:.2f}'.format(new_time * 1000.0),
+                      '{:.1f}x'.format(ref_time / new_time) if new_time > 0 else '-',
+                      '{:.2e}'.format(max_diff), 'OK' if ok else 'MISMATCH'])
+
+    print("")
+    print(tabulate(table,
+                   headers=['indicator', 'rows', 'columns', 'original (ms)', 'shared (ms)', 'speedup', 'max rel diff',
+                            'check'],
+                   tablefmt='psql'))
+    print("")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
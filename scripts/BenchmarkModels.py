@@ -0,0 +1,341 @@
+# Script to benchmark the batch (vectorised) rolling models against the original rolling().apply() versions
+# Also checks that both versions produce the same results
+#
+# Usage: python BenchmarkModels.py [-e exchange] [-n rows] [-p pairs] [models...]
+#   e.g. python user_data/strategies/scripts/BenchmarkModels.py -e kucoin -n 17280 -p 2 dwt
+
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+import pywt
+import scipy.fft
+
+
+"""
+Reference (per-window) implementations, copied from the strategies
+"""
+
+class DWTReference:
+
+    def madev(self, d, axis=None):
+        """ Mean absolute deviation of a signal """
+        return np.mean(np.absolute(d - np.mean(d, axis)), axis)
+
+    def dwtModel(self, data):
+        wavelet = 'haar'
+        level = 1
+        wmode = "smooth"
+        length = len(data)
+
+        coeff = pywt.wavedec(np.array(data), wavelet, mode=wmode)
+
+        # remove higher harmonics
+        sigma = (1 / 0.6745) * self.madev(coeff[-level])
+        uthresh = sigma * np.sqrt(2 * np.log(length))
+        coeff[1:] = (pywt.threshold(i, value=uthresh, mode='hard') for i in coeff[1:])
+
+        # inverse transform
+        model = pywt.waverec(coeff, wavelet, mode=wmode)
+
+        return model
+
+    def model(self, a: np.ndarray) -> float:
+        w_mean = a.mean()
+        w_std = a.std()
+        x_notrend = (a - w_mean) / w_std
+
+        restored_sig = self.dwtModel(x_notrend)
+
+        model = (restored_sig * w_std) + w_mean
+
+        length = len(model)
+        return model[length - 1]
+
+
+class FFTReference:
+
+    def model(self, a: np.ndarray) -> float:
+        # scale the data
+        standardized = a.copy()
+        w_mean = np.mean(standardized)
+        w_std = np.std(standardized)
+        scaled = (standardized - w_mean) / w_std
+
+        ys = self.fourierModel(scaled)
+
+        # restore the data
+        model = (ys * w_std) + w_mean
+
+        length = len(model)
+        return model[length - 1]
+
+    def fourierModel(self, x):
+        n = len(x)
+        xa = np.array(x)
+
+        # compute the fft
+        fft = scipy.fft.fft(xa, n)
+
+        # compute power spectrum density
+        # squared magnitude of each fft coefficient
+        psd = fft * np.conj(fft) / n
+        threshold = 20
+        fft = np.where(psd < threshold, 0, fft)
+
+        # inverse fourier transform
+        ifft = scipy.fft.ifft(fft)
+
+        ifft = ifft.real
+
+        ldiff = len(ifft) - len(xa)
+        model = ifft[ldiff:]
+
+        return model
+
+
+class KalmanSIMDReference:
+    # note: uses a fixed (un-fitted) filter, so that both versions use the same parameters
+
+    def __init__(self):
+        from simdkalman import KalmanFilter
+        self.kalman_filter = KalmanFilter(
+            state_transition=1.0,
+            process_noise=2.0,
+            observation_model=1.0,
+            observation_noise=0.5
+        )
+
+    def model(self, a: np.ndarray) -> float:
+        # scale the data
+        standardized = a.copy()
+        w_mean = np.mean(standardized)
+        w_std = np.std(standardized)
+        scaled = (standardized - w_mean) / w_std
+        scaled.fillna(0, inplace=True)
+
+        # get the Kalman model
+        smoothed = self.kalman_filter.smooth(np.array(scaled))
+        restored_sig = smoothed.observations.mean.squeeze()
+
+        # re-trend
+        model = (restored_sig * w_std) + w_mean
+
+        length = len(model)
+        return model[length - 1]
+
+
+class KalmanReference:
+    # pykalman version (Kalman strategy), using the default (un-fitted) filter parameters
+
+    def __init__(self):
+        from pykalman import KalmanFilter
+        self.kalman_filter = KalmanFilter(
+            transition_matrices=1.0,
+            observation_matrices=1.0,
+            initial_state_mean=0.0,
+            initial_state_covariance=1.0,
+            observation_covariance=0.1,
+            transition_covariance=0.1
+        )
+
+    def model(self, a: np.ndarray) -> float:
+        # scale the data
+        standardized = a.copy()
+        w_mean = np.mean(standardized)
+        w_std = np.std(standardized)
+        scaled = (standardized - w_mean) / w_std
+        scaled.fillna(0, inplace=True)
+
+        # get the Kalman model
+        pr_mean, pr_cov = self.kalman_filter.smooth(np.array(scaled))
+        restored_sig = pr_mean.squeeze()
+
+        # re-trend
+        model = (restored_sig * w_std) + w_mean
+
+        length = len(model)
+        return model[length - 1]
+
+
+class SARIMAXReference:
+
+    def model(self, a: np.ndarray) -> float:
+        import statsmodels.api as sm
+
+        w_mean = np.mean(a)
+        w_std = np.std(a)
+
+        # fit an AR(2) model
+        s_model = sm.tsa.SARIMAX(a, order=(2, 0, 0), enforce_invertibility=False, enforce_stationarity=False)
+        result = s_model.fit(disp=False)
+
+        # get the prediction
+        forecast = result.forecast(2)
+        predict = [column for column in forecast]
+
+        length = len(predict)
+        return (predict[length-1] * w_std) + w_mean
+
+
+"""
+Benchmarks. Each returns (reference function, batch function) for a close series
+"""
+
+def bench_dwt(rm, close: pd.Series, window: int, args):
+    ref = DWTReference()
+    return (
+        lambda: close.rolling(window=window).apply(ref.model).to_numpy(),
+        lambda: rm.dwt_model(close.to_numpy(), window)
+    )
+
+def bench_fft(rm, close: pd.Series, window: int, args):
+    ref = FFTReference()
+    return (
+        lambda: close.rolling(window=window).apply(ref.model).to_numpy(),
+        lambda: rm.fft_model(close.to_numpy(), window)
+    )
+
+def bench_kalman(rm, close: pd.Series, window: int, args):
+    ref = KalmanSIMDReference()
+    return (
+        lambda: close.rolling(window=window).apply(ref.model).to_numpy(),
+        lambda: rm.rolling_apply(close.to_numpy(), window, rm.kalman_last, params=(2.0, 0.5))
+    )
+
+def bench_pykalman(rm, close: pd.Series, window: int, args):
+    ref = KalmanReference()
+    return (
+        lambda: close.rolling(window=window).apply(ref.model).to_numpy(),
+        lambda: rm.rolling_apply(close.to_numpy(), window, rm.kalman_linear_last,
+                                 params=rm.kalman_weights(window, 0.1, 0.1, 0.0, 1.0))
+    )
+
+def bench_sarimax(rm, close: pd.Series, window: int, args):
+    import warnings
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    # statsmodels enables its convergence warnings on import, and most of the small windows don't converge
+    warnings.simplefilter(action='ignore', category=ConvergenceWarning)
+
+    ref = SARIMAXReference()
+
+    def batch():
+        forecast, _ = rm.sarimax_forecast(close, window, refit_interval=args.refit_interval,
+                                          tolerance=args.refit_tolerance)
+        w_mean = close.rolling(window=window).mean()
+        w_std = close.rolling(window=window).std(ddof=0)
+        return ((forecast * w_std) + w_mean).to_numpy()
+
+    return (
+        lambda: close.rolling(window=window).apply(ref.model).to_numpy(),
+        batch
+    )
+
+
+# name: (benchmark, window, default tolerance)
+benchmarks = {
+    'dwt': (bench_dwt, 128, 1e-9),
+    'fft': (bench_fft, 128, 1e-9),
+    'kalman': (bench_kalman, 32, 1e-9),
+    'pykalman': (bench_pykalman, 32, 1e-9),
+    # parameters are only re-estimated every refit interval, so results are approximate
+    'sarimax': (bench_sarimax, 32, 1e-2),
+}
+
+
+"""
+Test Data
+"""
+
+def gen_close(nrows: int, seed: int) -> pd.Series:
+    # deterministic random walk, with a few flat sections (zero std windows) and a NaN gap
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.005, nrows)))
+    close[nrows // 3:nrows // 3 + 8] = close[nrows // 3]
+    close[nrows // 2] = np.nan
+    return pd.Series(close)
+
+def timeit(func, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark batch rolling models against rolling().apply()')
+    parser.add_argument('models', nargs='*', default=list(benchmarks.keys()),
+                        help='models to benchmark ({})'.format(', '.join(benchmarks.keys())))
+    parser.add_argument('-e', '--exchange', default='binance', help='exchange directory to load the models from')
+    parser.add_argument('-n', '--rows', type=int, default=17280, help='candles per pair (default: 180 days of 15m)')
+    parser.add_argument('-p', '--pairs', type=int, default=1, help='number of pairs')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='number of timing runs (best is reported)')
+    parser.add_argument('-t', '--tolerance', type=float, default=None,
+                        help='max allowed relative difference (default depends on the model)')
+    parser.add_argument('-i', '--refit-interval', type=int, default=8, help='sarimax: candles between model refits')
+    parser.add_argument('--refit-tolerance', type=float, default=3.0,
+                        help='sarimax: refit early if a candle is more than this many std errors from the forecast')
+    args = parser.parse_args()
+
+    # strategy specific imports, load the version from the requested exchange directory
+    sys.path.append(str(Path(__file__).parent.parent / args.exchange))
+    import rolling_models as rm
+
+    table = []
+    failed = False
+    for name in args.models:
+        if name not in benchmarks:
+            print("Unknown model: {}. Valid models: {}".format(name, list(benchmarks.keys())))
+            sys.exit(1)
+
+        bench, window, tolerance = benchmarks[name]
+        if args.tolerance is not None:
+            tolerance = args.tolerance
+        ref_time = 0.0
+        batch_time = 0.0
+        max_diff = 0.0
+        nan_match = True
+        for pair in range(args.pairs):
+            close = gen_close(args.rows, seed=pair)
+            ref_func, batch_func = bench(rm, close, window, args)
+            t, ref = timeit(ref_func, args.repeat)
+            ref_time += t
+            t, batch = timeit(batch_func, args.repeat)
+            batch_time += t
+
+            nan_match = nan_match and np.array_equal(np.isnan(ref), np.isnan(batch))
+            valid = ~np.isnan(ref) & ~np.isnan(batch)
+            if valid.any():
+                diff = np.abs(ref[valid] - batch[valid]) / np.abs(ref[valid])
+                max_diff = max(max_diff, diff.max())
+
+        ok = nan_match and (max_diff <= tolerance)
+        failed = failed or not ok
+        table.append([name, window, args.pairs, args.rows,
+                      '{:.3f}'.format(ref_time), '{:.3f}'.format(batch_time),
+                      '{:.1f}x'.format(ref_time / batch_time) if batch_time > 0 else '-',
+                      '{:.2e}'.format(max_diff), 'OK' if ok else 'MISMATCH'])
+
+    print("")
+    print(tabulate(table,
+                   headers=['model', 'window', 'pairs', 'rows', 'apply (s)', 'batch (s)', 'speedup', 'max rel diff',
+                            'check'],
+                   tablefmt='psql'))
+    print("")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
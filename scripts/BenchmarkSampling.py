@@ -0,0 +1,226 @@
+# Script to benchmark the index based sampling functions (binanceus/Sampling.py, used by DataframeUtils and the
+# PCA/NNBC strategies) against the original dataframe based versions
+# Also checks that both versions select the same rows and labels
+#
+# Usage: python BenchmarkSampling.py [-n rows] [-c columns] [-s size] [-r repeat] [functions...]
+#   e.g. python user_data/strategies/scripts/BenchmarkSampling.py -n 100000 -c 100 viable_dataset
+#
+# Memory is the peak (traced) memory allocated while running the function, i.e. the temporary copies it makes
+
+
+import sys
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from tabulate import tabulate
+
+from sklearn.model_selection import train_test_split
+
+
+"""
+Reference implementations, copied from the original DataframeUtils.py and PCA.py
+"""
+
+def remove_debug_columns(dataframe: DataFrame) -> DataFrame:
+    drop_list = dataframe.filter(regex='^%').columns
+    if len(drop_list) > 0:
+        for col in drop_list:
+            dataframe = dataframe.drop(col, axis=1)
+        dataframe.reindex()
+    return dataframe
+
+def remove_outliers(df_norm: DataFrame, buys, sells):
+    df = df_norm.copy()
+    df['%temp_buy'] = buys.copy()
+    df['%temp_sell'] = sells.copy()
+    df2 = df[((df >= -3.0) & (df <= 3.0)).all(axis=1)]
+    ndrop = df_norm.shape[0] - df2.shape[0]
+    if ndrop > 0:
+        b = df2['%temp_buy'].copy()
+        s = df2['%temp_sell'].copy()
+        df2.drop('%temp_buy', axis=1, inplace=True)
+        df2.drop('%temp_sell', axis=1, inplace=True)
+        df2.reindex()
+    else:
+        df2 = df_norm
+        b = buys
+        s = sells
+    return df2, b, s
+
+def build_viable_dataset(size: int, df_norm: DataFrame, buys, sells, shuffle=False):
+    # shuffle=False is the DataframeUtils version, shuffle=True is the PCA version
+    df = df_norm.copy()
+    df['%temp_buy'] = buys.copy()
+    df['%temp_sell'] = sells.copy()
+
+    df_buy = df.loc[df['%temp_buy'] == 1]
+    df_sell = df.loc[df['%temp_sell'] == 1]
+    df_nosig = df.loc[(df['%temp_buy'] == 0) & (df['%temp_sell'] == 0)]
+
+    max_signals = int(2 * size / 3)
+    buy_train_size = df_buy.shape[0]
+    sell_train_size = df_sell.shape[0]
+
+    if max_signals > df_nosig.shape[0]:
+        max_signals = int((size - df_nosig.shape[0])) - 1
+
+    if ((df_buy.shape[0] + df_sell.shape[0]) > max_signals):
+        sig_size = int(max_signals / 2)
+        if (df_buy.shape[0] > sig_size) & (df_sell.shape[0] > sig_size):
+            buy_train_size = sig_size
+            sell_train_size = sig_size
+        else:
+            if (df_buy.shape[0] > df_sell.shape[0]):
+                buy_train_size = max_signals - df_sell.shape[0]
+            else:
+                sell_train_size = max_signals - df_buy.shape[0]
+
+    if buy_train_size < df_buy.shape[0]:
+        df_buy, _ = train_test_split(df_buy, train_size=buy_train_size, shuffle=shuffle)
+    if sell_train_size < df_sell.shape[0]:
+        df_sell, _ = train_test_split(df_sell, train_size=sell_train_size, shuffle=shuffle)
+
+    fill_size = size - buy_train_size - sell_train_size - 1
+
+    if fill_size < df_nosig.shape[0]:
+        df_nosig, _ = train_test_split(df_nosig, train_size=fill_size, shuffle=shuffle)
+
+    df2 = pd.concat([df_buy, df_sell, df_nosig])
+    if shuffle:
+        df2 = df2.sample(frac=1)
+
+    b = df2['%temp_buy'].copy()
+    s = df2['%temp_sell'].copy()
+    df2.drop('%temp_buy', axis=1, inplace=True)
+    df2.drop('%temp_sell', axis=1, inplace=True)
+    df2.reindex()
+
+    return df2, b, s
+
+
+"""
+Test Data
+"""
+
+def gen_data(nrows: int, ncols: int, seed: int):
+    # normalised-looking features (a few outliers) plus sparse buy/sell labels, and some debug columns
+    rng = np.random.default_rng(seed)
+    df = DataFrame(rng.normal(0.0, 1.0, (nrows, ncols)), columns=['col{}'.format(i) for i in range(ncols)])
+    for i in range(5):
+        df['%debug{}'.format(i)] = 0.0
+    buys = pd.Series(np.where(rng.random(nrows) < 0.05, 1.0, 0.0))
+    sells = pd.Series(np.where(rng.random(nrows) < 0.05, 1.0, 0.0))
+    return df, buys, sells
+
+def rows_of(result) -> np.ndarray:
+    # data with the labels appended, as a float64 array
+    df, b, s = result
+    return np.column_stack((np.asarray(df, dtype=np.float64), np.asarray(b), np.asarray(s)))
+
+def same_rows(ref, new, ordered: bool) -> bool:
+    r = rows_of(ref)
+    n = rows_of(new)
+    if r.shape != n.shape:
+        return False
+    if not ordered:
+        r = r[np.lexsort(r.T[::-1])]
+        n = n[np.lexsort(n.T[::-1])]
+    return np.array_equal(r, n)
+
+def measure(func, repeat: int, seed: int):
+    # best time, peak memory (MB) and result. The global random state is reset before each run
+    best = None
+    for _ in range(repeat):
+        np.random.seed(seed)
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    np.random.seed(seed)
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the index based sampling against the dataframe versions')
+    parser.add_argument('functions', nargs='*',
+                        default=['remove_debug_columns', 'remove_outliers', 'viable_dataset', 'viable_dataset_shuffled'],
+                        help='functions to benchmark (remove_debug_columns, remove_outliers, viable_dataset, '
+                             'viable_dataset_shuffled)')
+    parser.add_argument('-n', '--rows', type=int, default=100000, help='rows in the dataframe')
+    parser.add_argument('-c', '--columns', type=int, default=100, help='feature columns in the dataframe')
+    parser.add_argument('-s', '--size', type=int, default=975, help='size of the viable dataset')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='number of timing runs (best is reported)')
+    args = parser.parse_args()
+
+    # load the sampling functions from the binanceus directory
+    sys.path.append(str(Path(__file__).parent.parent / 'binanceus'))
+    import Sampling
+    import DataframeUtils
+
+    df_norm, buys, sells = gen_data(args.rows, args.columns, seed=0)
+    df_features = df_norm.filter(regex='^col')
+
+    def viable(shuffle):
+        def run():
+            index = Sampling.viable_index(args.size, buys, sells, shuffle=shuffle)
+            return Sampling.take(df_features, index), Sampling.take(buys, index), Sampling.take(sells, index)
+        return run
+
+    # (reference, new, result is (data, buys, sells), rows must be in the same order)
+    benchmarks = {
+        'remove_debug_columns': (lambda: remove_debug_columns(df_norm),
+                                 lambda: DataframeUtils.remove_debug_columns(df_norm), False, True),
+        'remove_outliers': (lambda: remove_outliers(df_features, buys, sells),
+                            lambda: DataframeUtils.remove_outliers(df_features, buys, sells), True, True),
+        'viable_dataset': (lambda: build_viable_dataset(args.size, df_features, buys, sells, shuffle=False),
+                           viable(False), True, True),
+        'viable_dataset_shuffled': (lambda: build_viable_dataset(args.size, df_features, buys, sells, shuffle=True),
+                                    viable(True), True, False),
+    }
+
+    table = []
+    failed = False
+    for name in args.functions:
+        if name not in benchmarks:
+            print("Unknown function: {}. Valid functions: {}".format(name, list(benchmarks.keys())))
+            sys.exit(1)
+
+        ref_func, new_func, labelled, ordered = benchmarks[name]
+
+        ref_time, ref_mem, ref = measure(ref_func, args.repeat, seed=27)
+        new_time, new_mem, new = measure(new_func, args.repeat, seed=27)
+
+        if labelled:
+            ok = same_rows(ref, new, ordered)
+        else:
+            ok = list(ref.columns) == list(new.columns) and np.array_equal(ref.to_numpy(), new.to_numpy())
+        failed = failed or not ok
+
+        table.append([name, args.rows, args.columns,
+                      '{:.2f}'.format(ref_time * 1000.0), '{:.2f}'.format(new_time * 1000.0),
+                      '{:.1f}x'.format(ref_time / new_time) if new_time > 0 else '-',
+                      '{:.1f}'.format(ref_mem), '{:.1f}'.format(new_mem), 'OK' if ok else 'MISMATCH'])
+
+    print("")
+    print(tabulate(table,
+                   headers=['function', 'rows', 'columns', 'original (ms)', 'index (ms)', 'speedup',
+                            'original (MB)', 'index (MB)', 'check'],
+                   tablefmt='psql'))
+    print("")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+# Script to benchmark the populate_* functions of strategies, using synthetic (random) OHLCV data
+# Does not need downloaded data or a config file, but does need freqtrade to be installed (and any libraries
+# used by the strategies)
+#
+# Usage: python BenchmarkStrategies.py [-e exchange] [-n rows...] [-p pairs...] [-o output.json] strategies...
+#   e.g. python user_data/strategies/scripts/BenchmarkStrategies.py -e binance -n 2000 8000 -p 1 4 'DWT*' FFT
+#
+# Strategy names can be wildcards (quote them), and are matched against the files in the exchange directory.
+# Results are printed as a table and saved as JSON. If a baseline JSON file (from a previous run) is supplied, any
+# timing that is more than --threshold times slower than the baseline is flagged, and the exit status is 1
+
+
+import sys
+import argparse
+import fnmatch
+import importlib.util
+import json
+import re
+import time
+import traceback
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+
+strategies_dir = Path(__file__).parent.parent
+
+# timed functions, in the order they are called
+phases = ['populate_indicators', 'populate_entry_trend', 'populate_exit_trend']
+
+
+"""
+Synthetic Data
+"""
+
+def gen_ohlcv(pair: str, timeframe: str, rows: int, end_date: datetime) -> pd.DataFrame:
+    # deterministic (per pair and timeframe) random walk
+    from freqtrade.exchange import timeframe_to_minutes
+
+    rng = np.random.default_rng(zlib.crc32('{}_{}'.format(pair, timeframe).encode()))
+    minutes = timeframe_to_minutes(timeframe)
+    scale = 0.002 * np.sqrt(minutes)
+
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, scale, rows)))
+    open_ = np.append(close[0], close[:-1])
+    high = np.maximum(open_, close) * (1.0 + np.abs(rng.normal(0.0, scale / 2.0, rows)))
+    low = np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, scale / 2.0, rows)))
+    volume = rng.lognormal(10.0, 1.0, rows)
+
+    dates = pd.date_range(end=end_date, periods=rows, freq='{}min'.format(minutes), tz='UTC')
+
+    return pd.DataFrame({'date': dates, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume})
+
+
+class StubDataProvider:
+    """
+    Minimal replacement for the freqtrade DataProvider. Generates (and keeps) synthetic data on request
+    The informative timeframes get enough candles to cover the same period as the main timeframe
+    """
+
+    def __init__(self, whitelist: list, timeframe: str, rows: int, runmode):
+        self.whitelist = whitelist
+        self.timeframe = timeframe
+        self.rows = rows
+        self.runmode = runmode
+        self.end_date = datetime(2022, 6, 1, tzinfo=timezone.utc)
+        self.data = {}
+        self.analyzed = {}
+
+    def get_pair_dataframe(self, pair: str, timeframe: str = None, candle_type: str = '') -> pd.DataFrame:
+        from freqtrade.exchange import timeframe_to_minutes
+
+        timeframe = timeframe or self.timeframe
+        if (pair, timeframe) not in self.data:
+            rows = max(1, (self.rows * timeframe_to_minutes(self.timeframe)) // timeframe_to_minutes(timeframe))
+            self.data[(pair, timeframe)] = gen_ohlcv(pair, timeframe, rows, self.end_date)
+        return self.data[(pair, timeframe)].copy()
+
+    def historic_ohlcv(self, pair: str, timeframe: str = None, candle_type: str = '') -> pd.DataFrame:
+        return self.get_pair_dataframe(pair, timeframe)
+
+    def ohlcv(self, pair: str, timeframe: str = None, copy: bool = True, candle_type: str = '') -> pd.DataFrame:
+        return self.get_pair_dataframe(pair, timeframe)
+
+    def get_analyzed_dataframe(self, pair: str, timeframe: str):
+        return self.analyzed.get((pair, timeframe), pd.DataFrame()), self.end_date
+
+    def current_whitelist(self) -> list:
+        return list(self.whitelist)
+
+
+"""
+Strategy Loading
+"""
+
+def find_strategies(exchange_dir: Path, patterns: list) -> list:
+    # strategies are in files of the same name, e.g. DWT.py contains class DWT
+    names = []
+    for pattern in patterns:
+        matches = sorted(f.stem for f in exchange_dir.glob('*.py') if fnmatch.fnmatch(f.stem, pattern))
+        if not matches:
+            print("No strategies match: {} (in {})".format(pattern, exchange_dir))
+        for name in matches:
+            source = (exchange_dir / (name + '.py')).read_text()
+            if name not in names and re.search(r'^class {}\b'.format(name), source, re.MULTILINE):
+                names.append(name)
+    return names
+
+def load_strategy(exchange_dir: Path, name: str, config: dict):
+    # (re-)load the module every time, so that class level caches (model caches, filters etc.) start empty
+    spec = importlib.util.spec_from_file_location(name, exchange_dir / (name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    strategy_class = getattr(module, name)
+    strategy_class.__file__ = str(exchange_dir / (name + '.py'))
+    return strategy_class(config)
+
+
+"""
+Benchmark
+"""
+
+def run_once(exchange_dir: Path, name: str, config: dict, whitelist: list, rows: int) -> dict:
+    # returns the time spent in each phase, summed over all pairs
+    from freqtrade.enums import RunMode
+
+    strategy = load_strategy(exchange_dir, name, config)
+    dp = StubDataProvider(whitelist, strategy.timeframe, rows, config['runmode'])
+    strategy.dp = dp
+
+    # make sure the informative data is generated outside of the timed sections
+    for pair in whitelist:
+        dp.get_pair_dataframe(pair, strategy.timeframe)
+    if hasattr(strategy, 'informative_pairs'):
+        for pair, timeframe, *_ in strategy.informative_pairs():
+            dp.get_pair_dataframe(pair, timeframe)
+
+    timings = {phase: 0.0 for phase in phases}
+
+    if config['runmode'] in (RunMode.LIVE, RunMode.DRY_RUN):
+        start = time.perf_counter()
+        strategy.bot_loop_start()
+        timings['bot_loop_start'] = time.perf_counter() - start
+
+    for pair in whitelist:
+        metadata = {'pair': pair}
+        dataframe = dp.get_pair_dataframe(pair, strategy.timeframe)
+        for phase in phases:
+            start = time.perf_counter()
+            dataframe = getattr(strategy, phase)(dataframe, metadata)
+            timings[phase] += time.perf_counter() - start
+        dp.analyzed[(pair, strategy.timeframe)] = dataframe
+
+    return timings
+
+def run_benchmark(exchange_dir: Path, name: str, config: dict, whitelist: list, rows: int, repeat: int) -> dict:
+    result = {'strategy': name, 'exchange': exchange_dir.name, 'rows': rows, 'pairs': len(whitelist),
+              'runmode': config['runmode'].value}
+    try:
+        best = None
+        for _ in range(repeat):
+            timings = run_once(exchange_dir, name, config, whitelist, rows)
+            best = timings if best is None else {k: min(v, best.get(k, v)) for k, v in timings.items()}
+        result.update(best)
+        result['total'] = sum(best.values())
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        if config.get('verbose', False):
+            traceback.print_exc()
+    return result
+
+def key(result: dict) -> tuple:
+    return (result['strategy'], result['exchange'], result['rows'], result['pairs'], result['runmode'])
+
+def compare(results: list, baseline_file: str, threshold: float) -> bool:
+    # adds the ratio to the baseline total to each result. Returns True if there are any regressions
+    baseline = {key(r): r for r in json.loads(Path(baseline_file).read_text())['results']}
+    regression = False
+    for result in results:
+        base = baseline.get(key(result))
+        if (base is None) or ('total' not in base) or ('total' not in result) or (base['total'] <= 0.0):
+            continue
+        result['vs_baseline'] = result['total'] / base['total']
+        if result['vs_baseline'] > threshold:
+            result['regression'] = True
+            regression = True
+    return regression
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark strategy populate_* functions on synthetic data')
+    parser.add_argument('strategies', nargs='+', help='strategy names (wildcards allowed, e.g. "DWT*")')
+    parser.add_argument('-e', '--exchange', default='binance', help='exchange directory to load the strategies from')
+    parser.add_argument('-n', '--rows', type=int, nargs='+', default=[8640],
+                        help='candles per pair, in the strategy timeframe (default: 30 days of 5m)')
+    parser.add_argument('-p', '--pairs', type=int, nargs='+', default=[1], help='number of pairs')
+    parser.add_argument('-w', '--whitelist', nargs='+', default=None,
+                        help='pair names to use (default: PAIR0/USDT, PAIR1/USDT...). Leveraged strategies need '
+                             'leveraged token names, e.g. BTC3L/USDT')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='number of timing runs (best is reported)')
+    parser.add_argument('-m', '--runmode', default='backtest', choices=['backtest', 'dry_run'],
+                        help='runmode reported to the strategy (dry_run also times bot_loop_start)')
+    parser.add_argument('-o', '--output', default='strategy_benchmark.json', help='JSON output file')
+    parser.add_argument('-b', '--baseline', default=None, help='JSON output from a previous run, to compare against')
+    parser.add_argument('-t', '--threshold', type=float, default=1.25,
+                        help='slowdown (vs baseline) that is reported as a regression')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print tracebacks of failed strategies')
+    args = parser.parse_args()
+
+    from freqtrade.enums import RunMode
+
+    exchange_dir = strategies_dir / args.exchange
+
+    # strategies import their helper modules from their own directory
+    sys.path.append(str(exchange_dir))
+
+    names = find_strategies(exchange_dir, args.strategies)
+    if not names:
+        print("No strategies found")
+        sys.exit(1)
+
+    config = {
+        'runmode': RunMode(args.runmode),
+        'dry_run': True,
+        'stake_currency': 'USDT',
+        'user_data_dir': strategies_dir.parent,
+        'exchange': {'name': args.exchange, 'pair_whitelist': []},
+        'verbose': args.verbose,
+    }
+
+    results = []
+    for name in names:
+        for npairs in args.pairs:
+            whitelist = args.whitelist[:npairs] if args.whitelist else ['PAIR{}/USDT'.format(i) for i in range(npairs)]
+            config['exchange']['pair_whitelist'] = whitelist
+            for rows in args.rows:
+                print("{} ({} pairs, {} rows)...".format(name, len(whitelist), rows))
+                results.append(run_benchmark(exchange_dir, name, config, whitelist, rows, args.repeat))
+
+    regression = compare(results, args.baseline, args.threshold) if args.baseline else False
+
+    table = []
+    for r in results:
+        row = [r['strategy'], r['pairs'], r['rows']]
+        if 'error' in r:
+            row += ['-'] * (len(phases) + 1) + ['', r['error'][:60]]
+        else:
+            row += ['{:.3f}'.format(r[phase]) for phase in phases] + ['{:.3f}'.format(r['total'])]
+            row += ['{:.2f}x'.format(r['vs_baseline']) if 'vs_baseline' in r else '',
+                    'REGRESSION' if r.get('regression', False) else '']
+        table.append(row)
+
+    print("")
+    print(tabulate(table,
+                   headers=['strategy', 'pairs', 'rows', 'indicators (s)', 'entry (s)', 'exit (s)', 'total (s)',
+                            'vs baseline', 'status'],
+                   tablefmt='psql'))
+    print("")
+
+    output = {
+        'date': datetime.now(timezone.utc).isoformat(),
+        'exchange': args.exchange,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2))
+    print("Results saved to: {}".format(args.output))
+
+    if regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
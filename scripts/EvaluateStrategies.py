@@ -0,0 +1,229 @@
+# Script to evaluate a set of strategies (typically the variants of one base class, e.g. 'PCA_*') in a single pass
+# Each pair's candle data is loaded once (rather than once per strategy, as happens with a separate freqtrade
+# process per strategy), then every strategy is run over it. Strategies that share a base class are run one after
+# the other for each pair
+#
+# Note: base indicators are only re-used across variants by the families that keep them in the feature store in the
+# exchange directory (PCA and NNBC). Other families (e.g. Anomaly, DWT) still calculate their indicators once per
+# strategy, so they only save the repeated data loading (and freqtrade start-up)
+#
+# The entry/exit signals are saved in the same layout as freqtrade's 'backtesting --export signals' file
+# ({strategy: {pair: dataframe}}), and summarised as a table
+#
+# Usage: python EvaluateStrategies.py [-e exchange] [-c config] [-t timerange] [-p pairs...] [-o output] strategies...
+#   e.g. python user_data/strategies/scripts/EvaluateStrategies.py -e binanceus -t 20220101-20220301 'PCA_*'
+#
+# Needs freqtrade (and any libraries used by the strategies) and downloaded data (see download.sh)
+
+
+import sys
+import argparse
+import time
+import traceback
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import pandas as pd
+from tabulate import tabulate
+
+from BenchmarkStrategies import find_strategies, load_strategy
+
+
+strategies_dir = Path(__file__).parent.parent
+
+# columns copied to the signal frames (if present)
+signal_columns = ['date', 'open', 'close', 'enter_long', 'exit_long', 'enter_short', 'exit_short',
+                  'enter_tag', 'exit_tag']
+
+
+class HistoryDataProvider:
+    """
+    Minimal replacement for the freqtrade DataProvider, serving downloaded data
+    Each (pair, timeframe) is only loaded from disk once, and is shared by all strategies (as a copy)
+    """
+
+    def __init__(self, datadir: Path, timerange: str, data_format: str, startup_candles: int, runmode):
+        from freqtrade.configuration import TimeRange
+
+        self.datadir = datadir
+        self.timerange = TimeRange.parse_timerange(timerange) if timerange else None
+        self.data_format = data_format
+        self.startup_candles = startup_candles
+        self.runmode = runmode
+        self.whitelist = []
+        self.data = {}
+
+    def get_pair_dataframe(self, pair: str, timeframe: str = None, candle_type: str = '') -> pd.DataFrame:
+        from freqtrade.data.history import load_pair_history
+
+        if (pair, timeframe) not in self.data:
+            self.data[(pair, timeframe)] = load_pair_history(pair=pair, timeframe=timeframe, datadir=self.datadir,
+                                                             timerange=self.timerange,
+                                                             startup_candles=self.startup_candles,
+                                                             data_format=self.data_format)
+        return self.data[(pair, timeframe)].copy()
+
+    def historic_ohlcv(self, pair: str, timeframe: str = None, candle_type: str = '') -> pd.DataFrame:
+        return self.get_pair_dataframe(pair, timeframe)
+
+    def ohlcv(self, pair: str, timeframe: str = None, copy: bool = True, candle_type: str = '') -> pd.DataFrame:
+        return self.get_pair_dataframe(pair, timeframe)
+
+    def get_analyzed_dataframe(self, pair: str, timeframe: str):
+        # only used by the trade callbacks, which are not run here
+        return pd.DataFrame(), None
+
+    def current_whitelist(self) -> list:
+        return list(self.whitelist)
+
+    # removes the data for a pair (once all strategies have been run on it)
+    def release(self, pair: str):
+        for key in [k for k in self.data.keys() if k[0] == pair]:
+            del self.data[key]
+
+
+def family(strategy) -> str:
+    # name of the first base class defined in the strategy directory, e.g. PCA for PCA_fbb (or the strategy itself)
+    for cls in type(strategy).__mro__[1:]:
+        module = sys.modules.get(cls.__module__, None)
+        path = getattr(module, '__file__', None)
+        if path and (Path(path).parent == Path(type(strategy).__file__).parent):
+            return cls.__name__
+    return type(strategy).__name__
+
+
+def get_signals(dataframe: pd.DataFrame, start_date) -> pd.DataFrame:
+    # signal columns for the requested timerange (without the startup candles)
+    signals = dataframe[[col for col in signal_columns if col in dataframe.columns]]
+    if start_date is not None:
+        signals = signals[signals['date'] >= start_date]
+    return signals.reset_index(drop=True)
+
+
+def count(signals: pd.DataFrame, col: str) -> int:
+    return int(signals[col].fillna(0).sum()) if col in signals.columns else 0
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Evaluate a set of strategies over the same data in a single pass')
+    parser.add_argument('strategies', nargs='+', help='strategy names (wildcards allowed, e.g. "PCA_*")')
+    parser.add_argument('-e', '--exchange', default='binanceus', help='exchange directory to load the strategies from')
+    parser.add_argument('-c', '--config', default=None,
+                        help='config file, for the pair whitelist (default: config_<exchange>.json in the exchange '
+                             'directory)')
+    parser.add_argument('-p', '--pairs', nargs='+', default=None, help='pairs to use (overrides the config)')
+    parser.add_argument('-t', '--timerange', default=None, help='timerange (YYYYMMDD-[YYYYMMDD])')
+    parser.add_argument('-d', '--datadir', default=None, help='data directory (default: user_data/data/<exchange>)')
+    parser.add_argument('--data-format', default='json', help='format of the downloaded data (json, feather etc.)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='signals output file (default: signals_<exchange>_<date>.pkl)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print tracebacks of failed strategies')
+    args = parser.parse_args()
+
+    from freqtrade.enums import RunMode
+    from freqtrade.configuration.load_config import load_config_file
+
+    exchange_dir = strategies_dir / args.exchange
+
+    # strategies import their helper modules from their own directory
+    sys.path.append(str(exchange_dir))
+
+    names = find_strategies(exchange_dir, args.strategies)
+    if not names:
+        print("No strategies found")
+        sys.exit(1)
+
+    if args.pairs:
+        whitelist = args.pairs
+    else:
+        config_file = args.config or str(exchange_dir / 'config_{}.json'.format(args.exchange))
+        whitelist = load_config_file(config_file)['exchange']['pair_whitelist']
+
+    datadir = Path(args.datadir) if args.datadir else strategies_dir.parent / 'data' / args.exchange
+
+    config = {
+        'runmode': RunMode.BACKTEST,
+        'dry_run': True,
+        'stake_currency': whitelist[0].split('/')[1] if whitelist else 'USDT',
+        'user_data_dir': strategies_dir.parent,
+        'exchange': {'name': args.exchange, 'pair_whitelist': whitelist},
+        'verbose': args.verbose,
+    }
+
+    # load all the strategies up front, grouped by base class
+    strategies = {}
+    for name in names:
+        try:
+            strategies[name] = load_strategy(exchange_dir, name, config)
+        except Exception as e:
+            print("Error loading {}: {}: {}".format(name, type(e).__name__, e))
+            if args.verbose:
+                traceback.print_exc()
+    if not strategies:
+        sys.exit(1)
+    names = sorted(strategies.keys(), key=lambda n: (family(strategies[n]), n))
+
+    startup = max(getattr(s, 'startup_candle_count', 0) for s in strategies.values())
+    dp = HistoryDataProvider(datadir, args.timerange, args.data_format, startup, RunMode.BACKTEST)
+    dp.whitelist = whitelist
+    start_date = None
+    if dp.timerange is not None and dp.timerange.startts > 0:
+        start_date = datetime.fromtimestamp(dp.timerange.startts, tz=timezone.utc)
+
+    for strategy in strategies.values():
+        strategy.dp = dp
+
+    signals = {name: {} for name in names}
+    stats = {name: {'pairs': 0, 'entries': 0, 'exits': 0, 'time': 0.0, 'errors': 0} for name in names}
+
+    # one pass over the pairs, running every strategy on each pair's data
+    for pair in whitelist:
+        metadata = {'pair': pair}
+        for name in names:
+            strategy = strategies[name]
+            print("{} {} ({})...".format(pair, name, family(strategy)))
+            start = time.perf_counter()
+            try:
+                dataframe = dp.get_pair_dataframe(pair, strategy.timeframe)
+                if dataframe.empty:
+                    print("    No data for {} ({})".format(pair, strategy.timeframe))
+                    continue
+                dataframe = strategy.populate_indicators(dataframe, metadata)
+                dataframe = strategy.populate_entry_trend(dataframe, metadata)
+                dataframe = strategy.populate_exit_trend(dataframe, metadata)
+            except Exception as e:
+                stats[name]['errors'] += 1
+                print("    Error: {}: {}".format(type(e).__name__, e))
+                if args.verbose:
+                    traceback.print_exc()
+                continue
+            stats[name]['time'] += time.perf_counter() - start
+
+            pair_signals = get_signals(dataframe, start_date)
+            signals[name][pair] = pair_signals
+            stats[name]['pairs'] += 1
+            stats[name]['entries'] += count(pair_signals, 'enter_long') + count(pair_signals, 'enter_short')
+            stats[name]['exits'] += count(pair_signals, 'exit_long') + count(pair_signals, 'exit_short')
+
+        dp.release(pair)
+
+    table = []
+    for name in names:
+        s = stats[name]
+        table.append([name, family(strategies[name]), s['pairs'], s['entries'], s['exits'],
+                      '{:.1f}'.format(s['time']), s['errors'] if s['errors'] > 0 else ''])
+
+    print("")
+    print(tabulate(table, headers=['strategy', 'family', 'pairs', 'entries', 'exits', 'time (s)', 'errors'],
+                   tablefmt='psql'))
+    print("")
+
+    output = args.output or 'signals_{}_{}.pkl'.format(args.exchange, datetime.now().strftime('%Y%m%d_%H%M%S'))
+    joblib.dump(signals, output)
+    print("Signals saved to: {}".format(output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Solipsis Custom Indicators and Maths
+
+This is the shared version, used by all of the exchange directories (each of which has a custom_indicators.py that
+just imports this module, so strategies still use: import custom_indicators as cta)
+
+The indicators work on the numpy arrays behind the dataframe columns and do not copy the dataframe or add temporary
+columns to it. Results are returned in the same form as before (Series aligned to the dataframe index, except where
+noted). See scripts/BenchmarkIndicators.py for the parity checks against the original versions
+"""
+import numpy as np
+import talib
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+from pandas import DataFrame, Series
+
+
+"""
+Misc. Helper Functions
+"""
+def same_length(bigger, shorter):
+    return np.concatenate((np.full((bigger.shape[0] - shorter.shape[0]), np.nan), shorter))
+
+def _values(dataframe: DataFrame, field: str) -> np.ndarray:
+    # float64 view of a column (only copies if the column is some other type). TA-Lib needs float64
+    return dataframe[field].to_numpy(dtype=np.float64)
+
+def _ffill(a: np.ndarray) -> np.ndarray:
+    # forward fill NaNs (leading NaNs are left as is)
+    idx = np.where(np.isnan(a), 0, np.arange(len(a)))
+    np.maximum.accumulate(idx, out=idx)
+    return a[idx]
+
+def _rolling_mean(a: np.ndarray, length: int) -> np.ndarray:
+    # same as Series.rolling(length).mean()
+    return Series(a).rolling(length).mean().to_numpy()
+
+def _zema(a: np.ndarray, period: int) -> np.ndarray:
+    ema1 = talib.EMA(a, timeperiod=period)
+    ema2 = talib.EMA(ema1, timeperiod=period)
+    return ema1 + (ema1 - ema2)
+
+def _ssl(close: np.ndarray, high_ma: np.ndarray, low_ma: np.ndarray):
+    hlv = np.where(close > high_ma, 1.0, np.where(close < low_ma, -1.0, np.nan))
+    down = _ffill(hlv) < 0
+    return np.where(down, high_ma, low_ma), np.where(down, low_ma, high_ma)
+
+"""
+Maths
+"""
+def linear_growth(start: float, end: float, start_time: int, end_time: int, trade_time: int) -> float:
+    """
+    Simple linear growth function. Grows from start to end after end_time minutes (starts after start_time minutes)
+    """
+    time = max(0, trade_time - start_time)
+    rate = (end - start) / (end_time - start_time)
+
+    return min(end, start + (rate * time))
+
+def linear_decay(start: float, end: float, start_time: int, end_time: int, trade_time: int) -> float:
+    """
+    Simple linear decay function. Decays from start to end after end_time minutes (starts after start_time minutes)
+    """
+    time = max(0, trade_time - start_time)
+    rate = (start - end) / (end_time - start_time)
+
+    return max(end, start - (rate * time))
+
+def roi_curve(roi_type: str, start: float, end: float, end_time: int) -> np.ndarray:
+    """
+    Minimum ROI for each trade duration (in minutes), for the 'static', 'decay' and 'step' ROI types
+    used by the custom exit logic. Durations past the end of the array use the last value, i.e.
+        min_roi = curve[min(trade_dur, len(curve) - 1)]
+    """
+    if roi_type == 'decay':
+        # same as linear_decay(start, end, 0, end_time, t) for each t
+        rate = (start - end) / end_time
+        return np.maximum(end, start - (rate * np.arange(end_time + 2)))
+    elif roi_type == 'step':
+        return np.where(np.arange(end_time + 1) < end_time, start, end)
+    else:
+        return np.array([start])
+
+"""
+TA Indicators
+"""
+
+def zema(dataframe, period, field='close'):
+    """
+    Source: https://github.com/freqtrade/technical/blob/master/technical/indicators/overlap_studies.py#L79
+    Modified slightly to use ta.EMA instead of technical ema
+    """
+    return Series(_zema(_values(dataframe, field), period), index=dataframe.index)
+
+def RMI(dataframe, *, length=20, mom=5):
+    """
+    Source: https://github.com/freqtrade/technical/blob/master/technical/indicators/indicators.py#L912
+    """
+    close = _values(dataframe, 'close')
+
+    diff = np.full(len(close), np.nan)
+    diff[mom:] = close[mom:] - close[:-mom]
+    maxup = np.nan_to_num(np.clip(diff, 0, None), nan=0.0)
+    maxdown = np.nan_to_num(np.clip(-diff, 0, None), nan=0.0)
+
+    ema_inc = talib.EMA(maxup, timeperiod=length)
+    ema_dec = talib.EMA(maxdown, timeperiod=length)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rmi = np.where(ema_dec == 0, 0, 100 - 100 / (1 + ema_inc / ema_dec))
+
+    return Series(rmi, index=dataframe.index)
+
+def mastreak(dataframe: DataFrame, period: int = 4, field='close') -> np.ndarray:
+    """
+    MA Streak
+    Port of: https://www.tradingview.com/script/Yq1z7cIv-MA-Streak-Can-Show-When-a-Run-Is-Getting-Long-in-the-Tooth/
+    Note: returns a numpy array
+    """
+    avgval = _zema(_values(dataframe, field), period)
+
+    arr = np.diff(avgval)
+    pos = np.clip(arr, 0, 1).astype(bool).cumsum()
+    neg = np.clip(arr, -1, 0).astype(bool).cumsum()
+    streak = np.where(arr >= 0, pos - np.maximum.accumulate(np.where(arr <= 0, pos, 0)),
+                    -neg + np.maximum.accumulate(np.where(arr >= 0, neg, 0)))
+
+    return same_length(avgval, streak)
+
+def pcc(dataframe: DataFrame, period: int = 20, mult: int = 2):
+    """
+    Percent Change Channel
+    PCC is like KC unless it uses percentage changes in price to set channel distance.
+    https://www.tradingview.com/script/6wwAWXA1-MA-Streak-Change-Channel/
+    """
+    close = _values(dataframe, 'close')
+    high = _values(dataframe, 'high')
+    low = _values(dataframe, 'low')
+
+    close_change = np.full(len(close), np.nan)
+    close_change[1:] = (close[1:] - close[:-1]) / close[:-1] * 100
+    high_change = (high - close) / close * 100
+    low_change = (low - close) / close * 100
+
+    delta = high_change - low_change
+
+    mid = _zema(close_change, period)
+    rangema = _zema(delta, period)
+
+    upper = mid + rangema * mult
+    lower = mid - rangema * mult
+
+    index = dataframe.index
+    return Series(upper, index=index), Series(rangema, index=index), Series(lower, index=index)
+
+def SSLChannels(dataframe, length=10, mode='sma'):
+    """
+    Source: https://www.tradingview.com/script/xzIoaIJC-SSL-channel/
+    Source: https://github.com/freqtrade/technical/blob/master/technical/indicators/indicators.py#L1025
+    Usage:
+        dataframe['sslDown'], dataframe['sslUp'] = SSLChannels(dataframe, 10)
+    """
+    if mode not in ('sma'):
+        raise ValueError(f"Mode {mode} not supported yet")
+
+    sma_high = _rolling_mean(_values(dataframe, 'high'), length)
+    sma_low = _rolling_mean(_values(dataframe, 'low'), length)
+
+    ssl_down, ssl_up = _ssl(_values(dataframe, 'close'), sma_high, sma_low)
+
+    return Series(ssl_down, index=dataframe.index), Series(ssl_up, index=dataframe.index)
+
+def SSLChannels_ATR(dataframe, length=7):
+    """
+    SSL Channels with ATR: https://www.tradingview.com/script/SKHqWzql-SSL-ATR-channel/
+    Credit to @JimmyNixx for python
+    """
+    high = _values(dataframe, 'high')
+    low = _values(dataframe, 'low')
+    close = _values(dataframe, 'close')
+
+    atr = talib.ATR(high, low, close, timeperiod=14)
+    sma_high = _rolling_mean(high, length) + atr
+    sma_low = _rolling_mean(low, length) - atr
+
+    ssl_down, ssl_up = _ssl(close, sma_high, sma_low)
+
+    return Series(ssl_down, index=dataframe.index), Series(ssl_up, index=dataframe.index)
+
+def WaveTrend(dataframe, chlen=10, avg=21, smalen=4):
+    """
+    WaveTrend Ocillator by LazyBear
+    https://www.tradingview.com/script/2KE8wTuF-Indicator-WaveTrend-Oscillator-WT/
+    """
+    hlc3 = (_values(dataframe, 'high') + _values(dataframe, 'low') + _values(dataframe, 'close')) / 3
+    esa = talib.EMA(hlc3, timeperiod=chlen)
+    d = talib.EMA(np.abs(hlc3 - esa), timeperiod=chlen)
+    ci = (hlc3 - esa) / (0.015 * d)
+
+    wt1 = talib.EMA(ci, timeperiod=avg)
+    wt2 = talib.SMA(wt1, timeperiod=smalen)
+
+    return Series(wt1, index=dataframe.index), Series(wt2, index=dataframe.index)
+
+def T3(dataframe, length=5):
+    """
+    T3 Average by HPotter on Tradingview
+    https://www.tradingview.com/script/qzoC9H1I-T3-Average/
+    """
+    xe1 = talib.EMA(_values(dataframe, 'close'), timeperiod=length)
+    xe2 = talib.EMA(xe1, timeperiod=length)
+    xe3 = talib.EMA(xe2, timeperiod=length)
+    xe4 = talib.EMA(xe3, timeperiod=length)
+    xe5 = talib.EMA(xe4, timeperiod=length)
+    xe6 = talib.EMA(xe5, timeperiod=length)
+    b = 0.7
+    c1 = -b*b*b
+    c2 = 3*b*b+3*b*b*b
+    c3 = -6*b*b-3*b-3*b*b*b
+    c4 = 1+3*b+b*b*b+3*b*b
+
+    return Series(c1 * xe6 + c2 * xe5 + c3 * xe4 + c4 * xe3, index=dataframe.index)
+
+
+def SROC(dataframe, roclen=21, emalen=13, smooth=21):
+    # note: roclen is not used (kept for compatibility)
+    ema = talib.EMA(_values(dataframe, 'close'), timeperiod=emalen)
+    sroc = talib.ROC(ema, timeperiod=smooth)
+
+    return Series(sroc, index=dataframe.index)
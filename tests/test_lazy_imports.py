@@ -0,0 +1,59 @@
+# Tests that importing the binanceus modules does not load tensorflow/keras (see binanceus/LazyImport.py)
+# freqtrade imports every file in the strategy directory when it resolves a strategy, so any module that imports
+# tensorflow at the top slows down every freqtrade command
+#
+# Run with: python -m pytest tests
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+
+exchange_dir = Path(__file__).parent.parent / "binanceus"
+
+# modules that define keras layers, which must only be defined when a layer is first used
+layer_modules = ['Attention', 'MultiHeadAttention', 'Time2Vector', 'Transformer']
+
+# imports every module in a separate (fresh) python process. Any attempt to import tensorflow or keras is blocked and
+# recorded against the module being imported. Modules that can't be imported for other reasons (e.g. freqtrade is not
+# installed) are reported as skipped
+import_code = """
+import sys, json, importlib, importlib.abc
+sys.path.insert(0, sys.argv[1])
+blocked = ('tensorflow', 'keras')
+current = [None]
+loaded = {}
+
+class Blocker(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split('.')[0] in blocked:
+            loaded.setdefault(current[0], []).append(fullname)
+            raise ImportError('blocked import of ' + fullname)
+        return None
+
+sys.meta_path.insert(0, Blocker())
+skipped = {}
+for name in sys.argv[2].split(','):
+    current[0] = name
+    try:
+        importlib.import_module(name)
+    except BaseException as e:
+        skipped[name] = '{}: {}'.format(type(e).__name__, e)
+print(json.dumps({'loaded': loaded, 'skipped': skipped}))
+"""
+
+
+def import_modules(names: list) -> dict:
+    proc = subprocess.run([sys.executable, '-c', import_code, str(exchange_dir), ','.join(names)],
+                          capture_output=True, text=True, cwd=str(exchange_dir), timeout=600)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_modules_do_not_import_tensorflow():
+    names = sorted(f.stem for f in exchange_dir.glob('*.py'))
+    results = import_modules(names)
+    assert results['loaded'] == {}
+    for name in layer_modules:
+        assert name not in results['skipped']
@@ -0,0 +1,106 @@
+# Tests for binanceus/WalkForward.py: the labels used to train each window must not depend on the window's candles,
+# and the windows must also work when run in worker processes
+#
+# Run with: python -m pytest tests
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent / "binanceus"))
+
+from WalkForward import WalkForward
+
+
+lookahead = 12
+horizon = 2 * lookahead
+train_size = 200
+step = 50
+
+
+def make_dataframe(nrows=800, seed=1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, nrows)))
+    dates = pd.date_range('2022-01-01', periods=nrows, freq='5min', tz='UTC')
+    return pd.DataFrame({'date': dates, 'close': close})
+
+
+# labels built like PCA.add_future_data(): a forward gain, rolled forward again, against a threshold taken from the
+# mean/std of the whole (supplied) dataframe. Looks up to horizon candles ahead, and is not causal
+def get_labels(df: pd.DataFrame):
+    gain = 100.0 * (df['close'].shift(-lookahead) - df['close']) / df['close']
+    future_max = gain[::-1].rolling(lookahead, min_periods=1).max()[::-1].shift(-lookahead)
+    future_min = gain[::-1].rolling(lookahead, min_periods=1).min()[::-1].shift(-lookahead)
+    entries = (future_max > gain.mean() + gain.std()).astype(float)
+    exits = (future_min < gain.mean() - gain.std()).astype(float)
+    return entries, exits
+
+
+def run_walk_forward(dataframe: pd.DataFrame) -> dict:
+    labels = {}
+
+    def fit_predict(window, df_train, train_entries, train_exits, df_predict):
+        labels[window] = (train_entries.copy(), train_exits.copy())
+        return 0.0, 0.0
+
+    walker = WalkForward(train_size=train_size, step=step, horizon=horizon)
+    walker.run(dataframe, get_labels, fit_predict)
+    return labels
+
+
+def test_windows_are_embargoed():
+    walker = WalkForward(train_size=train_size, step=step, horizon=horizon)
+    windows = walker.windows(800)
+    assert windows[0][0] == train_size + horizon
+    for (start, end), labels in run_walk_forward(make_dataframe()).items():
+        entries, _ = labels
+        assert len(entries) == train_size
+        assert entries.index[-1] == start - horizon - 1
+
+
+def test_training_labels_do_not_see_the_window():
+    dataframe = make_dataframe()
+    window = WalkForward(train_size=train_size, step=step, horizon=horizon).windows(dataframe.shape[0])[3]
+    start, end = window
+
+    # change the prices inside (and after) the window
+    changed = dataframe.copy()
+    changed.loc[start:, 'close'] = changed.loc[start:, 'close'] * np.linspace(1.0, 1.5, changed.shape[0] - start)
+
+    # labels generated from the whole dataframe do change in the training rows (so the check below is meaningful)
+    train_rows = slice(start - horizon - train_size, start - horizon)
+    full_entries, full_exits = get_labels(dataframe)
+    changed_entries, changed_exits = get_labels(changed)
+    assert not (full_entries.iloc[train_rows].equals(changed_entries.iloc[train_rows]) and
+                full_exits.iloc[train_rows].equals(changed_exits.iloc[train_rows]))
+
+    # but the labels used to train the window do not
+    original = run_walk_forward(dataframe)[window]
+    modified = run_walk_forward(changed)[window]
+    pd.testing.assert_series_equal(original[0], modified[0])
+    pd.testing.assert_series_equal(original[1], modified[1])
+
+
+# the classifier scan (dbg_scan_classifiers) starts a pool of its own, which is not allowed in the (daemonic)
+# walk-forward workers, so it must run in the worker process rather than fail every window
+def test_classifier_scan_in_workers():
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.tree import DecisionTreeClassifier
+
+    import ClassifierScan
+
+    def fit_predict(window, df_train, train_entries, train_exits, df_predict):
+        classifiers = {'GaussianNB': GaussianNB(), 'DecisionTree': DecisionTreeClassifier(random_state=1)}
+        scores = ClassifierScan.scan_classifiers(classifiers, df_train[['close']], train_entries,
+                                                 df_train[['close']], train_entries, max_workers=2)
+        assert len(scores) == len(classifiers)
+        return 1.0, 1.0
+
+    dataframe = make_dataframe()
+    walker = WalkForward(train_size=train_size, step=step, horizon=horizon, max_workers=2)
+    pred_entries, pred_exits = walker.run(dataframe, get_labels, fit_predict)
+    first = walker.windows(dataframe.shape[0])[0][0]
+    assert (pred_entries[first:] == 1.0).all()
+    assert (pred_exits[first:] == 1.0).all()